@@ -14,22 +14,80 @@ YtubeData - أداة لاستخراج البيانات الوصفية من يو
 import sys
 import os
 import json
+import csv
 import argparse
 import datetime
-import pytz
-import requests
 import re
-import pandas as pd
-from tabulate import tabulate
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich import print as rprint
-from pytube import YouTube, Channel
-from pytube.exceptions import RegexMatchError, VideoUnavailable
+import codecs
+import time
+import random
+import itertools
+import functools
+import array
+import math
+import struct
+import io
+import gzip
+import hashlib
+import urllib.parse
+import sqlite3
+import collections
+import contextlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+
+# أقفال الملفات المستخدمة لمشاركة محدد المعدل بين العمليات
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# المكتبات الثقيلة (pytube و requests و rich و aiohttp) لا تُستورد عند تحميل الوحدة،
+# بل عند أول استخدام لها فقط، حتى يبقى تشغيل الأداة من سطر الأوامر سريعاً.
+# أسماء pytube المستخدمة في الوحدة، وتبقى None حتى يستوردها _load_pytube عند أول استخراج
+YouTube = Channel = RegexMatchError = VideoUnavailable = None
+
+
+def _load_pytube():
+    """استيراد pytube عند الحاجة وتعيين الأسماء المستخدمة منها على مستوى الوحدة
+
+    لا يُستبدل أي اسم عُيّن مسبقاً، فيبقى استبدال YouTube أو Channel في الاختبارات فعالاً.
+    """
+    global YouTube, Channel, RegexMatchError, VideoUnavailable
+    if None not in (YouTube, Channel, RegexMatchError, VideoUnavailable):
+        return
+    import pytube
+    import pytube.exceptions
+    YouTube = YouTube or pytube.YouTube
+    Channel = Channel or pytube.Channel
+    RegexMatchError = RegexMatchError or pytube.exceptions.RegexMatchError
+    VideoUnavailable = VideoUnavailable or pytube.exceptions.VideoUnavailable
+
+
+class _LazyConsole:
+    """وكيل لكائن rich Console لا يستورد مكتبة rich إلا عند أول استخدام"""
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            self.configure()
+        return getattr(self._console, name)
+
+    def configure(self, **options):
+        """إنشاء كائن Console بالخيارات المطلوبة (مثل quiet=True لإخفاء رسائل التقدم)"""
+        from rich.console import Console
+        self._console = Console(**options)
+
 
 # إنشاء كائن Console للطباعة الملونة
-console = Console()
+console = _LazyConsole()
 
 # تعريف الألوان
 COLORS = {
@@ -41,6 +99,118 @@ COLORS = {
     "highlight": "bold magenta"
 }
 
+# عدد العمال الافتراضي في وضع المعالجة الدفعية
+DEFAULT_WORKERS = 4
+
+# الحد الافتراضي لعدد الطلبات المتزامنة في المحرك غير المتزامن
+DEFAULT_CONCURRENCY = 100
+
+# ترويسات HTTP المستخدمة في الطرق الاحتياطية
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+# عنوان يوتيوب الذي تُنزَّل منه الصفحات في الطرق الاحتياطية
+YOUTUBE_BASE_URL = "https://www.youtube.com"
+
+# الحجم الافتراضي لمجمع اتصالات HTTP والمهلة الافتراضية للطلبات (بالثواني)
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 30
+
+# تنزيل الصفحات على أجزاء وإيقاف التنزيل عند اكتمال كائنات JSON المطلوبة (معطل افتراضياً)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# إعدادات ذاكرة التخزين المؤقت: المجلد الافتراضي، مدة الصلاحية لكل نوع (بالثواني) والحد الأقصى للمدخلات
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ytubedata")
+CACHE_TTL = {
+    "video": 24 * 3600,
+    "channel": 6 * 3600
+}
+CACHE_MAX_ENTRIES = 100000
+# مدة صلاحية النتائج الناقصة من الطريقة الاحتياطية (بالثواني) حتى لا يثبّت إخفاق عابر بيانات ناقصة
+CACHE_DEGRADED_TTL = 15 * 60
+# نسبة المدخلات المحذوفة دفعة واحدة عند تجاوز الحد الأقصى، حتى لا يتكرر الحذف مع كل كتابة
+CACHE_EVICT_FRACTION = 0.01
+# عدد أوقات الاستخدام المحفوظة في الذاكرة قبل كتابتها في قاعدة البيانات
+CACHE_TOUCH_BATCH = 1000
+
+# إعدادات إعادة المحاولة الافتراضية: عدد المحاولات، والتأخير الأولي والأقصى (بالثواني)
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# إعدادات قاطع الدائرة: عدد الإخفاقات المتتالية قبل فتحه، ومدة التهدئة (بالثواني)
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+
+# إعدادات محدد المعدل: المعدل الافتراضي (طلب/ثانية)، ومدة استعادة المعدل بعد التقييد (بالثواني)،
+# وعدد مرات إعادة الطلب بعد استجابة 429
+RATE_LIMIT_DEFAULT = 5.0
+RATE_LIMIT_RECOVERY = 30.0
+RATE_LIMIT_RETRIES = 3
+
+# عنوان ومنفذ الخدمة المحلية (serve) والحد الأقصى لعدد الروابط وحجم الطلب في /batch
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8080
+SERVE_MAX_BATCH = 500
+SERVE_MAX_BODY = 1024 * 1024
+# مدة صلاحية النتائج في ذاكرة العملية للخدمة (بالثواني)
+SERVE_MEMO_TTL = 300
+
+# وضع المراقبة watch: الفترة الافتراضية بين جولات الاستطلاع (بالثواني) وملف العينات
+WATCH_INTERVAL = 3600.0
+WATCH_STORE_FILE = "views.ytvs"
+
+# analyze: المئينات المحسوبة لعدد المشاهدات، وفئات المدة (بالثواني) لتوزيع مدد الفيديوهات
+ANALYZE_VIEW_QUANTILES = (0.5, 0.9, 0.99)
+ANALYZE_DURATION_BINS = (
+    (60, "حتى دقيقة"),
+    (240, "1-4 دقائق"),
+    (1200, "4-20 دقيقة"),
+    (float("inf"), "أكثر من 20 دقيقة")
+)
+ANALYZE_FORMATS = ("console", "json", "csv")
+
+# ingest: امتدادات الصفحات المحفوظة المقروءة من المجلدات والأرشيفات
+INGEST_EXTENSIONS = (".html", ".htm", ".html.gz", ".htm.gz")
+
+# أرشيف الصفحات المنزَّلة (--archive): ملف الفهرس ومستوى الضغط لكل خوارزمية
+ARCHIVE_INDEX_FILE = "index.sqlite3"
+ARCHIVE_ZSTD_LEVEL = 10
+ARCHIVE_GZIP_LEVEL = 6
+
+# النسب المئوية المعروضة لأزمنة المراحل وتنسيقات ملف المقاييس
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+METRICS_FORMATS = ("json", "prometheus")
+
+# الحد الأقصى لعدد النتائج المحفوظة في ذاكرة العملية (memoization)
+MEMO_MAX_ENTRIES = 10000
+
+# أوضاع استخراج معلومات الدقة المتاحة: none (تخطيها)، basic (من استجابة المشغل فقط دون طلبات إضافية)،
+# full (حساب حجم كل دقة بطلبات متزامنة)، والحد الأقصى لعدد هذه الطلبات لكل فيديو
+STREAM_MODES = ("none", "basic", "full")
+DEFAULT_STREAM_MODE = "full"
+STREAM_SIZE_WORKERS = 8
+
+# تفريغ مخرجات NDJSON إلى الملف بعد هذا العدد من السجلات أو بعد هذه المدة بالثواني
+NDJSON_FLUSH_RECORDS = 100
+NDJSON_FLUSH_INTERVAL = 1.0
+
+# عدد السجلات في كل مجموعة صفوف (row group) عند الإخراج بتنسيق Parquet
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# العدد الافتراضي لفيديوهات القناة المستخرجة (None لجميع الفيديوهات)
+CHANNEL_VIDEOS_LIMIT = 5
+
+# في وضع المزامنة يتوقف جلب القائمة عند فيديو أقدم من آخر فيديو مسجل بأكثر من هذا الهامش،
+# لأن تواريخ النشر بدقة يوم (pytube) أو مقدَّرة من نص نسبي ("3 days ago") في الطريقة الاحتياطية
+SYNC_PUBLISHED_SLACK = datetime.timedelta(days=1)
+
+# أنواع الكائنات التي تحمل فيديوهات القناة أو رمز المتابعة إلى الصفحة التالية
+_CHANNEL_PAGE_RENDERERS = ("videoRenderer", "gridVideoRenderer", "continuationItemRenderer")
+
 
 def print_banner():
     """عرض شعار البرنامج"""
@@ -65,6 +235,7 @@ def print_banner():
 │                                                                              │
 ╰──────────────────────────────────────────────────────────────────────────────╯
     """
+    from rich.panel import Panel
     console.print(Panel(banner, style="bold magenta", border_style="bold cyan", title="[bold yellow]YtubeData v1.0[/bold yellow]", subtitle="[bold green]استخراج البيانات بكفاءة[/bold green]"))
 
 
@@ -99,7 +270,7 @@ def format_duration(duration_seconds):
 
 def format_number(number):
     """تنسيق الأرقام بإضافة فواصل للآلاف"""
-    if not number:
+    if number is None or number == "":
         return "غير متوفر"
     try:
         return f"{int(number):,}"
@@ -107,470 +278,3955 @@ def format_number(number):
         return str(number)
 
 
-def fallback_get_video_info(video_id):
-    """طريقة احتياطية للحصول على معلومات الفيديو باستخدام requests"""
-    try:
-        console.print(f"[{COLORS['info']}]استخدام الطريقة الاحتياطية للحصول على معلومات الفيديو...[/{COLORS['info']}]")
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            return None
-            
-        html_content = response.text
-        
-        # استخراج العنوان
-        title_match = re.search(r'<title>(.*?) - YouTube</title>', html_content)
-        title = title_match.group(1) if title_match else "غير متوفر"
-        
-        # استخراج اسم القناة
-        channel_name_match = re.search(r'"ownerChannelName":"([^"]+)"', html_content)
-        channel_name = channel_name_match.group(1) if channel_name_match else "غير متوفر"
-        
-        # استخراج معرف القناة
-        channel_id_match = re.search(r'"channelId":"([^"]+)"', html_content)
-        channel_id = channel_id_match.group(1) if channel_id_match else "غير متوفر"
-        
-        # استخراج عدد المشاهدات
-        views_match = re.search(r'"viewCount":"([^"]+)"', html_content)
-        views = views_match.group(1) if views_match else "غير متوفر"
-        
-        # استخراج تاريخ النشر
-        date_match = re.search(r'"publishDate":"([^"]+)"', html_content)
-        publish_date = date_match.group(1) if date_match else "غير متوفر"
-        
-        # استخراج صورة الغلاف
-        thumbnail_match = re.search(r'"thumbnailUrl":\["([^"]+)"', html_content)
-        thumbnail = thumbnail_match.group(1) if thumbnail_match else "غير متوفر"
-        
-        metadata = {
-            "عنوان الفيديو": title,
-            "معرف الفيديو": video_id,
-            "اسم القناة": channel_name,
-            "معرف القناة": channel_id,
-            "رابط القناة": f"https://www.youtube.com/channel/{channel_id}" if channel_id != "غير متوفر" else "غير متوفر",
-            "عدد المشاهدات": format_number(views),
-            "تاريخ النشر": publish_date,
-            "صورة الغلاف": thumbnail,
-            "ملاحظة": "تم استخراج البيانات باستخدام الطريقة الاحتياطية. بعض المعلومات قد تكون غير متاحة."
-        }
-        
-        return metadata
-    except Exception as e:
-        console.print(f"[{COLORS['error']}]فشل في الطريقة الاحتياطية: {str(e)}[/{COLORS['error']}]")
-        return None
+def format_datetime(value):
+    """تنسيق تاريخ النشر للعرض (التاريخ فقط إذا لم يكن للوقت قيمة)"""
+    if not value:
+        return "غير متوفر"
+    if not isinstance(value, datetime.datetime):
+        return str(value)
+    if (value.hour, value.minute, value.second) == (0, 0, 0):
+        return value.strftime("%Y-%m-%d")
+    return value.strftime("%Y-%m-%d %H:%M:%S")
 
 
-def fallback_get_channel_info(channel_id):
-    """طريقة احتياطية للحصول على معلومات القناة باستخدام requests"""
-    try:
-        console.print(f"[{COLORS['info']}]استخدام الطريقة الاحتياطية للحصول على معلومات القناة...[/{COLORS['info']}]")
-        url = f"https://www.youtube.com/channel/{channel_id}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            return None
-            
-        html_content = response.text
-        
-        # استخراج اسم القناة
-        channel_name_match = re.search(r'<meta name="title" content="([^"]+)"', html_content)
-        channel_name = channel_name_match.group(1) if channel_name_match else "غير متوفر"
-        
-        # استخراج الوصف
-        description_match = re.search(r'<meta name="description" content="([^"]+)"', html_content)
-        description = description_match.group(1) if description_match else "غير متوفر"
-        
-        # محاولة استخراج بعض الفيديوهات
-        videos_info = []
-        video_titles = re.findall(r'"title":{"runs":\[{"text":"([^"]+)"}\]}', html_content)
-        video_ids = re.findall(r'"videoId":"([^"]+)"', html_content)
-        
-        # جمع معلومات الفيديوهات المتاحة (حتى 5 فيديوهات)
-        for i in range(min(5, len(video_ids))):
-            if i < len(video_titles):
-                video_info = {
-                    "عنوان الفيديو": video_titles[i],
-                    "معرف الفيديو": video_ids[i],
-                    "رابط الفيديو": f"https://www.youtube.com/watch?v={video_ids[i]}",
-                    "تاريخ النشر": "غير متوفر",  # صعب استخراجه بهذه الطريقة
-                    "عدد المشاهدات": "غير متوفر",  # صعب استخراجه بهذه الطريقة
-                    "المدة": "غير متوفر"  # صعب استخراجه بهذه الطريقة
-                }
-                videos_info.append(video_info)
-        
-        metadata = {
-            "اسم القناة": channel_name,
-            "معرف القناة": channel_id,
-            "الوصف": description[:200] + "..." if description and len(description) > 200 else description,
-            "رابط القناة": url,
-            "عدد المشتركين": "غير متاح (بسبب قيود API)",
-            "آخر الفيديوهات": videos_info,
-            "ملاحظة": "تم استخراج البيانات باستخدام الطريقة الاحتياطية. بعض المعلومات قد تكون غير متاحة."
-        }
-        
-        return metadata
-    except Exception as e:
-        console.print(f"[{COLORS['error']}]فشل في الطريقة الاحتياطية للقناة: {str(e)}[/{COLORS['error']}]")
-        return None
+# تسميات العرض ودوال التنسيق للحقول الخام التي تحتاج إلى تنسيق في وحدة التحكم
+_DISPLAY_LABELS = {"المدة (ثواني)": "المدة"}
+_DISPLAY_FORMATTERS = {
+    "عدد المشاهدات": format_number,
+    "المدة (ثواني)": format_duration,
+    "تاريخ النشر": format_datetime
+}
 
 
-def get_video_metadata(url):
-    """استخراج البيانات الوصفية للفيديو"""
-    try:
-        console.print(f"[{COLORS['info']}]جاري استخراج البيانات من: {url}[/{COLORS['info']}]")
-        
-        # استخراج معرف الفيديو من الرابط
-        video_id = None
-        if "youtube.com/watch" in url and "v=" in url:
-            video_id = url.split("v=")[1].split("&")[0]
-        elif "youtu.be/" in url:
-            video_id = url.split("youtu.be/")[1].split("?")[0]
-        
-        if not video_id:
-            console.print(f"[{COLORS['error']}]خطأ: لم يتم العثور على معرف الفيديو في الرابط.[/{COLORS['error']}]")
+def _display_value(key, value):
+    """تحويل قيمة خام (رقم، تاريخ، قيمة منطقية، قائمة) إلى نص للعرض في وحدة التحكم"""
+    if key in _DISPLAY_FORMATTERS:
+        return _DISPLAY_FORMATTERS[key](value)
+    if isinstance(value, bool):
+        return "نعم" if value else "لا"
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value) if value else "غير متوفر"
+    if value is None or value == "":
+        return "غير متوفر"
+    return str(value)
+
+
+def _json_default(obj):
+    """تحويل الأنواع غير المدعومة في JSON: السجلات إلى قواميس والتواريخ إلى نص بتنسيق ISO 8601"""
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+class _Record:
+    """الأساس المشترك لسجلات البيانات المدمجة (VideoRecord و StreamRecord وغيرها)
+
+    تُخزن الحقول في __slots__ بأسماء إنجليزية قصيرة بدلاً من قاموس بمفاتيح عربية طويلة،
+    فيقل استهلاك الذاكرة لكل سجل كثيراً عند الاحتفاظ بدفعات كبيرة. يبقى السجل متوافقاً
+    مع القاموس القديم: record["عنوان الفيديو"] و get و in و items، ويُحوَّل إليه عبر to_dict.
+    الحقول التي لم تُحدد لا تظهر في to_dict، وقراءتها كسمة تُرجع None.
+    """
+
+    __slots__ = ()
+    # أزواج (اسم السمة، المفتاح العربي) بترتيب الإخراج
+    FIELDS = ()
+    # السمات التي تحتوي على قوائم سجلات متداخلة ونوع سجلاتها
+    NESTED = {}
+    _KEY_TO_ATTR = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._KEY_TO_ATTR = {key: name for name, key in cls.FIELDS}
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        # الحقول غير المحددة تُقرأ None
+        if name in self.__slots__:
             return None
-        
-        # إضافة محاولة إصلاح مشكلة HTTP Error 400
+        raise AttributeError(name)
+
+    @classmethod
+    def _attr(cls, key):
+        """اسم السمة المقابل للمفتاح العربي (أو اسم السمة نفسه)"""
+        return cls._KEY_TO_ATTR.get(key, key if key in cls.__slots__ else None)
+
+    @classmethod
+    def from_dict(cls, data):
+        """إنشاء السجل من قاموس بالمفاتيح العربية (مثل المخزن في الذاكرة المؤقتة)"""
+        if isinstance(data, cls):
+            return data
+        fields = {}
+        for key, value in data.items():
+            name = cls._attr(key)
+            if name is None:
+                continue
+            if name in cls.NESTED and value is not None:
+                value = [cls.NESTED[name].from_dict(item) for item in value]
+            fields[name] = value
+        return cls(**fields)
+
+    def _is_set(self, name):
         try:
-            from pytube.innertube import InnerTube
-            innertube_client = InnerTube("WEB", use_oauth=False, allow_cache=True)
-        except ImportError:
-            pass
-            
-        # محاولة استخدام pytube
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    def keys(self):
+        return [key for name, key in self.FIELDS if self._is_set(name)]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key):
+        name = self._attr(key)
+        return name is not None and self._is_set(name)
+
+    def __getitem__(self, key):
+        name = self._attr(key)
+        if name is None or not self._is_set(name):
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def __setitem__(self, key, value):
+        name = self._attr(key)
+        if name is None:
+            raise KeyError(key)
+        setattr(self, name, value)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __getstate__(self):
+        # الحقول المحددة فقط، حتى لا تتحول الحقول غير المحددة إلى None عند النقل بين العمليات
+        return {name: object.__getattribute__(self, name) for name in self.__slots__ if self._is_set(name)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def to_dict(self):
+        """تحويل السجل إلى قاموس بالمفاتيح العربية (بما في ذلك السجلات المتداخلة)"""
+        data = {}
+        for name, key in self.FIELDS:
+            if self._is_set(name):
+                value = getattr(self, name)
+                if name in self.NESTED and value is not None:
+                    value = [_as_dict(item) for item in value]
+                data[key] = value
+        return data
+
+    def __eq__(self, other):
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name, key in self.FIELDS if self._is_set(name))
+        return f"{type(self).__name__}({fields})"
+
+
+class StreamRecord(_Record):
+    """سجل دقة متاحة للفيديو"""
+
+    FIELDS = (
+        ("itag", "itag"),
+        ("resolution", "الدقة"),
+        ("mime_type", "نوع الملف"),
+        ("fps", "FPS"),
+        ("size_mb", "الحجم (MB)")
+    )
+    __slots__ = tuple(name for name, key in FIELDS)
+
+
+class ChannelVideoRecord(_Record):
+    """سجل فيديو في قائمة فيديوهات القناة"""
+
+    FIELDS = (
+        ("title", "عنوان الفيديو"),
+        ("video_id", "معرف الفيديو"),
+        ("url", "رابط الفيديو"),
+        ("publish_date", "تاريخ النشر"),
+        ("views", "عدد المشاهدات"),
+        ("length", "المدة (ثواني)")
+    )
+    __slots__ = tuple(name for name, key in FIELDS)
+
+
+class VideoRecord(_Record):
+    """سجل البيانات الوصفية للفيديو"""
+
+    FIELDS = (
+        ("title", "عنوان الفيديو"),
+        ("description", "وصف الفيديو"),
+        ("video_id", "معرف الفيديو"),
+        ("author", "اسم القناة"),
+        ("channel_url", "رابط القناة"),
+        ("channel_id", "معرف القناة"),
+        ("publish_date", "تاريخ النشر"),
+        ("length", "المدة (ثواني)"),
+        ("views", "عدد المشاهدات"),
+        ("rating", "تقييم الفيديو"),
+        ("keywords", "الكلمات المفتاحية"),
+        ("family_safe", "مناسب للعائلة"),
+        ("age_restricted", "مقيد بالعمر"),
+        ("thumbnail_url", "صورة الغلاف"),
+        ("streams", "الدقة المتاحة"),
+        ("note", "ملاحظة")
+    )
+    NESTED = {"streams": StreamRecord}
+    __slots__ = tuple(name for name, key in FIELDS)
+
+
+class ChannelRecord(_Record):
+    """سجل البيانات الوصفية للقناة"""
+
+    FIELDS = (
+        ("name", "اسم القناة"),
+        ("channel_id", "معرف القناة"),
+        ("description", "الوصف"),
+        ("url", "رابط القناة"),
+        ("subscribers", "عدد المشتركين"),
+        ("videos", "آخر الفيديوهات"),
+        ("note", "ملاحظة")
+    )
+    NESTED = {"videos": ChannelVideoRecord}
+    __slots__ = tuple(name for name, key in FIELDS)
+
+
+# نوع السجل لكل نوع من البيانات
+RECORD_TYPES = {"video": VideoRecord, "channel": ChannelRecord}
+
+
+def _as_dict(metadata):
+    """تحويل السجل إلى قاموس بالمفاتيح العربية، وترك القواميس كما هي"""
+    return metadata.to_dict() if isinstance(metadata, _Record) else metadata
+
+
+def _build_http_session(pool_size):
+    """بناء جلسة requests بمجمع اتصالات محدد الحجم وترويسات تدعم الضغط"""
+    import requests
+    import requests.adapters
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# نمط يحدد بداية كائنات JSON المضمنة في صفحات يوتيوب (ytInitialPlayerResponse و ytInitialData)
+_INITIAL_JSON_RE = re.compile(r'\b(ytInitialPlayerResponse|ytInitialData)"?\]?\s*=\s*(?=\{)')
+_JSON_DECODER = json.JSONDecoder()
+
+# أنماط احتياطية للصفحات التي لا تحتوي على كائنات JSON المضمنة
+_TITLE_RE = re.compile(r'<title>(.*?) - YouTube</title>')
+_OWNER_NAME_RE = re.compile(r'"ownerChannelName":"([^"]+)"')
+_CHANNEL_ID_RE = re.compile(r'"channelId":"([^"]+)"')
+_VIEW_COUNT_RE = re.compile(r'"viewCount":"([^"]+)"')
+_PUBLISH_DATE_RE = re.compile(r'"publishDate":"([^"]+)"')
+_THUMBNAIL_RE = re.compile(r'"thumbnailUrl":\["([^"]+)"')
+_META_TITLE_RE = re.compile(r'<meta name="title" content="([^"]+)"')
+_META_DESCRIPTION_RE = re.compile(r'<meta name="description" content="([^"]+)"')
+_EXTERNAL_ID_RE = re.compile(r'"externalId":"([^"]+)"')
+_GRID_TITLE_RE = re.compile(r'"title":{"runs":\[{"text":"([^"]+)"}\]}')
+_VIDEO_ID_RE = re.compile(r'"videoId":"([^"]+)"')
+_VIDEO_ID_FORMAT_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_DIGITS_RE = re.compile(r"[^0-9]")
+_RELATIVE_TIME_RE = re.compile(r"(\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago", re.I)
+_RELATIVE_UNITS = {
+    "second": 1, "minute": 60, "hour": 3600, "day": 86400,
+    "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400
+}
+
+FALLBACK_NOTE = "تم استخراج البيانات باستخدام الطريقة الاحتياطية. بعض المعلومات قد تكون غير متاحة."
+
+
+def extract_initial_json(html_content):
+    """العثور على كائنات JSON المضمنة في الصفحة وفك ترميز كل منها مرة واحدة
+
+    تُمسح الصفحة مرة واحدة من البداية إلى النهاية، ويُتخطى محتوى كل كائن بعد
+    فك ترميزه. تُرجع قاموساً بالمفاتيح "ytInitialPlayerResponse" و "ytInitialData"
+    لما عُثر عليه منها.
+    """
+    blobs = {}
+    position = 0
+    while len(blobs) < 2:
+        match = _INITIAL_JSON_RE.search(html_content, position)
+        if not match:
+            break
+        name = match.group(1)
+        position = match.end()
+        if name in blobs:
+            continue
         try:
-            yt = YouTube(url)
-            
-            # محاولة الحصول على البيانات مع إعادة المحاولة
-            retry_count = 0
-            max_retries = 3
-            while retry_count < max_retries:
-                try:
-                    # جمع البيانات الأساسية
-                    metadata = {
-                        "عنوان الفيديو": yt.title,
-                        "وصف الفيديو": yt.description[:200] + "..." if yt.description and len(yt.description) > 200 else yt.description,
-                        "معرف الفيديو": yt.video_id,
-                        "اسم القناة": yt.author,
-                        "رابط القناة": f"https://www.youtube.com/channel/{yt.channel_id}",
-                        "معرف القناة": yt.channel_id,
-                        "تاريخ النشر": yt.publish_date.strftime("%Y-%m-%d %H:%M:%S") if yt.publish_date else "غير متوفر",
-                        "المدة (ثواني)": yt.length,
-                        "المدة (منسقة)": format_duration(yt.length),
-                        "عدد المشاهدات": format_number(yt.views),
-                        "تقييم الفيديو": yt.rating if hasattr(yt, 'rating') else "غير متوفر",
-                        "الكلمات المفتاحية": yt.keywords if hasattr(yt, 'keywords') else "غير متوفر",
-                        "مناسب للعائلة": "نعم" if not yt.age_restricted else "لا",
-                        "مقيد بالعمر": "نعم" if yt.age_restricted else "لا",
-                        "صورة الغلاف": yt.thumbnail_url,
-                    }
-                    
-                    # جمع معلومات الدقة المتاحة
-                    streams_info = []
-                    for stream in yt.streams.filter(progressive=True):
-                        streams_info.append({
-                            "itag": stream.itag,
-                            "الدقة": stream.resolution,
-                            "نوع الملف": stream.mime_type,
-                            "FPS": stream.fps,
-                            "الحجم (MB)": round(stream.filesize / (1024 * 1024), 2) if stream.filesize else "غير متوفر"
-                        })
-                    
-                    metadata["الدقة المتاحة"] = streams_info
-                    
-                    return metadata
-                    
-                except Exception as inner_e:
-                    retry_count += 1
-                    if retry_count >= max_retries:
-                        raise inner_e
-                    console.print(f"[{COLORS['warning']}]محاولة إعادة الاتصال ({retry_count}/{max_retries})...[/{COLORS['warning']}]")
-                    import time
-                    time.sleep(2)  # انتظار قبل إعادة المحاولة
-        
-        except (VideoUnavailable, RegexMatchError, Exception) as e:
-            console.print(f"[{COLORS['warning']}]فشل استخدام pytube: {str(e)}[/{COLORS['warning']}]")
-            console.print(f"[{COLORS['info']}]محاولة استخدام الطريقة الاحتياطية...[/{COLORS['info']}]")
-            
-            # استخدام الطريقة الاحتياطية
-            fallback_metadata = fallback_get_video_info(video_id)
-            if fallback_metadata:
-                return fallback_metadata
-            else:
-                raise Exception("فشلت الطريقة الاحتياطية أيضاً")
-    
-    except VideoUnavailable:
-        console.print(f"[{COLORS['error']}]خطأ: الفيديو غير متاح أو تم حذفه.[/{COLORS['error']}]")
-        return None
-    except RegexMatchError:
-        console.print(f"[{COLORS['error']}]خطأ: الرابط غير صالح.[/{COLORS['error']}]")
+            blobs[name], position = _JSON_DECODER.raw_decode(html_content, match.end())
+        except ValueError:
+            continue
+    return blobs
+
+
+def _json_text(value):
+    """تحويل حقول النص في JSON يوتيوب (simpleText أو runs) إلى نص عادي"""
+    if not isinstance(value, dict):
+        return value if isinstance(value, str) else ""
+    if "simpleText" in value:
+        return value["simpleText"]
+    return "".join(run.get("text", "") for run in value.get("runs", []))
+
+
+def _iter_json_renderers(node, names):
+    """المرور على شجرة JSON بترتيب المستند وإنتاج الكائنات الموجودة تحت المفاتيح المطلوبة"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            children = []
+            for key, value in node.items():
+                if key in names and isinstance(value, dict):
+                    yield value
+                elif isinstance(value, (dict, list)):
+                    children.append(value)
+            stack.extend(reversed(children))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _size_mb(size):
+    """تحويل الحجم بالبايت إلى ميغابايت مقرباً لمنزلتين، أو None إذا لم يكن معروفاً"""
+    return round(size / (1024 * 1024), 2) if size else None
+
+
+def _parse_int(value):
+    """تحويل عدد (أو نص مثل "1,234 views") إلى int، أو None إذا لم يحتوِ على أرقام"""
+    if value is None or isinstance(value, int):
+        return value
+    digits = _DIGITS_RE.sub("", str(value))
+    if digits:
+        return int(digits)
+    return 0 if str(value).lower().startswith("no ") else None
+
+
+def _parse_clock(text):
+    """تحويل مدة بتنسيق ساعات:دقائق:ثواني (مثل "1:02:03") إلى عدد الثواني"""
+    if not text:
         return None
-    except Exception as e:
-        console.print(f"[{COLORS['error']}]خطأ غير متوقع: {str(e)}[/{COLORS['error']}]")
-        console.print(f"[{COLORS['info']}]نصيحة: قد تكون هناك مشكلة في مكتبة pytube أو تغيير في واجهة برمجة التطبيقات الخاصة بيوتيوب.[/{COLORS['info']}]")
+    seconds = 0
+    try:
+        for part in text.strip().split(":"):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
         return None
+    return seconds
 
 
-def get_channel_metadata(url):
-    """استخراج البيانات الوصفية للقناة"""
-    try:
-        console.print(f"[{COLORS['info']}]جاري استخراج بيانات القناة من: {url}[/{COLORS['info']}]")
-        
-        # استخراج معرف القناة من الرابط
-        channel_id = None
-        if '/channel/' in url:
-            channel_id = url.split('/channel/')[1].split('/')[0]
-        elif '/c/' in url or '/user/' in url or '@' in url:
-            # للقنوات المخصصة، نحتاج إلى زيارة الصفحة أولاً للحصول على معرف القناة
-            try:
-                # محاولة استيراد InnerTube لإصلاح مشكلة HTTP Error 400
-                try:
-                    from pytube.innertube import InnerTube
-                    innertube_client = InnerTube("WEB", use_oauth=False, allow_cache=True)
-                except ImportError:
-                    pass
-                    
-                channel = Channel(url)
-                channel_id = channel.channel_id
-            except Exception as e:
-                console.print(f"[{COLORS['warning']}]فشل في استخراج معرف القناة من الرابط المخصص: {str(e)}[/{COLORS['warning']}]")
-        
-        # إضافة محاولة إصلاح مشكلة HTTP Error 400
+def _parse_datetime(value):
+    """تحويل تاريخ (نص ISO 8601 أو datetime) إلى datetime بالتوقيت العالمي UTC مع منطقته الزمنية
+
+    تُوحَّد جميع التواريخ بالتوقيت العالمي حتى يكون لعمود تاريخ النشر نوع واحد، وتبقى
+    المنطقة الزمنية ظاهرة في الإخراج ("+00:00"). التواريخ دون منطقة زمنية تُعد بالتوقيت العالمي.
+    """
+    if not value:
+        return None
+    if not isinstance(value, datetime.datetime):
         try:
-            from pytube.innertube import InnerTube
-            innertube_client = InnerTube("WEB", use_oauth=False, allow_cache=True)
-        except ImportError:
-            pass
-            
-        # محاولة الحصول على البيانات مع إعادة المحاولة
-        retry_count = 0
-        max_retries = 3
-        
-        while retry_count < max_retries:
-            try:
-                channel = Channel(url)
-                
-                # جمع البيانات الأساسية للقناة
-                metadata = {
-                    "اسم القناة": channel.channel_name,
-                    "معرف القناة": channel.channel_id,
-                    "الوصف": channel.channel_about[:200] + "..." if hasattr(channel, 'channel_about') and channel.channel_about and len(channel.channel_about) > 200 else getattr(channel, 'channel_about', "غير متوفر"),
-                    "رابط القناة": url,
-                    "عدد المشتركين": "غير متاح (بسبب قيود API)" # يوتيوب لم يعد يوفر هذه المعلومة بسهولة
-                }
-                
-                # جمع معلومات آخر 5 فيديوهات
-                videos_info = []
-                count = 0
-                
-                console.print(f"[{COLORS['info']}]جاري استخراج معلومات آخر 5 فيديوهات...[/{COLORS['info']}]")
-                for video in channel.videos:
-                    if count >= 5:
-                        break
-                        
-                    video_info = {
-                        "عنوان الفيديو": video.title,
-                        "معرف الفيديو": video.video_id,
-                        "رابط الفيديو": f"https://www.youtube.com/watch?v={video.video_id}",
-                        "تاريخ النشر": video.publish_date.strftime("%Y-%m-%d") if video.publish_date else "غير متوفر",
-                        "عدد المشاهدات": format_number(video.views),
-                        "المدة": format_duration(video.length)
-                    }
-                    
-                    videos_info.append(video_info)
-                    count += 1
-                
-                metadata["آخر الفيديوهات"] = videos_info
-                
-                return metadata
-                
-            except Exception as inner_e:
-                retry_count += 1
-                if retry_count >= max_retries:
-                    raise inner_e
-                console.print(f"[{COLORS['warning']}]محاولة إعادة الاتصال ({retry_count}/{max_retries})...[/{COLORS['warning']}]")
-                import time
-                time.sleep(2)  # انتظار قبل إعادة المحاولة
-        
-        # إذا فشلت جميع المحاولات، استخدم الطريقة الاحتياطية
-        console.print(f"[{COLORS['warning']}]فشلت جميع المحاولات باستخدام pytube. جاري تجربة الطريقة الاحتياطية...[/{COLORS['warning']}]")
-        if channel_id:
-            fallback_metadata = fallback_get_channel_info(channel_id)
-            if fallback_metadata:
-                return fallback_metadata
-    
-    except Exception as e:
-        console.print(f"[{COLORS['error']}]خطأ في استخراج بيانات القناة: {str(e)}[/{COLORS['error']}]")
-        console.print(f"[{COLORS['info']}]نصيحة: قد تكون هناك مشكلة في مكتبة pytube أو تغيير في واجهة برمجة التطبيقات الخاصة بيوتيوب.[/{COLORS['info']}]")
+            value = datetime.datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def _parse_relative_time(text, now=None):
+    """تقدير تاريخ النشر من نص نسبي مثل "3 days ago" كما يظهر في قوائم فيديوهات القناة"""
+    match = _RELATIVE_TIME_RE.search(text or "")
+    if not match:
         return None
+    now = _parse_datetime(now) or datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+    return now - datetime.timedelta(seconds=int(match.group(1)) * _RELATIVE_UNITS[match.group(2).lower()])
 
 
-def display_video_metadata(metadata, output_format="console", output_file=None):
-    """عرض البيانات الوصفية للفيديو بالتنسيق المطلوب"""
-    if not metadata:
-        return
-    
-    if output_format == "console":
-        # عرض البيانات الأساسية في جدول
-        table = Table(title=f"البيانات الوصفية للفيديو: {metadata['عنوان الفيديو']}")
-        table.add_column("الخاصية", style="cyan")
-        table.add_column("القيمة", style="green")
-        
-        for key, value in metadata.items():
-            if key != "الدقة المتاحة":
-                if isinstance(value, list):
-                    table.add_row(key, ", ".join(str(item) for item in value) if value else "غير متوفر")
-                else:
-                    table.add_row(key, str(value) if value else "غير متوفر")
-        
-        console.print(table)
-        
-        # عرض معلومات الدقة في جدول منفصل
-        if "الدقة المتاحة" in metadata and metadata["الدقة المتاحة"]:
-            streams_table = Table(title="معلومات الدقة المتاحة")
-            streams_table.add_column("itag", style="cyan")
-            streams_table.add_column("الدقة", style="green")
-            streams_table.add_column("نوع الملف", style="yellow")
-            streams_table.add_column("FPS", style="blue")
-            streams_table.add_column("الحجم (MB)", style="magenta")
-            
-            for stream in metadata["الدقة المتاحة"]:
-                streams_table.add_row(
-                    str(stream["itag"]),
-                    str(stream["الدقة"]),
-                    str(stream["نوع الملف"]),
-                    str(stream["FPS"]),
-                    str(stream["الحجم (MB)"])
-                )
-            
-            console.print(streams_table)
-    
-    elif output_format == "json":
-        # تصدير البيانات بتنسيق JSON
-        json_data = json.dumps(metadata, ensure_ascii=False, indent=4)
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(json_data)
-            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {output_file}[/{COLORS['success']}]")
-        else:
-            print(json_data)
-    
-    elif output_format == "csv":
-        # تصدير البيانات الأساسية بتنسيق CSV
-        basic_data = {k: v for k, v in metadata.items() if k != "الدقة المتاحة" and not isinstance(v, list)}
-        df = pd.DataFrame([basic_data])
-        
-        if output_file:
-            df.to_csv(output_file, index=False, encoding='utf-8')
-            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {output_file}[/{COLORS['success']}]")
-        else:
-            print(df.to_csv(index=False))
-        
-        # تصدير بيانات الدقة في ملف منفصل إذا كان متاحاً
-        if "الدقة المتاحة" in metadata and metadata["الدقة المتاحة"] and output_file:
-            streams_df = pd.DataFrame(metadata["الدقة المتاحة"])
-            streams_file = output_file.replace('.csv', '_streams.csv')
-            streams_df.to_csv(streams_file, index=False, encoding='utf-8')
-            console.print(f"[{COLORS['success']}]تم حفظ بيانات الدقة في الملف: {streams_file}[/{COLORS['success']}]")
+def _truncate(text, limit=200):
+    """اختصار النصوص الطويلة (مثل الأوصاف) إلى limit حرفاً"""
+    return text[:limit] + "..." if text and len(text) > limit else text
 
 
-def display_channel_metadata(metadata, output_format="console", output_file=None):
-    """عرض البيانات الوصفية للقناة بالتنسيق المطلوب"""
-    if not metadata:
-        return
-    
-    if output_format == "console":
-        # عرض البيانات الأساسية في جدول
-        table = Table(title=f"البيانات الوصفية للقناة: {metadata['اسم القناة']}")
-        table.add_column("الخاصية", style="cyan")
-        table.add_column("القيمة", style="green")
-        
-        for key, value in metadata.items():
-            if key != "آخر الفيديوهات":
-                table.add_row(key, str(value) if value else "غير متوفر")
-        
-        console.print(table)
-        
-        # عرض معلومات آخر الفيديوهات في جدول منفصل
-        if "آخر الفيديوهات" in metadata and metadata["آخر الفيديوهات"]:
-            videos_table = Table(title="آخر الفيديوهات في القناة")
-            videos_table.add_column("العنوان", style="cyan")
-            videos_table.add_column("تاريخ النشر", style="green")
+def parse_video_page(html_content, video_id, blobs=None):
+    """استخراج البيانات الوصفية للفيديو من محتوى صفحة المشاهدة
+
+    تُستخرج جميع الحقول من كائن ytInitialPlayerResponse بعد فك ترميزه مرة واحدة،
+    مع الرجوع إلى الأنماط النصية إذا لم يكن الكائن موجوداً في الصفحة. يمكن تمرير
+    الكائنات المفكوكة مسبقاً عبر blobs (كما يفعل التنزيل المتدفق) لتجنب فكها مرة ثانية.
+    """
+    if blobs is None:
+        blobs = extract_initial_json(html_content)
+    player_response = blobs.get("ytInitialPlayerResponse")
+    if not player_response or "videoDetails" not in player_response:
+        return _parse_video_page_regex(html_content, video_id)
+
+    details = player_response.get("videoDetails", {})
+    microformat = player_response.get("microformat", {}).get("playerMicroformatRenderer", {})
+    channel_id = details.get("channelId") or microformat.get("externalChannelId")
+    length = details.get("lengthSeconds") or microformat.get("lengthSeconds")
+    thumbnails = details.get("thumbnail", {}).get("thumbnails") or microformat.get("thumbnail", {}).get("thumbnails") or []
+    family_safe = microformat.get("isFamilySafe", True)
+
+    title = details.get("title") or _json_text(microformat.get("title"))
+    if not title:
+        title_match = _TITLE_RE.search(html_content)
+        title = title_match.group(1) if title_match else None
+
+    metadata = VideoRecord(
+        title=title,
+        description=_truncate(details.get("shortDescription") or _json_text(microformat.get("description"))) or None,
+        video_id=video_id or details.get("videoId"),
+        author=details.get("author") or microformat.get("ownerChannelName"),
+        channel_url=f"https://www.youtube.com/channel/{channel_id}" if channel_id else None,
+        channel_id=channel_id,
+        publish_date=_parse_datetime(microformat.get("publishDate") or microformat.get("uploadDate")),
+        length=_parse_int(length),
+        views=_parse_int(details.get("viewCount")),
+        keywords=details.get("keywords", []),
+        family_safe=bool(family_safe),
+        age_restricted=not family_safe,
+        thumbnail_url=thumbnails[-1]["url"] if thumbnails else None,
+        note=FALLBACK_NOTE
+    )
+
+    return metadata
+
+
+def _parse_video_page_regex(html_content, video_id):
+    """استخراج بيانات الفيديو بالأنماط النصية للصفحات التي لا تحتوي على ytInitialPlayerResponse"""
+    def first(pattern):
+        match = pattern.search(html_content)
+        return match.group(1) if match else None
+
+    channel_id = first(_CHANNEL_ID_RE)
+    metadata = VideoRecord(
+        title=first(_TITLE_RE),
+        video_id=video_id,
+        author=first(_OWNER_NAME_RE),
+        channel_id=channel_id,
+        channel_url=f"https://www.youtube.com/channel/{channel_id}" if channel_id else None,
+        views=_parse_int(first(_VIEW_COUNT_RE)),
+        publish_date=_parse_datetime(first(_PUBLISH_DATE_RE)),
+        thumbnail_url=first(_THUMBNAIL_RE),
+        note=FALLBACK_NOTE
+    )
+
+    return metadata
+
+
+def _channel_video_info(renderer, now=None):
+    """تحويل كائن videoRenderer من صفحة القناة إلى قاموس معلومات الفيديو
+
+    يُقدَّر تاريخ النشر النسبي بالنسبة إلى now (وقت تنزيل الصفحة)، والافتراضي الآن.
+    """
+    video_id = renderer.get("videoId")
+    return ChannelVideoRecord(
+        title=_json_text(renderer.get("title")) or None,
+        video_id=video_id,
+        url=f"https://www.youtube.com/watch?v={video_id}",
+        # تعرض قوائم القناة تاريخ النشر بصيغة نسبية ("3 days ago")، فيُقدَّر منها التاريخ
+        publish_date=_parse_relative_time(_json_text(renderer.get("publishedTimeText")), now),
+        views=_parse_int(_json_text(renderer.get("viewCountText")) or None),
+        length=_parse_clock(_json_text(renderer.get("lengthText")))
+    )
+
+
+def _continuation_token(renderer):
+    """استخراج رمز المتابعة من كائن continuationItemRenderer أو None"""
+    endpoint = renderer.get("continuationEndpoint") or {}
+    return endpoint.get("continuationCommand", {}).get("token")
+
+
+def _iter_page_videos(data, browse=None, until=None, now=None):
+    """إنتاج معلومات فيديوهات القناة من ytInitialData ثم من صفحات المتابعة التالية
+
+    تُجلب كل صفحة تالية عبر browse(token) عند الحاجة إليها فقط، فلا يبقى في الذاكرة
+    إلا صفحة واحدة مهما بلغ عدد الفيديوهات. بدون browse تُقرأ الصفحة الأولى فقط.
+    يتوقف الإنتاج عند الوصول إلى حد المزامنة السابقة until (SyncMark).
+    """
+    if until is not None:
+        until.reached = False
+    while data:
+        token = None
+        for renderer in _iter_json_renderers(data, _CHANNEL_PAGE_RENDERERS):
+            if renderer.get("videoId"):
+                info = _channel_video_info(renderer, now)
+                if until is not None and until(info.video_id, info.publish_date):
+                    return
+                yield info
+            else:
+                token = _continuation_token(renderer) or token
+        if not token or browse is None:
+            return
+        data = browse(token)
+
+
+def parse_channel_page(html_content, channel_id, url, blobs=None, limit=CHANNEL_VIDEOS_LIMIT, browse=None, until=None,
+                       now=None):
+    """استخراج البيانات الوصفية للقناة من محتوى صفحة القناة
+
+    تُستخرج البيانات من كائن ytInitialData بعد فك ترميزه مرة واحدة، مع الرجوع
+    إلى الأنماط النصية إذا لم يكن الكائن موجوداً في الصفحة. يحدد limit عدد
+    الفيديوهات (None لجميعها)، وتُتابع الصفحات التالية عبر browse إذا مُررت
+    حتى الوصول إلى حد المزامنة until (SyncMark) إن وُجد. تُقدَّر التواريخ النسبية بالنسبة إلى now
+    (مفيد للصفحات المحفوظة سابقاً)، والافتراضي الآن.
+    """
+    if blobs is None:
+        blobs = extract_initial_json(html_content)
+    initial_data = blobs.get("ytInitialData")
+    channel_renderer = (initial_data or {}).get("metadata", {}).get("channelMetadataRenderer")
+    if not channel_renderer:
+        return _parse_channel_page_regex(html_content, channel_id, url, limit)
+
+    videos_info = list(itertools.islice(_iter_page_videos(initial_data, browse, until, now), limit))
+
+    metadata = ChannelRecord(
+        name=channel_renderer.get("title"),
+        channel_id=channel_id or channel_renderer.get("externalId"),
+        description=_truncate(channel_renderer.get("description")) or None,
+        url=url,
+        subscribers=None,  # يوتيوب لم يعد يوفر هذه المعلومة بسهولة
+        videos=videos_info,
+        note=FALLBACK_NOTE
+    )
+
+    return metadata
+
+
+def _parse_channel_page_regex(html_content, channel_id, url, limit=CHANNEL_VIDEOS_LIMIT):
+    """استخراج بيانات القناة بالأنماط النصية للصفحات التي لا تحتوي على ytInitialData"""
+    # استخراج معرف القناة من الصفحة إذا لم يكن معروفاً (للروابط المخصصة)
+    if not channel_id:
+        external_id_match = _EXTERNAL_ID_RE.search(html_content)
+        channel_id = external_id_match.group(1) if external_id_match else None
+    
+    channel_name_match = _META_TITLE_RE.search(html_content)
+    channel_name = channel_name_match.group(1) if channel_name_match else None
+    
+    description_match = _META_DESCRIPTION_RE.search(html_content)
+    description = description_match.group(1) if description_match else None
+    
+    # محاولة استخراج بعض الفيديوهات
+    videos_info = []
+    video_titles = _GRID_TITLE_RE.findall(html_content)
+    video_ids = _VIDEO_ID_RE.findall(html_content)
+    
+    # جمع معلومات الفيديوهات المتاحة (حتى limit فيديو)
+    count = min(len(video_ids), len(video_titles))
+    for i in range(count if limit is None else min(limit, count)):
+        videos_info.append(ChannelVideoRecord(
+            title=video_titles[i],
+            video_id=video_ids[i],
+            url=f"https://www.youtube.com/watch?v={video_ids[i]}",
+            publish_date=None,  # صعب استخراجه بهذه الطريقة
+            views=None,  # صعب استخراجه بهذه الطريقة
+            length=None  # صعب استخراجه بهذه الطريقة
+        ))
+    
+    metadata = ChannelRecord(
+        name=channel_name,
+        channel_id=channel_id,
+        description=_truncate(description) or None,
+        url=url,
+        subscribers=None,
+        videos=videos_info,
+        note=FALLBACK_NOTE
+    )
+    
+    return metadata
+
+
+class IncrementalPageScanner:
+    """تجميع أجزاء الصفحة أثناء تنزيلها وفك كائنات JSON المطلوبة فور اكتمالها
+
+    يُعتبر الكائن مكتملاً عند وصول وسم </script> الذي يليه، إذ يهرّب يوتيوب
+    الرمز < داخل نصوص JSON فلا يظهر هذا الوسم داخل الكائن نفسه.
+    """
+
+    def __init__(self, required):
+        self.required = set(required)
+        self.blobs = {}
+        self.text = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._position = 0
+
+    @property
+    def complete(self):
+        return self.required.issubset(self.blobs)
+
+    def feed(self, chunk):
+        """إضافة جزء من الصفحة، وإرجاع True عند اكتمال جميع الكائنات المطلوبة"""
+        self.text += self._decoder.decode(chunk)
+        while not self.complete:
+            match = _INITIAL_JSON_RE.search(self.text, self._position)
+            if not match:
+                # إبقاء هامش صغير حتى لا يضيع اسم كائن مقسوم بين جزأين
+                self._position = max(self._position, len(self.text) - 64)
+                break
+            end = self.text.find("</script>", match.end())
+            if end == -1:
+                self._position = match.start()
+                break
+            self._position = end
+            if match.group(1) in self.blobs or match.group(1) not in self.required:
+                continue
+            try:
+                self.blobs[match.group(1)], _ = _JSON_DECODER.raw_decode(self.text, match.end())
+            except ValueError:
+                continue
+        return self.complete
+
+    def finish(self):
+        """إنهاء فك الترميز بعد آخر جزء"""
+        self.text += self._decoder.decode(b"", final=True)
+
+
+def extract_video_id(url):
+    """استخراج معرف الفيديو من الرابط
+
+    يدعم الصيغ المختلفة لنفس الفيديو (watch?v=، youtu.be/، m.youtube.com، shorts/، embed/، live/)
+    بحيث تؤول جميعها إلى المعرف نفسه.
+    """
+    parsed = urllib.parse.urlsplit(url if "://" in url else "https://" + url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        video_id = parsed.path.lstrip("/").split("/")[0]
+        return video_id or None
+    if "youtube.com" in host:
+        if parsed.path.rstrip("/") == "/watch":
+            values = urllib.parse.parse_qs(parsed.query).get("v")
+            return values[0] if values else None
+        parts = parsed.path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+            return parts[1]
+    return None
+
+
+def _channel_videos_url(url):
+    """رابط تبويب الفيديوهات في صفحة القناة"""
+    url = url.split("?")[0].rstrip("/")
+    return url if url.endswith("/videos") else f"{url}/videos"
+
+
+def extract_channel_id(url):
+    """استخراج معرف القناة من الرابط إذا كان بصيغة /channel/"""
+    if '/channel/' in url:
+        return url.split('/channel/')[1].split('/')[0]
+    return None
+
+
+def _cache_json_default(obj):
+    """ترميز التواريخ في الذاكرة المؤقتة بعلامة تسمح باستعادة نوعها عند القراءة
+
+    تُخزَّن السجلات قواميس بالمفاتيح العربية، وتُعاد إلى نوعها في YtubeClient._cache_lookup.
+    """
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    if isinstance(obj, datetime.datetime):
+        return {"__datetime__": obj.isoformat()}
+    raise TypeError(f"نوع غير مدعوم في الذاكرة المؤقتة: {type(obj).__name__}")
+
+
+def _cache_object_hook(obj):
+    """استعادة التواريخ المرمزة بواسطة _cache_json_default"""
+    if len(obj) == 1 and "__datetime__" in obj:
+        return _parse_datetime(obj["__datetime__"])
+    return obj
+
+
+class MetadataCache:
+    """ذاكرة تخزين مؤقت دائمة للبيانات الوصفية على القرص مبنية على SQLite
+
+    تُخزَّن البيانات مفهرسة بنوعها (video أو channel) ومعرفها، ولكل نوع مدة
+    صلاحية خاصة به، بينما تنتهي صلاحية النتائج الناقصة من الطريقة الاحتياطية بعد
+    degraded_ttl. عند تجاوز الحد الأقصى لعدد المدخلات تُحذف الأقدم استخداماً (LRU).
+
+    لا تكتب القراءة في قاعدة البيانات: تُجمع أوقات الاستخدام في الذاكرة وتُكتب دفعة
+    واحدة قبل الحذف أو عند الإغلاق. ويُتتبع عدد المدخلات داخل الكائن فلا يُعد الجدول
+    إلا عند تجاوز الحد الأقصى، ثم يُحذف ما يزيد عليه مع هامش CACHE_EVICT_FRACTION.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=None, max_entries=CACHE_MAX_ENTRIES,
+                 degraded_ttl=CACHE_DEGRADED_TTL):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "metadata.sqlite3")
+        self.ttl = dict(CACHE_TTL, **(ttl or {}))
+        self.degraded_ttl = degraded_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL, degraded INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (kind, key))"
+        )
+        # ذاكرة مؤقتة أنشأتها نسخة سابقة دون عمود degraded
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(metadata)")]
+        if "degraded" not in columns:
+            self._conn.execute("ALTER TABLE metadata ADD COLUMN degraded INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+    def get(self, kind, key):
+        """إرجاع البيانات المخزنة إذا كانت موجودة وصالحة، وإلا None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created, degraded FROM metadata WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                return None
+            ttl = min(self.degraded_ttl, self.ttl.get(kind, 0)) if row[2] else self.ttl.get(kind, 0)
+            if now - row[1] > ttl:
+                self._delete(kind, key)
+                return None
+            self._touched[(kind, key)] = now
+            if len(self._touched) >= CACHE_TOUCH_BATCH:
+                self._flush_touched()
+        return json.loads(row[0], object_hook=_cache_object_hook)
+
+    def set(self, kind, key, metadata):
+        """تخزين البيانات ثم حذف الأقدم استخداماً إذا تجاوز العدد الحد الأقصى"""
+        now = time.time()
+        data = json.dumps(metadata, ensure_ascii=False, default=_cache_json_default)
+        degraded = metadata.get("ملاحظة") == FALLBACK_NOTE
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM metadata WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata (kind, key, data, created, accessed, degraded) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, data, now, now, int(degraded))
+            )
+            self._touched.pop((kind, key), None)
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """حذف الأقدم استخداماً حتى يقل العدد عن الحد الأقصى بهامش CACHE_EVICT_FRACTION"""
+        self._flush_touched()
+        # قد تشارك عمليات أخرى الملف نفسه، فيُعاد العد قبل الحذف
+        self._count = self._conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        excess += int(self.max_entries * CACHE_EVICT_FRACTION)
+        deleted = self._conn.execute(
+            "DELETE FROM metadata WHERE rowid IN (SELECT rowid FROM metadata ORDER BY accessed LIMIT ?)", (excess,)
+        ).rowcount
+        self._count -= deleted
+
+    def _flush_touched(self):
+        """كتابة أوقات الاستخدام المجمعة في قاعدة البيانات دفعة واحدة"""
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "UPDATE metadata SET accessed = ? WHERE kind = ? AND key = ?",
+                [(accessed, kind, key) for (kind, key), accessed in touched.items()]
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _delete(self, kind, key):
+        self._touched.pop((kind, key), None)
+        self._count -= self._conn.execute(
+            "DELETE FROM metadata WHERE kind = ? AND key = ?", (kind, key)
+        ).rowcount
+
+    def delete(self, kind, key):
+        """حذف مدخل واحد من الذاكرة المؤقتة"""
+        with self._lock:
+            self._delete(kind, key)
+
+    def clear(self):
+        """حذف جميع المدخلات"""
+        with self._lock:
+            self._conn.execute("DELETE FROM metadata")
+            self._touched.clear()
+            self._count = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+    def close(self):
+        """كتابة أوقات الاستخدام المعلقة ثم إغلاق الاتصال بقاعدة البيانات"""
+        with self._lock:
+            try:
+                self._flush_touched()
+            finally:
+                self._conn.close()
+
+
+class SyncMark:
+    """حد المزامنة السابقة لقناة: أحدث فيديو مسجل وتاريخ نشره
+
+    يُستدعى مع فيديوهات القائمة بالترتيب (الأحدث أولاً) ويُرجع True عند الوصول إلى الحد:
+    الفيديو المسجل نفسه، أو فيديو أقدم منه بأكثر من SYNC_PUBLISHED_SLACK إذا حُذف الفيديو
+    المسجل أو أصبح خاصاً. يبقى reached صحيحاً بعد الوصول إلى الحد.
+    """
+
+    __slots__ = ("video_id", "published", "reached")
+
+    def __init__(self, video_id, published=None):
+        self.video_id = video_id
+        self.published = _parse_datetime(published)
+        self.reached = False
+
+    def __call__(self, video_id, publish_date=None):
+        if video_id == self.video_id:
+            self.reached = True
+        elif self.published is not None and publish_date is not None:
+            self.reached = _parse_datetime(publish_date) < self.published - SYNC_PUBLISHED_SLACK
+        return self.reached
+
+
+class SyncStateStore:
+    """مخزن حالة المزامنة التزايدية للقنوات مبني على SQLite
+
+    يحفظ لكل قناة أحدث فيديو تمت رؤيته (المعرف وتاريخ النشر)، ليتوقف التشغيل
+    التالي عن متابعة صفحات القائمة فور الوصول إليه.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "sync.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            "channel TEXT PRIMARY KEY, video_id TEXT NOT NULL, published TEXT, updated REAL NOT NULL)"
+        )
+
+    def get(self, channel):
+        """إرجاع (معرف أحدث فيديو، تاريخ نشره) للقناة، أو None إذا لم تُزامن من قبل"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, published FROM sync_state WHERE channel = ?", (channel,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def set(self, channel, video_id, published=None):
+        """تسجيل أحدث فيديو تمت رؤيته للقناة"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (channel, video_id, published, updated) VALUES (?, ?, ?, ?)",
+                (channel, video_id, published, time.time())
+            )
+
+    def delete(self, channel):
+        """حذف حالة المزامنة للقناة لتُستخرج فيديوهاتها كاملة في التشغيل التالي"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sync_state WHERE channel = ?", (channel,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0]
+
+    def close(self):
+        """إغلاق الاتصال بقاعدة البيانات"""
+        with self._lock:
+            self._conn.close()
+
+
+def _archive_codecs():
+    """خوارزميات ضغط الأرشيف المتاحة: {الامتداد: (ضغط، فك)} مع zstd أولاً إذا كانت zstandard مثبتة"""
+    codecs_available = {}
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        codecs_available["zst"] = (
+            lambda data: zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(data),
+            lambda data: zstandard.ZstdDecompressor().decompress(data)
+        )
+    codecs_available["gz"] = (
+        lambda data: gzip.compress(data, ARCHIVE_GZIP_LEVEL),
+        gzip.decompress
+    )
+    return codecs_available
+
+
+class PageArchive:
+    """أرشيف للصفحات المنزَّلة مضغوطة ومعنونة بمحتواها، مع فهرس SQLite من المعرف إلى الصفحة
+
+    يُحفظ كل محتوى مرة واحدة في objects/<أول حرفين>/<sha256>.<zst|gz> مهما تكرر، ويشير
+    الفهرس إلى أحدث صفحة لكل (نوع، معرف) مع رابطها ووقت تنزيلها. تبقى الصفحات الأقدم
+    في objects، فلا يُحذف شيء من الأرشيف تلقائياً.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._codecs = _archive_codecs()
+        self.codec = next(iter(self._codecs))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, ARCHIVE_INDEX_FILE),
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, url TEXT, digest TEXT NOT NULL, codec TEXT NOT NULL, "
+            "fetched REAL NOT NULL, PRIMARY KEY (kind, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_url ON pages (kind, url)")
+
+    def _object_path(self, digest, codec):
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.{codec}")
+
+    def _find_object(self, digest):
+        """الامتداد الذي حُفظ به المحتوى من قبل، أو None إذا لم يُحفظ"""
+        for codec in self._codecs:
+            if os.path.exists(self._object_path(digest, codec)):
+                return codec
+        return None
+
+    def store(self, kind, key, url, body, fetched=None):
+        """حفظ محتوى الصفحة (إن لم يكن محفوظاً) وتحديث الفهرس، وإرجاع بصمته"""
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        digest = hashlib.sha256(data).hexdigest()
+        codec = self._find_object(digest)
+        if codec is None:
+            codec = self.codec
+            path = self._object_path(digest, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(self._codecs[codec][0](data))
+            os.replace(temp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (kind, key, url, digest, codec, fetched) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, url, digest, codec, time.time() if fetched is None else fetched)
+            )
+        return digest
+
+    def load(self, kind, key=None, url=None):
+        """إرجاع (محتوى الصفحة، وقت تنزيلها) بالمعرف أو بالرابط، أو None إذا لم تكن مؤرشفة"""
+        with self._lock:
+            row = None
+            if key:
+                row = self._conn.execute(
+                    "SELECT digest, codec, fetched FROM pages WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+            if row is None and url:
+                row = self._conn.execute(
+                    "SELECT digest, codec, fetched FROM pages WHERE kind = ? AND url = ? ORDER BY fetched DESC",
+                    (kind, url)
+                ).fetchone()
+        if row is None:
+            return None
+        digest, codec, fetched = row
+        if codec not in self._codecs:
+            raise ValueError(f"الصفحة مضغوطة بـ {codec} وتتطلب مكتبة zstandard: pip install zstandard")
+        with open(self._object_path(digest, codec), "rb") as f:
+            return self._codecs[codec][1](f.read()).decode("utf-8"), fetched
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        """إغلاق الاتصال بالفهرس"""
+        with self._lock:
+            self._conn.close()
+
+
+class ViewSeriesStore:
+    """مخزن ثنائي مضغوط لعينات عدد المشاهدات يُلحق به فقط
+
+    كل عينة (الطابع الزمني، معرف الفيديو، عدد المشاهدات) سجل ثابت الحجم (27 بايت)
+    بعد ترويسة قصيرة، فتُضاف العينات إلى نهاية الملف دون إعادة كتابة ما قبلها.
+    السجل الأخير غير المكتمل (عند انقطاع الكتابة) يُقتطع عند فتح الملف.
+    """
+
+    MAGIC = b"YTVS\x01\x00\x00\x00"
+    RECORD = struct.Struct("<d11sq")
+
+    def __init__(self, path=WATCH_STORE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        self._file.seek(0)
+        header = self._file.read(len(self.MAGIC))
+        if not header:
+            self._file.write(self.MAGIC)
+            self._file.flush()
+        elif header != self.MAGIC:
+            self._file.close()
+            raise ValueError(f"الملف ليس مخزن عينات مشاهدات: {path}")
+        else:
+            size = self._file.seek(0, os.SEEK_END)
+            partial = (size - len(self.MAGIC)) % self.RECORD.size
+            if partial:
+                self._file.truncate(size - partial)
+
+    def append(self, timestamp, video_id, views):
+        """إلحاق عينة واحدة بنهاية الملف"""
+        key = video_id.encode("ascii")
+        if len(key) != 11:
+            raise ValueError(f"معرف فيديو غير صالح: {video_id}")
+        with self._lock:
+            self._file.write(self.RECORD.pack(timestamp, key, views))
+            self._file.flush()
+
+    def __iter__(self):
+        """قراءة العينات بالترتيب على شكل (الطابع الزمني، معرف الفيديو، عدد المشاهدات)"""
+        size = self.RECORD.size
+        with open(self.path, "rb") as stream:
+            stream.seek(len(self.MAGIC))
+            while True:
+                data = stream.read(size * 4096)
+                data = data[:len(data) - len(data) % size]
+                if not data:
+                    break
+                for timestamp, key, views in self.RECORD.iter_unpack(data):
+                    yield timestamp, key.decode("ascii"), views
+
+    def __len__(self):
+        with self._lock:
+            return (os.path.getsize(self.path) - len(self.MAGIC)) // self.RECORD.size
+
+    def close(self):
+        """إغلاق الملف"""
+        with self._lock:
+            self._file.close()
+
+
+class SingleFlight:
+    """دمج الطلبات المتزامنة لنفس المفتاح بحيث يُنفَّذ جلب واحد فقط
+
+    أول من يطلب المفتاح ينفذ الدالة، وينتظر بقية الطالبين المتزامنين نتيجته
+    بدلاً من تنفيذ جلب مكرر.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args):
+        """تنفيذ fn(*args) مرة واحدة لكل مجموعة طلبات متزامنة لنفس المفتاح"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class MemoStore:
+    """ذاكرة داخل العملية محدودة الحجم للنتائج المستخرجة، مفهرسة بالمعرف الموحد
+
+    مع ttl (بالثواني) تنتهي صلاحية كل نتيجة بعد هذه المدة، وهو ما تحتاجه العمليات
+    الدائمة (مثل serve) حتى لا تُرجع بيانات قديمة إلى ما لا نهاية.
+    """
+
+    def __init__(self, max_entries=MEMO_MAX_ENTRIES, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and self.clock() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            expires = self.clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RetryPolicy:
+    """سياسة إعادة المحاولة بتأخير أسي مع عشوائية كاملة (full jitter)
+
+    يتضاعف الحد الأعلى للتأخير بعد كل محاولة فاشلة حتى max_delay، ويُختار التأخير
+    الفعلي عشوائياً بين الصفر وهذا الحد حتى لا تعيد العمال المتوازية المحاولة معاً.
+    """
+
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY,
+                 multiplier=2.0, jitter=True, sleep=time.sleep):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.sleep = sleep
+
+    def delay(self, attempt):
+        """حساب التأخير قبل المحاولة التالية للمحاولة الفاشلة رقم attempt (تبدأ من 1)"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def call(self, fn, *args, non_retryable=(), metrics=None):
+        """تنفيذ fn(*args) مع إعادة المحاولة عند الفشل، دون إعادة للاستثناءات في non_retryable
+
+        تُسجَّل كل إعادة وزمن انتظارها في metrics (أو سجل المقاييس المشترك).
+        """
+        attempt = 1
+        while True:
+            try:
+                return fn(*args)
+            except non_retryable:
+                raise
+            except Exception:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.delay(attempt)
+                console.print(f"[{COLORS['warning']}]محاولة إعادة الاتصال ({attempt}/{self.max_attempts - 1}) بعد {delay:.1f} ثانية...[/{COLORS['warning']}]")
+                _count("retries", metrics)
+                with _stage("retry_sleep", metrics):
+                    self.sleep(delay)
+                attempt += 1
+
+
+class CircuitBreaker:
+    """قاطع دائرة يوقف استخدام مصدر بيانات مؤقتاً بعد عدد من الإخفاقات المتتالية
+
+    عند فتح القاطع تُرسل الطلبات مباشرة إلى الطريقة الاحتياطية طوال مدة التهدئة،
+    ثم يُسمح بطلب تجريبي واحد: إذا نجح يُغلق القاطع، وإذا فشل يُفتح من جديد.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """هل يُسمح باستخدام المصدر الآن؟"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.cooldown:
+                # السماح بطلب تجريبي واحد فقط
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """تسجيل نجاح المصدر وإغلاق القاطع"""
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        """تسجيل فشل المصدر وفتح القاطع عند بلوغ الحد أو فشل الطلب التجريبي"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    console.print(f"[{COLORS['warning']}]تم فتح قاطع الدائرة بعد {self.failures} إخفاقات متتالية، سيتم استخدام الطريقة الاحتياطية مباشرة لمدة {self.cooldown:g} ثانية[/{COLORS['warning']}]")
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+
+@contextlib.contextmanager
+def _locked_file(path):
+    """فتح ملف مع قفل حصري عليه بين العمليات (fcntl على يونكس و msvcrt على ويندوز)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            f.flush()
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _parse_retry_after(value):
+    """تحويل قيمة ترويسة Retry-After (ثوانٍ أو تاريخ HTTP) إلى عدد ثوانٍ، أو None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateLimiter:
+    """محدد معدل الطلبات بخوارزمية دلو الرموز (token bucket) مشترك بين الخيوط والعمليات
+
+    يسمح بمعدل rate طلب في الثانية مع دفعات حتى burst طلب. عند تمرير state_file
+    تُحفظ حالة الدلو في ملف محلي مقفل فتتقاسمه جميع العمليات التي تستخدم الملف نفسه.
+    عند استلام 429 أو Retry-After ينخفض المعدل إلى النصف ويتوقف الإرسال طوال المدة
+    المطلوبة، ثم يعود المعدل تدريجياً إلى قيمته الأصلية خلال recovery ثانية.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_DEFAULT, burst=None, state_file=None, min_rate=None, recovery=RATE_LIMIT_RECOVERY):
+        if rate <= 0:
+            raise ValueError("يجب أن يكون معدل الطلبات أكبر من صفر")
+        self.max_rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.max_rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 16
+        self.recovery = recovery
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state = {"tokens": self.burst, "updated": time.time(), "rate": self.max_rate, "blocked_until": 0.0}
+
+    @contextlib.contextmanager
+    def _state_scope(self):
+        """الوصول الحصري إلى حالة الدلو (في الذاكرة أو في الملف المشترك)"""
+        with self._lock:
+            if not self.state_file:
+                yield self._state
+                return
+            with _locked_file(self.state_file) as f:
+                f.seek(0)
+                state = dict(self._state)
+                try:
+                    state.update(json.loads(f.read() or b"{}"))
+                except ValueError:
+                    pass
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state).encode("utf-8"))
+
+    def _refill(self, state, now):
+        """إضافة الرموز المستحقة منذ آخر تحديث واستعادة المعدل تدريجياً بعد التخفيض"""
+        elapsed = max(0.0, now - state["updated"])
+        if state["rate"] < self.max_rate:
+            state["rate"] = min(self.max_rate, state["rate"] + elapsed * self.max_rate / self.recovery)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+        state["updated"] = now
+
+    def try_acquire(self):
+        """محاولة أخذ رمز: تُرجع 0 عند النجاح، وإلا عدد الثواني الواجب انتظارها قبل المحاولة مجدداً"""
+        now = time.time()
+        with self._state_scope() as state:
+            self._refill(state, now)
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+    def acquire(self):
+        """الانتظار حتى يتوفر رمز ثم أخذه"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """النسخة غير المتزامنة من acquire، لا توقف حلقة الأحداث أثناء الانتظار"""
+        import asyncio
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        """تخفيض المعدل بعد استجابة 429 وإيقاف الإرسال طوال مدة Retry-After إن وُجدت"""
+        now = time.time()
+        with self._state_scope() as state:
+            self._refill(state, now)
+            state["rate"] = max(self.min_rate, state["rate"] / 2)
+            state["tokens"] = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / state["rate"]
+            state["blocked_until"] = max(state["blocked_until"], now + pause)
+            rate = state["rate"]
+        console.print(f"[{COLORS['warning']}]تم تقييد الطلبات من الخادم (429)، خفض المعدل إلى {rate:.2f} طلب/ثانية[/{COLORS['warning']}]")
+
+    @property
+    def rate(self):
+        """المعدل الحالي بعد أي تخفيض"""
+        with self._state_scope() as state:
+            self._refill(state, time.time())
+            return state["rate"]
+
+
+# محدد المعدل المشترك في العملية (معطل افتراضياً)
+_rate_limiter = None
+
+
+def configure_rate_limiter(rate=RATE_LIMIT_DEFAULT, burst=None, state_file=None, enabled=True):
+    """تفعيل محدد المعدل المشترك لجميع الطلبات الصادرة من الوحدة (بما فيها طلبات pytube)"""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate, burst, state_file) if enabled else None
+    if _rate_limiter is not None:
+        _install_pytube_rate_limit()
+    return _rate_limiter
+
+
+def get_rate_limiter():
+    """إرجاع محدد المعدل المشترك أو None إذا كان معطلاً"""
+    return _rate_limiter
+
+
+def _install_pytube_rate_limit():
+    """تمرير جميع طلبات pytube عبر محدد المعدل المشترك
+
+    تمر طلبات pytube كلها عبر الدالة pytube.request._execute_request، فتُغلَّف مرة
+    واحدة بدالة تأخذ رمزاً قبل كل طلب وتخفّض المعدل عند استلام 429.
+    """
+    import urllib.error
+    from pytube import request as pytube_request
+
+    original = pytube_request._execute_request
+    if getattr(original, "_ytubedata_rate_limited", False):
+        return
+
+    def rate_limited_execute_request(*args, **kwargs):
+        limiter = _rate_limiter
+        if limiter is None:
+            return original(*args, **kwargs)
+        limiter.acquire()
+        try:
+            return original(*args, **kwargs)
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                limiter.penalize(_parse_retry_after(e.headers.get("Retry-After") if e.headers else None))
+            raise
+
+    rate_limited_execute_request._ytubedata_rate_limited = True
+    pytube_request._execute_request = rate_limited_execute_request
+
+
+class StageMetrics:
+    """أزمنة مراحل الاستخراج والعرض وعدادات الأحداث (إعادة المحاولة، الطريقة الاحتياطية...)
+
+    تُحفظ أزمنة كل مرحلة في مصفوفة أعداد عشرية مدمجة لحساب النسب المئوية في النهاية،
+    ويمكن استخدام الكائن نفسه من عدة خيوط. المراحل متداخلة: زمن pytube_video مثلاً
+    يشمل stream_filesize و retry_sleep لنفس الفيديو.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._timings = {}
+        self._counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """قياس زمن تنفيذ الكتلة وتسجيله للمرحلة name"""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - start)
+
+    def record(self, name, seconds):
+        """تسجيل زمن (بالثواني) للمرحلة name"""
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = array.array("d")
+            samples.append(seconds)
+
+    def increment(self, name, amount=1):
+        """زيادة عداد الحدث name"""
+        with self._lock:
+            self._counters[name] += amount
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+
+    @staticmethod
+    def _quantile(ordered, q):
+        """النسبة المئوية بطريقة أقرب رتبة من قائمة مرتبة"""
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    def snapshot(self):
+        """ملخص المقاييس: لكل مرحلة العدد والمجموع والنسب المئوية والأقصى، ثم العدادات"""
+        with self._lock:
+            timings = {name: sorted(samples) for name, samples in self._timings.items()}
+            counters = dict(self._counters)
+        stages = {}
+        for name, ordered in sorted(timings.items()):
+            summary = {"count": len(ordered), "total": math.fsum(ordered)}
+            for q in METRICS_QUANTILES:
+                summary[f"p{q * 100:g}"] = self._quantile(ordered, q)
+            summary["max"] = ordered[-1]
+            stages[name] = summary
+        return {"stages": stages, "counters": dict(sorted(counters.items()))}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=4)
+
+    def to_prometheus(self, prefix="ytubedata"):
+        """المقاييس بتنسيق Prometheus النصي: ملخص لأزمنة المراحل وعداد لكل حدث"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds زمن كل مرحلة بالثواني",
+            f"# TYPE {prefix}_stage_seconds summary"
+        ]
+        for name, summary in snapshot["stages"].items():
+            for q in METRICS_QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q:g}"}} {summary[f"p{q * 100:g}"]!r}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {summary["total"]!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {summary["count"]}')
+        lines.append(f"# HELP {prefix}_events_total عدد مرات وقوع كل حدث")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in snapshot["counters"].items():
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, output_format="json"):
+        """حفظ المقاييس في ملف بتنسيق json أو prometheus"""
+        if output_format not in METRICS_FORMATS:
+            raise ValueError(f"تنسيق المقاييس غير معروف: {output_format}")
+        data = self.to_prometheus() if output_format == "prometheus" else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+
+class _NullStage:
+    """بديل لا يفعل شيئاً عن stage عند تعطيل المقاييس"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# سجل المقاييس المشترك في العملية (معطل افتراضياً)
+_metrics = None
+
+
+def configure_metrics(enabled=True):
+    """تفعيل سجل المقاييس المشترك لأزمنة المراحل والعدادات أو تعطيله"""
+    global _metrics
+    _metrics = StageMetrics() if enabled else None
+    return _metrics
+
+
+def get_metrics():
+    """إرجاع سجل المقاييس المشترك أو None إذا لم يكن مفعلاً"""
+    return _metrics
+
+
+def _stage(name, metrics=None):
+    """قياس زمن مرحلة في سجل المقاييس المحدد أو المشترك، ولا شيء إذا كانت المقاييس معطلة"""
+    metrics = metrics or _metrics
+    return metrics.stage(name) if metrics is not None else _NULL_STAGE
+
+
+def _count(name, metrics=None):
+    """زيادة عداد حدث في سجل المقاييس المحدد أو المشترك إن كان مفعلاً"""
+    metrics = metrics or _metrics
+    if metrics is not None:
+        metrics.increment(name)
+
+
+class YtubeClient:
+    """عميل قابل لإعادة الاستخدام لاستخراج البيانات الوصفية من يوتيوب
+
+    يملك العميل طوال عمره جلسة HTTP واحدة بمجمع اتصالات، وعميل InnerTube واحداً،
+    وذاكرة التخزين المؤقت وذاكرة العملية وإعدادات إعادة المحاولة، فتُستهلك تكلفة
+    إعدادها مرة واحدة مهما كان عدد الطلبات. الدوال العامة في الوحدة (مثل
+    get_video_metadata) تستخدم عميلاً افتراضياً مشتركاً.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, cache=None, refresh=False,
+                 memo=True, memo_max_entries=MEMO_MAX_ENTRIES, memo_ttl=None, stream_pages=False,
+                 retry_policy=None, breaker_threshold=BREAKER_FAILURE_THRESHOLD,
+                 breaker_cooldown=BREAKER_COOLDOWN, rate_limiter=None, streams=DEFAULT_STREAM_MODE,
+                 channel_limit=CHANNEL_VIDEOS_LIMIT, sync_state=None, workers=DEFAULT_WORKERS,
+                 base_url=YOUTUBE_BASE_URL, metrics=None, archive=None, reparse=False):
+        if streams not in STREAM_MODES:
+            raise ValueError(f"وضع الدقة غير معروف: {streams}")
+        if reparse and archive is None:
+            raise ValueError("تتطلب إعادة التحليل (reparse) أرشيفاً للصفحات")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache = cache
+        self.refresh = refresh
+        self.memo = MemoStore(memo_max_entries, memo_ttl) if memo else None
+        self.stream_pages = stream_pages
+        self.streams = streams
+        # عدد فيديوهات القناة المستخرجة مع بياناتها (None لجميع الفيديوهات)
+        self.channel_limit = channel_limit
+        # مخزن حالة المزامنة التزايدية (SyncStateStore)، وعند تمريره تُستخرج الفيديوهات الجديدة فقط
+        self.sync_state = sync_state
+        self.retry_policy = retry_policy or RetryPolicy()
+        # قاطع دائرة لكل مصدر بيانات (pytube للفيديوهات وpytube للقنوات)
+        self.breakers = {
+            "video": CircuitBreaker(breaker_threshold, breaker_cooldown),
+            "channel": CircuitBreaker(breaker_threshold, breaker_cooldown)
+        }
+        # محدد معدل خاص بالعميل، وإلا يُستخدم محدد المعدل المشترك في العملية إن كان مفعلاً
+        self.rate_limiter = rate_limiter
+        self.workers = workers
+        # عنوان بديل لتنزيل الصفحات (مثل خادم محلي في قياسات الأداء)، دون تغيير الروابط في البيانات
+        self.base_url = base_url.rstrip("/")
+        # سجل مقاييس خاص بالعميل (StageMetrics)، وإلا يُستخدم سجل المقاييس المشترك إن كان مفعلاً
+        self.metrics = metrics
+        # أرشيف الصفحات المنزَّلة (PageArchive)، ومع reparse تُستخرج البيانات منه بدلاً من الشبكة
+        self.archive = archive
+        self.reparse = reparse
+        self._single_flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._session = None
+        self._innertube = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def session(self):
+        """جلسة HTTP الخاصة بالعميل، تُنشأ عند أول استخدام"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = _build_http_session(self.pool_size)
+        return self._session
+
+    def configure_session(self, pool_size):
+        """استبدال جلسة HTTP بجلسة جديدة بمجمع اتصالات بالحجم المطلوب"""
+        session = _build_http_session(pool_size)
+        with self._lock:
+            old_session, self._session = self._session, session
+            self.pool_size = pool_size
+        if old_session is not None:
+            old_session.close()
+        return session
+
+    @property
+    def innertube(self):
+        """عميل InnerTube الخاص بالعميل، يُنشأ مرة واحدة عند أول استخدام، أو None إذا لم يكن متاحاً"""
+        if self._innertube is None:
+            try:
+                from pytube.innertube import InnerTube
+                self._innertube = InnerTube("WEB", use_oauth=False, allow_cache=True)
+            except ImportError:
+                return None
+        return self._innertube
+
+    def close(self):
+        """إغلاق جلسة HTTP وذاكرة التخزين المؤقت"""
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if self.sync_state is not None:
+            self.sync_state.close()
+            self.sync_state = None
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    # ------------------------------------------------------------------
+    # الطلبات والطرق الاحتياطية
+    # ------------------------------------------------------------------
+
+    def http_get(self, url, **kwargs):
+        """تنفيذ طلب GET عبر جلسة HTTP الخاصة بالعميل مع احترام محدد المعدل
+
+        عند استلام 429 يُخفَّض المعدل ويُعاد الطلب بعد المدة المطلوبة حتى RATE_LIMIT_RETRIES مرات.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        limiter = self.rate_limiter or _rate_limiter
+        if limiter is None:
+            return self.session.get(url, **kwargs)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            with _stage("rate_limit_wait", self.metrics):
+                limiter.acquire()
+            response = self.session.get(url, **kwargs)
+            if response.status_code != 429:
+                break
+            limiter.penalize(_parse_retry_after(response.headers.get("Retry-After")))
+            _count("http_429", self.metrics)
+            if attempt < RATE_LIMIT_RETRIES:
+                response.close()
+        return response
+
+    def fetch_page(self, url, required=(), stream=None):
+        """تنزيل صفحة يوتيوب وإرجاع (المحتوى، كائنات JSON المفكوكة) أو (None, None) عند الفشل
+
+        عند تفعيل التنزيل المتدفق تُقرأ الصفحة على أجزاء ويُغلق الاتصال فور اكتمال
+        الكائنات المطلوبة في required، فلا يُنزَّل باقي الصفحة ولا يُحفظ في الذاكرة.
+        وإلا تُنزَّل الصفحة كاملة وتكون الكائنات None ليتولى المحلل استخراجها.
+        يتجاوز stream (True/False) إعداد stream_pages للعميل في هذا الطلب وحده، ومع الأرشيف
+        تُنزَّل الصفحة كاملة افتراضياً كي لا يُحفظ فيه جزء مقتطع منها.
+        روابط يوتيوب تُنزَّل من base_url إذا كان مختلفاً عن العنوان الافتراضي.
+        """
+        if stream is None:
+            stream = self.stream_pages and self.archive is None
+        with _stage("page_fetch", self.metrics):
+            return self._fetch_page(url, required, stream)
+
+    def page_url(self, url):
+        """إرجاع الرابط الذي تُنزَّل منه الصفحة فعلياً (مع استبدال العنوان بـ base_url إن وُجد)"""
+        if self.base_url != YOUTUBE_BASE_URL and url.startswith(YOUTUBE_BASE_URL):
+            return self.base_url + url[len(YOUTUBE_BASE_URL):]
+        return url
+
+    def _fetch_page(self, url, required, stream):
+        url = self.page_url(url)
+        if not stream or not required:
+            response = self.http_get(url)
+            if response.status_code != 200:
+                return None, None
+            return response.text, None
+
+        response = self.http_get(url, stream=True)
+        try:
+            if response.status_code != 200:
+                return None, None
+            scanner = IncrementalPageScanner(required)
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                if scanner.feed(chunk):
+                    break
+            else:
+                scanner.finish()
+            return scanner.text, scanner.blobs
+        finally:
+            response.close()
+
+    def fallback_video_info(self, video_id):
+        """طريقة احتياطية للحصول على معلومات الفيديو بتحليل صفحة المشاهدة"""
+        try:
+            console.print(f"[{COLORS['info']}]استخدام الطريقة الاحتياطية للحصول على معلومات الفيديو...[/{COLORS['info']}]")
+            url = f"https://www.youtube.com/watch?v={video_id}"
+            html_content, blobs = self.fetch_page(url, ("ytInitialPlayerResponse",))
+            
+            if html_content is None:
+                return None
+            self._archive_page("video", video_id, url, html_content)
+            
+            with _stage("page_parse", self.metrics):
+                return parse_video_page(html_content, video_id, blobs)
+        except Exception as e:
+            console.print(f"[{COLORS['error']}]فشل في الطريقة الاحتياطية: {str(e)}[/{COLORS['error']}]")
+            return None
+
+    def video_views(self, video_id):
+        """جلب عدد مشاهدات الفيديو وحده، أو None عند الفشل
+
+        لا يمر الطلب بـ pytube ولا بالذاكرة المؤقتة ولا يستعلم عن الدقة المتاحة: تُنزَّل
+        صفحة المشاهدة متدفقة دائماً ويُغلق الاتصال فور اكتمال ytInitialPlayerResponse.
+        """
+        html_content, blobs = self.fetch_page(
+            f"{YOUTUBE_BASE_URL}/watch?v={video_id}", ("ytInitialPlayerResponse",), stream=True
+        )
+        if html_content is None:
+            return None
+        with _stage("page_parse", self.metrics):
+            details = (blobs.get("ytInitialPlayerResponse") or {}).get("videoDetails") or {}
+            views = details.get("viewCount")
+            if views is None:
+                match = _VIEW_COUNT_RE.search(html_content)
+                views = match.group(1) if match else None
+            return _parse_int(views)
+
+    def fallback_channel_info(self, channel_id, url=None, until=None):
+        """طريقة احتياطية للحصول على معلومات القناة بتحليل تبويب الفيديوهات في صفحة القناة
+
+        يمكن تمرير رابط القناة الأصلي (مثل /@name) عند عدم معرفة معرف القناة.
+        تُتابع صفحات الفيديوهات التالية حتى بلوغ channel_limit أو حد المزامنة until.
+        """
+        try:
+            console.print(f"[{COLORS['info']}]استخدام الطريقة الاحتياطية للحصول على معلومات القناة...[/{COLORS['info']}]")
+            url = f"https://www.youtube.com/channel/{channel_id}" if channel_id else url
+            html_content, blobs = self.fetch_page(_channel_videos_url(url), ("ytInitialData",))
+            
+            if html_content is None:
+                return None
+            
+            with _stage("page_parse", self.metrics):
+                metadata = parse_channel_page(
+                    html_content, channel_id, url, blobs, self.channel_limit, self.browse_continuation, until
+                )
+            self._archive_page("channel", metadata.channel_id, url, html_content)
+            return metadata
+        except Exception as e:
+            console.print(f"[{COLORS['error']}]فشل في الطريقة الاحتياطية للقناة: {str(e)}[/{COLORS['error']}]")
+            return None
+
+    def _archive_page(self, kind, key, url, body):
+        """حفظ الصفحة المنزَّلة في الأرشيف إذا كان مفعلاً، دون أن يوقف أي خطأ فيه عملية الاستخراج
+
+        يمكن تمرير body دالة تُرجع المحتوى (مثل yt.watch_html) فلا تُستدعى إلا مع الأرشيف.
+        تُفهرس الصفحة بالرابط بدلاً من المعرف إذا لم يكن معروفاً.
+        """
+        if self.archive is None:
+            return
+        try:
+            body = body() if callable(body) else body
+            if body:
+                with _stage("archive_write", self.metrics):
+                    self.archive.store(kind, key or url, url, body)
+        except Exception as e:
+            console.print(f"[{COLORS['warning']}]تعذر حفظ الصفحة في الأرشيف: {str(e)}[/{COLORS['warning']}]")
+
+    def _reparse(self, kind, key, url):
+        """استخراج البيانات من الصفحة المؤرشفة بدلاً من الشبكة (وضع reparse)
+
+        تُحلَّل الصفحة بمحللات الطريقة الاحتياطية، وتُقدَّر التواريخ النسبية بالنسبة إلى
+        وقت تنزيلها. تُقرأ الصفحة الأولى فقط من قائمة فيديوهات القناة.
+        """
+        page = self.archive.load(kind, key, url)
+        if page is None:
+            console.print(f"[{COLORS['error']}]لا توجد صفحة مؤرشفة لـ: {key or url}[/{COLORS['error']}]")
+            return None
+        html_content, fetched = page
+        with _stage("page_parse", self.metrics):
+            if kind == "video":
+                return parse_video_page(html_content, key)
+            now = datetime.datetime.fromtimestamp(fetched, datetime.timezone.utc).replace(microsecond=0)
+            return parse_channel_page(html_content, key, url, limit=self.channel_limit, now=now)
+
+    def browse_continuation(self, token):
+        """جلب الصفحة التالية من قائمة عبر نقطة browse في InnerTube باستخدام رمز المتابعة"""
+        innertube = self.innertube
+        data = dict(innertube.base_data, continuation=token)
+        return innertube._call_api(f"{innertube.base_url}/browse", innertube.base_params, data)
+
+    def iter_channel_videos(self, url, limit=None):
+        """إنتاج معلومات فيديوهات القناة واحداً تلو الآخر مع متابعة الصفحات التالية
+
+        تُجلب كل صفحة عند الحاجة إليها فقط، فيبقى استهلاك الذاكرة ثابتاً حتى مع
+        القنوات التي تضم آلاف الفيديوهات. يحدد limit عدد الفيديوهات (None لجميعها).
+        """
+        html_content, blobs = self.fetch_page(_channel_videos_url(url), ("ytInitialData",))
+        if html_content is None:
+            console.print(f"[{COLORS['error']}]تعذر تحميل صفحة فيديوهات القناة: {url}[/{COLORS['error']}]")
+            return
+        if blobs is None:
+            blobs = extract_initial_json(html_content)
+        # لا حاجة إلى نص الصفحة بعد فك كائناتها، فلا يُبقى في الذاكرة طوال عمر المولِّد
+        del html_content
+        yield from itertools.islice(_iter_page_videos(blobs.get("ytInitialData"), self.browse_continuation), limit)
+
+    # ------------------------------------------------------------------
+    # الذاكرة المؤقتة وذاكرة العملية
+    # ------------------------------------------------------------------
+
+    def _cache_lookup(self, kind, key):
+        """البحث في ذاكرة التخزين المؤقت دون أن يوقف أي خطأ فيها عملية الاستخراج"""
+        if self.cache is None or self.refresh or not key:
+            return None
+        try:
+            metadata = self.cache.get(kind, key)
+        except sqlite3.Error as e:
+            console.print(f"[{COLORS['warning']}]تعذر القراءة من ذاكرة التخزين المؤقت: {str(e)}[/{COLORS['warning']}]")
+            return None
+        if metadata is None:
+            return None
+        _count("cache_hits", self.metrics)
+        console.print(f"[{COLORS['success']}]تم جلب البيانات من ذاكرة التخزين المؤقت: {key}[/{COLORS['success']}]")
+        return RECORD_TYPES[kind].from_dict(metadata)
+
+    def _cache_store(self, kind, key, metadata):
+        """تخزين البيانات في ذاكرة التخزين المؤقت إذا كانت مفعلة"""
+        if self.cache is None or not key or not metadata:
+            return
+        try:
+            self.cache.set(kind, key, metadata)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            # لا يُفقد ما استُخرج بسبب قيمة لا يمكن ترميزها أو خطأ في قاعدة البيانات
+            console.print(f"[{COLORS['warning']}]تعذر الكتابة في ذاكرة التخزين المؤقت: {str(e)}[/{COLORS['warning']}]")
+
+    def _load_metadata(self, kind, key, extract, url):
+        """جلب البيانات من الذاكرة المؤقتة أو استخراجها، ثم حفظها في ذاكرة العملية"""
+        metadata = self._cache_lookup(kind, key)
+        if metadata is None:
+            metadata = extract(url)
+            self._cache_store(kind, key, metadata)
+        if metadata and self.memo is not None:
+            self.memo.set((kind, key), metadata)
+        return metadata
+
+    def _get_metadata(self, kind, key, extract, url):
+        """البحث في ذاكرة العملية أولاً، ثم الجلب مع دمج الطلبات المتزامنة لنفس المعرف
+
+        النتيجة المُرجعة من ذاكرة العملية مشتركة بين المستدعين، فلا ينبغي تعديلها.
+        """
+        if not key:
+            return extract(url)
+        if self.memo is not None:
+            metadata = self.memo.get((kind, key))
+            if metadata is not None:
+                return metadata
+        return self._single_flight.do((kind, key), self._load_metadata, kind, key, extract, url)
+
+    # ------------------------------------------------------------------
+    # الواجهة العامة
+    # ------------------------------------------------------------------
+
+    def video_key(self, url, streams=None):
+        """مفتاح الفيديو في ذاكرة العملية والذاكرة المؤقتة، أو None إذا لم يُعرف معرفه
+
+        تُخزن النتائج المستخرجة بوضع دقة مختلف تحت مفتاح منفصل حتى لا تُرجع بيانات ناقصة لوضع full.
+        """
+        key = extract_video_id(url)
+        streams = streams or self.streams
+        if key and streams != DEFAULT_STREAM_MODE:
+            key = f"{key}:{streams}"
+        return key
+
+    def channel_key(self, url):
+        """مفتاح القناة في ذاكرة العملية والذاكرة المؤقتة
+
+        تُخزن النتائج بعدد فيديوهات مختلف عن الافتراضي تحت مفتاح منفصل.
+        """
+        key = extract_channel_id(url) or url.rstrip("/")
+        if self.channel_limit != CHANNEL_VIDEOS_LIMIT:
+            key = f"{key}:{self.channel_limit or 'all'}"
+        return key
+
+    def video(self, url):
+        """استخراج البيانات الوصفية للفيديو مع الاستفادة من ذاكرة العملية وذاكرة التخزين المؤقت"""
+        with _stage("video", self.metrics):
+            return self._get_metadata("video", self.video_key(url), self._extract_video, url)
+
+    def channel(self, url):
+        """استخراج البيانات الوصفية للقناة مع الاستفادة من ذاكرة العملية وذاكرة التخزين المؤقت"""
+        with _stage("channel", self.metrics):
+            if self.sync_state is not None:
+                return self._sync_channel(extract_channel_id(url) or url.rstrip("/"), url)
+            return self._get_metadata("channel", self.channel_key(url), self._extract_channel, url)
+
+    def _sync_channel(self, key, url):
+        """استخراج فيديوهات القناة الجديدة فقط منذ آخر مزامنة ثم تحديث علامة أحدث فيديو
+
+        لا تُستخدم الذاكرة المؤقتة هنا لأن الهدف معرفة ما نُشر منذ آخر تشغيل، ويتوقف
+        جلب صفحات القائمة فور الوصول إلى أحدث فيديو مسجل أو إلى فيديو أقدم منه.
+        إذا قطع channel_limit القائمة قبل الوصول إلى الحد السابق لا تُحدَّث العلامة،
+        حتى لا تضيع الفيديوهات الجديدة التي لم تُستخرج بعد.
+        """
+        mark = self.sync_state.get(key)
+        until = SyncMark(*mark) if mark else None
+        metadata = self._extract_channel(url, until=until)
+        if not metadata:
+            return metadata
+        
+        videos_info = metadata.get("آخر الفيديوهات") or []
+        truncated = (until is not None and not until.reached and self.channel_limit is not None
+                     and len(videos_info) >= self.channel_limit)
+        if truncated:
+            console.print(f"[{COLORS['warning']}]بلغ عدد الفيديوهات الجديدة الحد {self.channel_limit} قبل الوصول إلى آخر مزامنة، "
+                          f"فلم تُحدَّث علامة المزامنة (استخدم --limit أكبر أو بدون حد)[/{COLORS['warning']}]")
+        elif videos_info:
+            newest = videos_info[0]
+            published = newest.get("تاريخ النشر")
+            self.sync_state.set(key, newest["معرف الفيديو"], published.isoformat() if published else None)
+        if mark:
+            console.print(f"[{COLORS['info']}]عدد الفيديوهات الجديدة منذ آخر مزامنة: {len(videos_info)}[/{COLORS['info']}]")
+        return metadata
+
+    def videos(self, urls, workers=None, ordered=True):
+        """استخراج بيانات مجموعة من الفيديوهات بالتوازي، وإنتاج أزواج (الرابط، البيانات)"""
+        return _run_pool(self.video, urls, workers or self.workers, ordered)
+
+    def channels(self, urls, workers=None, ordered=True):
+        """استخراج بيانات مجموعة من القنوات بالتوازي، وإنتاج أزواج (الرابط، البيانات)"""
+        return _run_pool(self.channel, urls, workers or self.workers, ordered)
+
+    # ------------------------------------------------------------------
+    # الاستخراج عبر pytube
+    # ------------------------------------------------------------------
+
+    def _pytube_video_metadata(self, yt):
+        """جمع البيانات الوصفية للفيديو من كائن YouTube"""
+        # جمع البيانات الأساسية
+        metadata = VideoRecord(
+            title=yt.title,
+            description=_truncate(yt.description),
+            video_id=yt.video_id,
+            author=yt.author,
+            channel_url=f"https://www.youtube.com/channel/{yt.channel_id}",
+            channel_id=yt.channel_id,
+            publish_date=_parse_datetime(yt.publish_date),
+            length=_parse_int(yt.length),
+            views=_parse_int(yt.views),
+            rating=getattr(yt, 'rating', None),
+            keywords=getattr(yt, 'keywords', None) or [],
+            family_safe=not yt.age_restricted,
+            age_restricted=bool(yt.age_restricted),
+            thumbnail_url=yt.thumbnail_url
+        )
+        
+        # جمع معلومات الدقة المتاحة حسب الوضع المطلوب
+        if self.streams == "basic":
+            metadata.streams = self._basic_streams_info(yt)
+        elif self.streams == "full":
+            metadata.streams = self._full_streams_info(yt)
+        
+        return metadata
+
+    def _basic_streams_info(self, yt):
+        """معلومات الدقة المتاحة من استجابة المشغل فقط، دون فك تشفير الروابط أو طلبات إضافية
+
+        يظهر الحجم فقط إذا كان موجوداً في contentLength.
+        """
+        streams_info = []
+        for fmt in (yt.streaming_data or {}).get("formats", []):
+            streams_info.append(StreamRecord(
+                itag=fmt.get("itag"),
+                resolution=fmt.get("qualityLabel"),
+                mime_type=fmt.get("mimeType", "").split(";")[0],
+                fps=fmt.get("fps"),
+                size_mb=_size_mb(int(fmt.get("contentLength") or 0))
+            ))
+        return streams_info
+
+    def _full_streams_info(self, yt):
+        """معلومات الدقة المتاحة مع حجم كل دقة
+
+        قد يتطلب حساب الحجم طلب HTTP لكل دقة، فتُنفذ هذه الطلبات بالتوازي بدلاً من تسلسلها.
+        """
+        streams = list(yt.streams.filter(progressive=True))
+        with _stage("stream_filesize", self.metrics):
+            if len(streams) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(streams), STREAM_SIZE_WORKERS)) as executor:
+                    sizes = list(executor.map(lambda stream: stream.filesize, streams))
+            else:
+                sizes = [stream.filesize for stream in streams]
+        
+        return [
+            StreamRecord(
+                itag=stream.itag,
+                resolution=stream.resolution,
+                mime_type=stream.mime_type,
+                fps=stream.fps,
+                size_mb=_size_mb(size)
+            )
+            for stream, size in zip(streams, sizes)
+        ]
+
+    def _pytube_channel_metadata(self, channel, url, until=None):
+        """جمع البيانات الوصفية للقناة وآخر channel_limit فيديو (حتى حد المزامنة until) من كائن Channel"""
+        # جمع البيانات الأساسية للقناة
+        metadata = ChannelRecord(
+            name=channel.channel_name,
+            channel_id=channel.channel_id,
+            description=_truncate(getattr(channel, 'channel_about', None)) or None,
+            url=url,
+            subscribers=None  # يوتيوب لم يعد يوفر هذه المعلومة بسهولة
+        )
+        
+        # جمع معلومات آخر الفيديوهات (تُجلب قائمة الفيديوهات صفحة بصفحة حتى بلوغ الحد)
+        videos_info = []
+        if until is not None:
+            until.reached = False
+        
+        if self.channel_limit is None:
+            console.print(f"[{COLORS['info']}]جاري استخراج معلومات جميع الفيديوهات...[/{COLORS['info']}]")
+        else:
+            console.print(f"[{COLORS['info']}]جاري استخراج معلومات آخر {self.channel_limit} فيديوهات...[/{COLORS['info']}]")
+        for video in channel.videos:
+            if self.channel_limit is not None and len(videos_info) >= self.channel_limit:
+                break
+            publish_date = _parse_datetime(video.publish_date)
+            if until is not None and until(video.video_id, publish_date):
+                break
+            videos_info.append(ChannelVideoRecord(
+                title=video.title,
+                video_id=video.video_id,
+                url=f"https://www.youtube.com/watch?v={video.video_id}",
+                publish_date=publish_date,
+                views=_parse_int(video.views),
+                length=_parse_int(video.length)
+            ))
+        
+        metadata.videos = videos_info
+        
+        return metadata
+
+    def _extract_video(self, url):
+        """استخراج البيانات الوصفية للفيديو عبر pytube مع الرجوع إلى الطريقة الاحتياطية
+
+        تُعاد محاولة pytube وفق سياسة إعادة المحاولة، وعند فتح قاطع الدائرة (بعد
+        إخفاقات متتالية) يُتجاوز pytube ويُستخدم التحليل المباشر للصفحة فوراً.
+        """
+        _load_pytube()
+        console.print(f"[{COLORS['info']}]جاري استخراج البيانات من: {url}[/{COLORS['info']}]")
+        
+        # استخراج معرف الفيديو من الرابط
+        video_id = extract_video_id(url)
+        
+        if not video_id:
+            console.print(f"[{COLORS['error']}]خطأ: لم يتم العثور على معرف الفيديو في الرابط.[/{COLORS['error']}]")
+            return None
+        if self.reparse:
+            return self._reparse("video", video_id, url)
+        
+        pytube_error = None
+        breaker = self.breakers["video"]
+        if breaker.allow():
+            try:
+                with _stage("pytube_video", self.metrics):
+                    yt = YouTube(url)
+                    metadata = self.retry_policy.call(
+                        self._pytube_video_metadata, yt, non_retryable=(VideoUnavailable, RegexMatchError),
+                        metrics=self.metrics
+                    )
+                breaker.record_success()
+                self._archive_page("video", video_id, url, lambda: yt.watch_html)
+                return metadata
+            except (VideoUnavailable, RegexMatchError) as e:
+                # خطأ خاص بهذا الفيديو وليس عطلاً في pytube، فيُعد نجاحاً للقاطع ويُحرر الطلب التجريبي
+                breaker.record_success()
+                pytube_error = e
+            except Exception as e:
+                breaker.record_failure()
+                pytube_error = e
+            console.print(f"[{COLORS['warning']}]فشل استخدام pytube: {str(pytube_error)}[/{COLORS['warning']}]")
+        else:
+            console.print(f"[{COLORS['warning']}]قاطع الدائرة مفتوح: تجاوز pytube مؤقتاً[/{COLORS['warning']}]")
+            _count("breaker_skips", self.metrics)
+        
+        # استخدام الطريقة الاحتياطية
+        console.print(f"[{COLORS['info']}]محاولة استخدام الطريقة الاحتياطية...[/{COLORS['info']}]")
+        _count("fallback_video", self.metrics)
+        fallback_metadata = self.fallback_video_info(video_id)
+        if fallback_metadata:
+            return fallback_metadata
+        
+        if isinstance(pytube_error, VideoUnavailable):
+            console.print(f"[{COLORS['error']}]خطأ: الفيديو غير متاح أو تم حذفه.[/{COLORS['error']}]")
+        elif isinstance(pytube_error, RegexMatchError):
+            console.print(f"[{COLORS['error']}]خطأ: الرابط غير صالح.[/{COLORS['error']}]")
+        else:
+            console.print(f"[{COLORS['error']}]خطأ غير متوقع: فشلت الطريقة الاحتياطية أيضاً[/{COLORS['error']}]")
+            console.print(f"[{COLORS['info']}]نصيحة: قد تكون هناك مشكلة في مكتبة pytube أو تغيير في واجهة برمجة التطبيقات الخاصة بيوتيوب.[/{COLORS['info']}]")
+        return None
+
+    def _extract_channel(self, url, until=None):
+        """استخراج البيانات الوصفية للقناة عبر pytube مع الرجوع إلى الطريقة الاحتياطية
+
+        عند تمرير until (SyncMark) يتوقف استخراج الفيديوهات عند حد المزامنة السابقة.
+        """
+        _load_pytube()
+        console.print(f"[{COLORS['info']}]جاري استخراج بيانات القناة من: {url}[/{COLORS['info']}]")
+        
+        # استخراج معرف القناة من الرابط (للروابط المخصصة يُعرف المعرف بعد تحميل القناة)
+        channel_id = extract_channel_id(url)
+        if self.reparse:
+            return self._reparse("channel", channel_id, url)
+        
+        breaker = self.breakers["channel"]
+        if breaker.allow():
+            try:
+                with _stage("pytube_channel", self.metrics):
+                    channel = Channel(url)
+                    metadata = self.retry_policy.call(
+                        self._pytube_channel_metadata, channel, url, until, metrics=self.metrics
+                    )
+                breaker.record_success()
+                self._archive_page("channel", metadata.channel_id, url, lambda: channel.html)
+                return metadata
+            except Exception as e:
+                breaker.record_failure()
+                console.print(f"[{COLORS['warning']}]فشلت جميع المحاولات باستخدام pytube: {str(e)}[/{COLORS['warning']}]")
+        else:
+            console.print(f"[{COLORS['warning']}]قاطع الدائرة مفتوح: تجاوز pytube مؤقتاً[/{COLORS['warning']}]")
+            _count("breaker_skips", self.metrics)
+        
+        # استخدام الطريقة الاحتياطية
+        console.print(f"[{COLORS['info']}]جاري تجربة الطريقة الاحتياطية...[/{COLORS['info']}]")
+        _count("fallback_channel", self.metrics)
+        fallback_metadata = self.fallback_channel_info(channel_id, url, until)
+        if fallback_metadata:
+            return fallback_metadata
+        
+        console.print(f"[{COLORS['error']}]خطأ في استخراج بيانات القناة: فشلت الطريقة الاحتياطية أيضاً[/{COLORS['error']}]")
+        console.print(f"[{COLORS['info']}]نصيحة: قد تكون هناك مشكلة في مكتبة pytube أو تغيير في واجهة برمجة التطبيقات الخاصة بيوتيوب.[/{COLORS['info']}]")
+        return None
+
+
+# العميل الافتراضي المشترك الذي تستخدمه الدوال العامة في الوحدة
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """إرجاع العميل الافتراضي وإنشاؤه عند أول استخدام"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = YtubeClient()
+    return _default_client
+
+
+def set_default_client(client):
+    """استبدال العميل الافتراضي الذي تستخدمه الدوال العامة وإرجاع العميل السابق"""
+    global _default_client
+    with _default_client_lock:
+        previous, _default_client = _default_client, client
+    return previous
+
+
+def configure_http_session(pool_size=HTTP_POOL_SIZE):
+    """استبدال جلسة HTTP للعميل الافتراضي بجلسة بمجمع اتصالات بالحجم المطلوب"""
+    return get_default_client().configure_session(pool_size)
+
+
+def get_http_session():
+    """إرجاع جلسة HTTP للعميل الافتراضي"""
+    return get_default_client().session
+
+
+def http_get(url, **kwargs):
+    """تنفيذ طلب GET عبر جلسة HTTP للعميل الافتراضي"""
+    return get_default_client().http_get(url, **kwargs)
+
+
+def configure_page_streaming(enabled=True):
+    """تفعيل أو تعطيل التنزيل المتدفق للصفحات في الطرق الاحتياطية للعميل الافتراضي"""
+    get_default_client().stream_pages = enabled
+
+
+def configure_streams(mode=DEFAULT_STREAM_MODE):
+    """تحديد وضع استخراج معلومات الدقة المتاحة للعميل الافتراضي (none أو basic أو full)"""
+    if mode not in STREAM_MODES:
+        raise ValueError(f"وضع الدقة غير معروف: {mode}")
+    get_default_client().streams = mode
+
+
+def fetch_page(url, required=()):
+    """تنزيل صفحة يوتيوب عبر العميل الافتراضي (انظر YtubeClient.fetch_page)"""
+    return get_default_client().fetch_page(url, required)
+
+
+def configure_channel_limit(limit=CHANNEL_VIDEOS_LIMIT):
+    """تحديد عدد فيديوهات القناة المستخرجة مع بياناتها للعميل الافتراضي (None لجميع الفيديوهات)"""
+    get_default_client().channel_limit = limit
+
+
+def iter_channel_videos(url, limit=None):
+    """إنتاج معلومات فيديوهات القناة واحداً تلو الآخر عبر العميل الافتراضي (انظر YtubeClient.iter_channel_videos)"""
+    return get_default_client().iter_channel_videos(url, limit)
+
+
+def fallback_get_video_info(video_id):
+    """طريقة احتياطية للحصول على معلومات الفيديو باستخدام requests"""
+    return get_default_client().fallback_video_info(video_id)
+
+
+def fallback_get_channel_info(channel_id):
+    """طريقة احتياطية للحصول على معلومات القناة باستخدام requests"""
+    return get_default_client().fallback_channel_info(channel_id)
+
+
+def configure_memo(enabled=True, max_entries=MEMO_MAX_ENTRIES):
+    """تفعيل أو تعطيل ذاكرة النتائج داخل العملية للعميل الافتراضي"""
+    client = get_default_client()
+    client.memo = MemoStore(max_entries) if enabled else None
+    return client.memo
+
+
+def clear_memo():
+    """مسح جميع النتائج المحفوظة في ذاكرة العملية للعميل الافتراضي"""
+    client = get_default_client()
+    if client.memo is not None:
+        client.memo.clear()
+
+
+def configure_cache(cache_dir=DEFAULT_CACHE_DIR, enabled=True, refresh=False, ttl=None, max_entries=CACHE_MAX_ENTRIES):
+    """تفعيل أو تعطيل ذاكرة التخزين المؤقت للعميل الافتراضي
+
+    عند refresh=True تُتجاهل البيانات المخزنة وتُجلب من جديد ثم تُحدَّث في الذاكرة المؤقتة.
+    """
+    client = get_default_client()
+    if client.cache is not None:
+        client.cache.close()
+    client.cache = MetadataCache(cache_dir, ttl, max_entries) if enabled else None
+    client.refresh = refresh
+    # النتائج المحفوظة سابقاً في ذاكرة العملية قد لا تتوافق مع الإعدادات الجديدة
+    clear_memo()
+    return client.cache
+
+
+def get_video_metadata(url):
+    """استخراج البيانات الوصفية للفيديو عبر العميل الافتراضي"""
+    return get_default_client().video(url)
+
+
+def get_channel_metadata(url):
+    """استخراج البيانات الوصفية للقناة عبر العميل الافتراضي"""
+    return get_default_client().channel(url)
+
+
+def display_video_metadata(metadata, output_format="console", output_file=None):
+    """عرض البيانات الوصفية للفيديو بالتنسيق المطلوب، مع قياس زمن العرض في المرحلة output_<التنسيق>"""
+    with _stage(f"output_{output_format}"):
+        _display_video_metadata(metadata, output_format, output_file)
+
+
+def _display_video_metadata(metadata, output_format, output_file):
+    if not metadata:
+        return
+    metadata = _as_dict(metadata)
+    
+    if output_format == "console":
+        from rich.table import Table
+        # عرض البيانات الأساسية في جدول
+        table = Table(title=f"البيانات الوصفية للفيديو: {metadata['عنوان الفيديو']}")
+        table.add_column("الخاصية", style="cyan")
+        table.add_column("القيمة", style="green")
+        
+        for key, value in metadata.items():
+            if key != "الدقة المتاحة":
+                table.add_row(_DISPLAY_LABELS.get(key, key), _display_value(key, value))
+        
+        console.print(table)
+        
+        # عرض معلومات الدقة في جدول منفصل
+        if "الدقة المتاحة" in metadata and metadata["الدقة المتاحة"]:
+            streams_table = Table(title="معلومات الدقة المتاحة")
+            streams_table.add_column("itag", style="cyan")
+            streams_table.add_column("الدقة", style="green")
+            streams_table.add_column("نوع الملف", style="yellow")
+            streams_table.add_column("FPS", style="blue")
+            streams_table.add_column("الحجم (MB)", style="magenta")
+            
+            for stream in metadata["الدقة المتاحة"]:
+                streams_table.add_row(*(
+                    _display_value(key, stream.get(key))
+                    for key in ("itag", "الدقة", "نوع الملف", "FPS", "الحجم (MB)")
+                ))
+            
+            console.print(streams_table)
+    
+    elif output_format == "json":
+        # تصدير البيانات بتنسيق JSON
+        json_data = json.dumps(metadata, ensure_ascii=False, indent=4, default=_json_default)
+        if output_file:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(json_data)
+            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {output_file}[/{COLORS['success']}]")
+        else:
+            print(json_data)
+    
+    elif output_format == "ndjson":
+        # تصدير البيانات سطراً واحداً مضغوطاً بتنسيق NDJSON
+        with NdjsonWriter(output_file=output_file) as writer:
+            writer.write(metadata)
+    
+    elif output_format == "parquet":
+        # تصدير البيانات بأعمدة محددة الأنواع بتنسيق Parquet
+        with ParquetBatchWriter("video", output_file) as writer:
+            writer.write(metadata)
+    
+    elif output_format == "csv":
+        # تصدير البيانات الأساسية بتنسيق CSV، والدقة المتاحة في ملف مرتبط
+        with CsvBatchWriter("video", output_file) as writer:
+            writer.write(metadata)
+
+
+def display_channel_metadata(metadata, output_format="console", output_file=None):
+    """عرض البيانات الوصفية للقناة بالتنسيق المطلوب، مع قياس زمن العرض في المرحلة output_<التنسيق>"""
+    with _stage(f"output_{output_format}"):
+        _display_channel_metadata(metadata, output_format, output_file)
+
+
+def _display_channel_metadata(metadata, output_format, output_file):
+    if not metadata:
+        return
+    metadata = _as_dict(metadata)
+    
+    if output_format == "console":
+        from rich.table import Table
+        # عرض البيانات الأساسية في جدول
+        table = Table(title=f"البيانات الوصفية للقناة: {metadata['اسم القناة']}")
+        table.add_column("الخاصية", style="cyan")
+        table.add_column("القيمة", style="green")
+        
+        for key, value in metadata.items():
+            if key != "آخر الفيديوهات":
+                table.add_row(_DISPLAY_LABELS.get(key, key), _display_value(key, value))
+        
+        console.print(table)
+        
+        # عرض معلومات آخر الفيديوهات في جدول منفصل
+        if "آخر الفيديوهات" in metadata and metadata["آخر الفيديوهات"]:
+            videos_table = Table(title="آخر الفيديوهات في القناة")
+            videos_table.add_column("العنوان", style="cyan")
+            videos_table.add_column("تاريخ النشر", style="green")
             videos_table.add_column("المشاهدات", style="yellow")
             videos_table.add_column("المدة", style="blue")
             videos_table.add_column("الرابط", style="magenta")
             
             for video in metadata["آخر الفيديوهات"]:
-                videos_table.add_row(
-                    video["عنوان الفيديو"],
-                    video["تاريخ النشر"],
-                    video["عدد المشاهدات"],
-                    video["المدة"],
-                    video["رابط الفيديو"]
+                videos_table.add_row(*(
+                    _display_value(key, video.get(key))
+                    for key in ("عنوان الفيديو", "تاريخ النشر", "عدد المشاهدات", "المدة (ثواني)", "رابط الفيديو")
+                ))
+            
+            console.print(videos_table)
+    
+    elif output_format == "json":
+        # تصدير البيانات بتنسيق JSON
+        json_data = json.dumps(metadata, ensure_ascii=False, indent=4, default=_json_default)
+        if output_file:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(json_data)
+            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {output_file}[/{COLORS['success']}]")
+        else:
+            print(json_data)
+    
+    elif output_format == "ndjson":
+        # تصدير البيانات سطراً واحداً مضغوطاً بتنسيق NDJSON
+        with NdjsonWriter(output_file=output_file) as writer:
+            writer.write(metadata)
+    
+    elif output_format == "parquet":
+        # تصدير البيانات بأعمدة محددة الأنواع بتنسيق Parquet
+        with ParquetBatchWriter("channel", output_file) as writer:
+            writer.write(metadata)
+    
+    elif output_format == "csv":
+        # تصدير البيانات الأساسية بتنسيق CSV، والفيديوهات في ملف مرتبط
+        with CsvBatchWriter("channel", output_file) as writer:
+            writer.write(metadata)
+
+
+def display_stats(metrics=None):
+    """عرض أزمنة المراحل (بالمللي ثانية) وعدادات الأحداث في جدولين"""
+    metrics = metrics or _metrics
+    if metrics is None:
+        return
+    from rich.table import Table
+    snapshot = metrics.snapshot()
+    
+    table = Table(title="أزمنة المراحل (مللي ثانية)")
+    table.add_column("المرحلة", style="cyan")
+    table.add_column("العدد", style="green", justify="right")
+    table.add_column("المجموع", style="yellow", justify="right")
+    for q in METRICS_QUANTILES:
+        table.add_column(f"p{q * 100:g}", style="blue", justify="right")
+    table.add_column("الأقصى", style="magenta", justify="right")
+    for name, summary in snapshot["stages"].items():
+        values = [summary["total"]] + [summary[f"p{q * 100:g}"] for q in METRICS_QUANTILES] + [summary["max"]]
+        table.add_row(name, str(summary["count"]), *(f"{value * 1000:.1f}" for value in values))
+    console.print(table)
+    
+    if snapshot["counters"]:
+        counters_table = Table(title="الأحداث")
+        counters_table.add_column("الحدث", style="cyan")
+        counters_table.add_column("العدد", style="green", justify="right")
+        for name, value in snapshot["counters"].items():
+            counters_table.add_row(name, str(value))
+        console.print(counters_table)
+
+
+def read_batch_urls(source):
+    """قراءة قائمة الروابط من ملف أو من الإدخال القياسي ("-")، رابط في كل سطر"""
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            line = line.strip()
+            # تجاهل الأسطر الفارغة والتعليقات
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _fetch_batch_item(fetch, url):
+    """استخراج بيانات رابط واحد ضمن الدفعة دون أن يوقف فشله بقية الروابط"""
+    try:
+        return fetch(url)
+    except Exception as e:
+        console.print(f"[{COLORS['error']}]فشل في معالجة الرابط {url}: {str(e)}[/{COLORS['error']}]")
+        return None
+
+
+def _run_pool(fetch, urls, workers=DEFAULT_WORKERS, ordered=True, executor_class=ThreadPoolExecutor):
+    """تنفيذ fetch على مجموعة من الروابط بالتوازي باستخدام مجموعة محدودة من العمال
+
+    تُرجع مولّداً ينتج أزواج (الرابط، البيانات) حيث تكون البيانات None عند الفشل.
+    عند ordered=True تُنتج النتائج بترتيب الروابط المدخلة، وإلا فبترتيب اكتمالها.
+    لا يُرسل إلى المجمّع إلا عدد محدود من الروابط في كل مرة حتى تبقى الذاكرة ثابتة
+    مهما كان طول القائمة. مع executor_class=ProcessPoolExecutor يجب أن تكون fetch
+    والروابط قابلة للنقل بين العمليات (pickle)، ولا تُعاد من العامل إلا البيانات.
+    """
+    workers = max(1, int(workers))
+    max_pending = workers * 4
+    urls = iter(urls)
+
+    with executor_class(max_workers=workers) as executor:
+        # المهام المعلقة بترتيب إرسالها مع رابط كل منها
+        pending = collections.OrderedDict()
+
+        def submit_next():
+            for url in urls:
+                pending[executor.submit(_fetch_batch_item, fetch, url)] = url
+                return True
+            return False
+
+        while len(pending) < max_pending and submit_next():
+            pass
+
+        while pending:
+            if ordered:
+                done = [next(iter(pending))]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                url = pending.pop(future)
+                yield url, future.result()
+                submit_next()
+
+
+def process_batch(urls, url_type="video", workers=DEFAULT_WORKERS, ordered=True):
+    """معالجة مجموعة من الروابط بالتوازي عبر العميل الافتراضي (انظر _run_pool)"""
+    fetch = get_video_metadata if url_type == "video" else get_channel_metadata
+    return _run_pool(fetch, urls, workers, ordered)
+
+
+class SavedPage(collections.namedtuple("SavedPage", "name source saved")):
+    """صفحة محفوظة: الاسم، والمصدر (مسار الملف أو محتواه بالبايت)، وزمن الحفظ (ثوانٍ منذ 1970)
+
+    تُعرض باسمها فقط في رسائل الخطأ بدلاً من محتواها.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name
+
+
+def iter_saved_pages(source):
+    """إنتاج الصفحات المحفوظة (SavedPage) من مجلد أو أرشيف tar (مضغوط أو لا) أو ملف واحد
+
+    من المجلدات يكون المصدر مسار الملف فيقرؤه العامل بنفسه، ومن الأرشيف يكون محتوى العضو
+    بالبايت؛ إذ يُقرأ الأرشيف متدفقاً عضواً تلو الآخر دون فكه كاملاً.
+    """
+    import tarfile
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(INGEST_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    yield SavedPage(path, path, os.path.getmtime(path))
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(INGEST_EXTENSIONS):
+                    with archive.extractfile(member) as member_file:
+                        body = member_file.read()
+                    yield SavedPage(member.name, body, member.mtime)
+    else:
+        yield SavedPage(source, source, os.path.getmtime(source))
+
+
+def parse_saved_page(page, url_type="video", limit=CHANNEL_VIDEOS_LIMIT):
+    """استخراج البيانات من صفحة محفوظة (SavedPage) بمحللات الطريقة الاحتياطية
+
+    تُقرأ الصفحة على أجزاء (وتُفك إذا كانت مضغوطة gzip) ويتوقف القراءة فور اكتمال كائن
+    JSON المطلوب، كما في التنزيل المتدفق. يُؤخذ المعرف من اسم الملف إذا كان بصيغة معرف
+    فيديو أو قناة، وإلا من الصفحة نفسها، وتُقدَّر التواريخ النسبية بالنسبة إلى زمن الحفظ.
+    """
+    name, source, saved = page
+    required = ("ytInitialPlayerResponse",) if url_type == "video" else ("ytInitialData",)
+    scanner = IncrementalPageScanner(required)
+    # يُغلق الملف الأصلي وغلاف gzip معاً، فلا يبقى واصف ملف مفتوح لكل صفحة
+    with contextlib.ExitStack() as stack:
+        stream = stack.enter_context(io.BytesIO(source) if isinstance(source, bytes) else open(source, "rb"))
+        if name.lower().endswith(".gz"):
+            stream = stack.enter_context(gzip.GzipFile(fileobj=stream))
+        for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b""):
+            if scanner.feed(chunk):
+                break
+        else:
+            scanner.finish()
+    
+    stem = os.path.basename(name).split(".")[0]
+    if url_type == "video":
+        metadata = parse_video_page(scanner.text, stem if _VIDEO_ID_FORMAT_RE.match(stem) else None, scanner.blobs)
+        if not (metadata.video_id and metadata.title):
+            raise ValueError("ليست صفحة مشاهدة فيديو")
+        return metadata
+    
+    channel_id = stem if stem.startswith("UC") and len(stem) == 24 else None
+    now = datetime.datetime.fromtimestamp(saved, datetime.timezone.utc).replace(microsecond=0)
+    metadata = parse_channel_page(scanner.text, channel_id, None, scanner.blobs, limit, now=now)
+    if not metadata.channel_id:
+        raise ValueError("ليست صفحة قناة")
+    metadata.url = f"https://www.youtube.com/channel/{metadata.channel_id}"
+    return metadata
+
+
+def process_saved_pages(source, url_type="video", workers=None, ordered=True, limit=CHANNEL_VIDEOS_LIMIT):
+    """استخراج البيانات من صفحات محفوظة بالتوازي على عدة عمليات دون أي اتصال بالشبكة
+
+    تُوزَّع الصفحات على مجموعة عمليات (عدد الأنوية افتراضياً) عبر _run_pool، فلا يُرسل
+    إليها إلا عدد محدود من الصفحات في كل مرة. تُرجع مولّداً ينتج أزواج (اسم الصفحة، البيانات)
+    يمكن تمريره إلى display_batch_results كنتائج المعالجة الدفعية.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    fetch = functools.partial(parse_saved_page, url_type=url_type, limit=limit)
+    results = _run_pool(fetch, iter_saved_pages(source), workers or os.cpu_count() or 1, ordered,
+                        executor_class=ProcessPoolExecutor)
+    return ((page.name, metadata) for page, metadata in results)
+
+
+def _ndjson_encoder():
+    """إرجاع دالة تحول الكائن إلى سطر JSON مضغوط بالبايت، باستخدام orjson إذا كانت مثبتة"""
+    try:
+        import orjson
+    except ImportError:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_default)
+        return lambda obj: encoder.encode(obj).encode("utf-8")
+    return lambda obj: orjson.dumps(obj, default=_json_default)
+
+
+class BatchWriter:
+    """الواجهة المشتركة لكُتّاب نتائج المعالجة الدفعية
+
+    يستقبل الكاتب النتائج واحدة تلو الأخرى عبر write فور اكتمالها، ثم يُستدعى close
+    في النهاية لإتمام الإخراج.
+    """
+
+    def __init__(self, url_type="video", output_file=None):
+        self.url_type = url_type
+        self.output_file = output_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, metadata):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ConsoleBatchWriter(BatchWriter):
+    """عرض كل نتيجة في وحدة التحكم فور وصولها"""
+
+    def write(self, metadata):
+        display = _display_video_metadata if self.url_type == "video" else _display_channel_metadata
+        display(metadata, "console", None)
+
+
+class JsonBatchWriter(BatchWriter):
+    """جمع النتائج وكتابتها مصفوفة JSON واحدة منسقة عند الإغلاق"""
+
+    def __init__(self, url_type="video", output_file=None):
+        super().__init__(url_type, output_file)
+        self.collected = []
+
+    def write(self, metadata):
+        self.collected.append(metadata)
+
+    def close(self):
+        if not self.collected:
+            return
+        json_data = json.dumps(self.collected, ensure_ascii=False, indent=4, default=_json_default)
+        if self.output_file:
+            with open(self.output_file, 'w', encoding='utf-8') as f:
+                f.write(json_data)
+            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {self.output_file}[/{COLORS['success']}]")
+        else:
+            print(json_data)
+
+
+def _csv_value(value):
+    """تحويل القيمة الخام إلى خلية CSV: التواريخ بتنسيق ISO 8601 والقيم المفقودة خلايا فارغة"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_side_file(output_file, suffix):
+    """اسم الملف الجانبي المرتبط بملف CSV (مثل videos.csv ← videos_streams.csv)"""
+    root, ext = os.path.splitext(output_file)
+    return f"{root}_{suffix}{ext or '.csv'}"
+
+
+# لكل نوع: (أعمدة الملف الرئيسي، حقل القائمة المتداخلة، لاحقة الملف الجانبي، مفتاح الربط، أعمدة الملف الجانبي)
+# الحقول التي تحتوي على قوائم (مثل الكلمات المفتاحية) لا تُكتب في الملف الرئيسي
+_CSV_LAYOUTS = {
+    "video": (
+        tuple(key for name, key in VideoRecord.FIELDS if name not in ("streams", "keywords")),
+        "الدقة المتاحة", "streams", "معرف الفيديو",
+        tuple(key for name, key in StreamRecord.FIELDS)
+    ),
+    "channel": (
+        tuple(key for name, key in ChannelRecord.FIELDS if name != "videos"),
+        "آخر الفيديوهات", "videos", "معرف القناة",
+        tuple(key for name, key in ChannelVideoRecord.FIELDS)
+    )
+}
+
+
+class CsvBatchWriter(BatchWriter):
+    """كتابة البيانات الأساسية صفاً في ملف CSV فور وصول كل نتيجة، بمكتبة csv القياسية
+
+    يبقى الملف مفتوحاً طوال التشغيل ويُكتب صف العناوين مرة واحدة فقط. تُكتب الدقة المتاحة
+    (أو فيديوهات القناة) في ملف جانبي (*_streams.csv أو *_videos.csv) يرتبط كل صف فيه
+    بالملف الرئيسي عبر معرف الفيديو (أو معرف القناة). بدون ملف إخراج يُكتب الملف الرئيسي
+    فقط على الإخراج القياسي. مع append=True تُضاف الصفوف إلى الملفات الموجودة دون
+    تكرار صف العناوين.
+    """
+
+    def __init__(self, url_type="video", output_file=None, append=False):
+        super().__init__(url_type, output_file)
+        self.columns, self.list_key, suffix, self.link_key, self.side_columns = _CSV_LAYOUTS[url_type]
+        self.side_file = _csv_side_file(output_file, suffix) if output_file else None
+        self.append = append
+        self.count = 0
+        self._files = []
+        self._writer = self._open(output_file, self.columns)
+        self._side_writer = None
+
+    def _open(self, path, columns):
+        """فتح ملف CSV (أو الإخراج القياسي) وكتابة صف العناوين إذا كان الملف جديداً"""
+        append = False
+        if path is None:
+            stream = sys.stdout
+        else:
+            append = self.append and os.path.exists(path) and os.path.getsize(path) > 0
+            stream = open(path, "a" if append else "w", newline="", encoding="utf-8")
+            self._files.append(stream)
+        writer = csv.writer(stream)
+        if not append:
+            writer.writerow(columns)
+        return writer
+
+    def write(self, metadata):
+        self._writer.writerow([_csv_value(metadata.get(key)) for key in self.columns])
+        self.count += 1
+        children = metadata.get(self.list_key)
+        if children and self.side_file:
+            if self._side_writer is None:
+                # يُنشأ الملف الجانبي عند أول نتيجة تحتوي على قائمة فقط
+                self._side_writer = self._open(self.side_file, (self.link_key,) + self.side_columns)
+            link = _csv_value(metadata.get(self.link_key))
+            self._side_writer.writerows(
+                [link] + [_csv_value(child.get(key)) for key in self.side_columns]
+                for child in children
+            )
+        for stream in self._files:
+            stream.flush()
+
+    def close(self):
+        if self.output_file is None:
+            sys.stdout.flush()
+            return
+        files, self._files = self._files, []
+        for stream in files:
+            stream.close()
+        if files:
+            console.print(f"[{COLORS['success']}]تم حفظ {self.count} سجل في الملف: {self.output_file}[/{COLORS['success']}]")
+        if self._side_writer is not None:
+            console.print(f"[{COLORS['success']}]تم حفظ البيانات المرتبطة في الملف: {self.side_file}[/{COLORS['success']}]")
+
+
+class NdjsonWriter(BatchWriter):
+    """كتابة كل نتيجة سطراً مضغوطاً بتنسيق NDJSON فور وصولها
+
+    لا تُجمع النتائج في الذاكرة، ويُفرَّغ المخزن المؤقت بعد كل flush_records سطر أو كل
+    flush_interval ثانية، فتستطيع الأدوات الأخرى متابعة الملف (tail -f) أثناء التشغيل.
+    مع append=True تُضاف الأسطر إلى نهاية الملف الموجود.
+    """
+
+    def __init__(self, url_type="video", output_file=None, flush_records=NDJSON_FLUSH_RECORDS,
+                 flush_interval=NDJSON_FLUSH_INTERVAL, append=False):
+        super().__init__(url_type, output_file)
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._dumps = _ndjson_encoder()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if output_file:
+            self._stream = open(output_file, "ab" if append else "wb")
+            self._write = self._stream.write
+        else:
+            self._stream = None
+            stdout = getattr(sys.stdout, "buffer", None)
+            if stdout is not None:
+                self._write = stdout.write
+            else:
+                self._write = lambda data: sys.stdout.write(data.decode("utf-8"))
+
+    def write(self, metadata):
+        self._write(self._dumps(metadata) + b"\n")
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_records or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """تفريغ الأسطر المكتوبة إلى الملف أو الإخراج القياسي"""
+        if self._stream is not None:
+            self._stream.flush()
+        else:
+            (getattr(sys.stdout, "buffer", None) or sys.stdout).flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._stream is None:
+            self.flush()
+            return
+        if not self._stream.closed:
+            self._stream.close()
+            console.print(f"[{COLORS['success']}]تم حفظ {self.count} سجل في الملف: {self.output_file}[/{COLORS['success']}]")
+
+
+def _require_pyarrow():
+    """استيراد مكتبة pyarrow اللازمة للإخراج بتنسيق Parquet"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("الإخراج بتنسيق Parquet يتطلب مكتبة pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def _parquet_schema(pa, url_type):
+    """مخطط أعمدة Parquet بأنواعها لسجلات الفيديو أو القناة"""
+    if url_type == "video":
+        stream_type = pa.struct([
+            ("itag", pa.int64()), ("الدقة", pa.string()), ("نوع الملف", pa.string()),
+            ("FPS", pa.int64()), ("الحجم (MB)", pa.float64())
+        ])
+        return pa.schema([
+            ("عنوان الفيديو", pa.string()), ("وصف الفيديو", pa.string()), ("معرف الفيديو", pa.string()),
+            ("اسم القناة", pa.string()), ("رابط القناة", pa.string()), ("معرف القناة", pa.string()),
+            ("تاريخ النشر", pa.timestamp("us", tz="UTC")), ("المدة (ثواني)", pa.int64()), ("عدد المشاهدات", pa.int64()),
+            ("تقييم الفيديو", pa.float64()), ("الكلمات المفتاحية", pa.list_(pa.string())),
+            ("مناسب للعائلة", pa.bool_()), ("مقيد بالعمر", pa.bool_()), ("صورة الغلاف", pa.string()),
+            ("الدقة المتاحة", pa.list_(stream_type)), ("ملاحظة", pa.string())
+        ])
+    video_type = pa.struct([
+        ("عنوان الفيديو", pa.string()), ("معرف الفيديو", pa.string()), ("رابط الفيديو", pa.string()),
+        ("تاريخ النشر", pa.timestamp("us", tz="UTC")), ("عدد المشاهدات", pa.int64()), ("المدة (ثواني)", pa.int64())
+    ])
+    return pa.schema([
+        ("اسم القناة", pa.string()), ("معرف القناة", pa.string()), ("الوصف", pa.string()),
+        ("رابط القناة", pa.string()), ("عدد المشتركين", pa.int64()),
+        ("آخر الفيديوهات", pa.list_(video_type)), ("ملاحظة", pa.string())
+    ])
+
+
+class ParquetBatchWriter(BatchWriter):
+    """كتابة النتائج في ملف Parquet بأعمدة محددة الأنواع (أعداد صحيحة وتواريخ وقوائم)
+
+    تُجمع النتائج في مجموعات صفوف (row groups) بحجم PARQUET_ROW_GROUP_SIZE وتُكتب
+    كل مجموعة فور اكتمالها، فلا يتجاوز ما في الذاكرة مجموعة واحدة.
+    """
+
+    def __init__(self, url_type="video", output_file=None, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        if not output_file:
+            raise ValueError("يتطلب التنسيق parquet تحديد ملف الإخراج")
+        super().__init__(url_type, output_file)
+        self._pa, pq = _require_pyarrow()
+        self.schema = _parquet_schema(self._pa, url_type)
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._rows = []
+        self._writer = pq.ParquetWriter(output_file, self.schema)
+
+    def write(self, metadata):
+        self._rows.append(_as_dict(metadata))
+        if len(self._rows) >= self.row_group_size:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        """كتابة الصفوف المجمعة مجموعةَ صفوف واحدة"""
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self.schema))
+            self.count += len(self._rows)
+            self._rows = []
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._flush_rows()
+        self._writer.close()
+        self._writer = None
+        console.print(f"[{COLORS['success']}]تم حفظ {self.count} سجل في الملف: {self.output_file}[/{COLORS['success']}]")
+
+
+# كُتّاب النتائج المتاحة لكل تنسيق إخراج
+BATCH_WRITERS = {
+    "console": ConsoleBatchWriter,
+    "json": JsonBatchWriter,
+    "csv": CsvBatchWriter,
+    "ndjson": NdjsonWriter,
+    "parquet": ParquetBatchWriter
+}
+OUTPUT_FORMATS = tuple(BATCH_WRITERS)
+# التنسيقات التي يمكن إضافة نتائجها إلى ملف إخراج موجود (--append)
+APPEND_FORMATS = ("csv", "ndjson")
+
+
+def open_batch_writer(output_format="console", url_type="video", output_file=None, append=False):
+    """إنشاء كاتب النتائج المناسب لتنسيق الإخراج
+
+    مع append=True (للتنسيقات APPEND_FORMATS فقط) تُضاف النتائج إلى ملف الإخراج الموجود.
+    """
+    if append:
+        if output_format not in APPEND_FORMATS:
+            raise ValueError(f"لا يدعم التنسيق {output_format} الإضافة إلى ملف موجود")
+        return BATCH_WRITERS[output_format](url_type, output_file, append=True)
+    return BATCH_WRITERS[output_format](url_type, output_file)
+
+
+def display_batch_results(results, url_type="video", output_format="console", output_file=None, append=False):
+    """عرض أو حفظ نتائج المعالجة الدفعية وإرجاع عدد الروابط الناجحة والفاشلة
+
+    تُمرر كل نتيجة إلى كاتب التنسيق المطلوب فور اكتمالها (انظر BATCH_WRITERS)، ويُقاس
+    زمن الكتابة في المرحلة output_<التنسيق>.
+    """
+    succeeded = failed = 0
+    stage = f"output_{output_format}"
+
+    with open_batch_writer(output_format, url_type, output_file, append) as writer:
+        for url, metadata in results:
+            if not metadata:
+                failed += 1
+                continue
+            succeeded += 1
+            with _stage(stage):
+                writer.write(metadata)
+
+    console.print(f"[{COLORS['info']}]اكتملت المعالجة الدفعية: {succeeded} ناجح، {failed} فاشل[/{COLORS['info']}]")
+    return succeeded, failed
+
+
+def _require_aiohttp():
+    """استيراد مكتبة aiohttp اللازمة للمحرك غير المتزامن"""
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError("المحرك غير المتزامن يتطلب مكتبة aiohttp: pip install aiohttp")
+    return aiohttp
+
+
+@contextlib.asynccontextmanager
+async def _async_session_scope(session=None, concurrency=DEFAULT_CONCURRENCY):
+    """استخدام جلسة aiohttp المعطاة أو إنشاء جلسة مؤقتة وإغلاقها عند الانتهاء
+
+    يتسع مجمع اتصالات الجلسة المؤقتة لـ concurrency اتصالاً بدلاً من حد aiohttp الافتراضي.
+    """
+    if session is not None:
+        yield session
+        return
+    aiohttp = _require_aiohttp()
+    connector = aiohttp.TCPConnector(limit=max(1, int(concurrency)))
+    async with aiohttp.ClientSession(headers=HTTP_HEADERS, connector=connector) as new_session:
+        yield new_session
+
+
+async def _async_fetch_text(session, url, semaphore=None, limiter=None):
+    """جلب محتوى صفحة بشكل غير متزامن مع احترام حد التزامن، أو None عند فشل الطلب
+
+    يُستخدم محدد المعدل limiter (محدد العميل عادةً)، وإلا محدد المعدل المشترك إن كان مفعلاً.
+    """
+    if semaphore is None:
+        import asyncio
+        semaphore = asyncio.Semaphore(1)
+    async with semaphore:
+        limiter = limiter or _rate_limiter
+        if limiter is not None:
+            await limiter.acquire_async()
+        async with session.get(url, headers=HTTP_HEADERS) as response:
+            if response.status == 429 and limiter is not None:
+                limiter.penalize(_parse_retry_after(response.headers.get("Retry-After")))
+            if response.status != 200:
+                return None
+            return await response.text()
+
+
+async def _async_cached(client, kind, key, extract):
+    """النسخة غير المتزامنة من YtubeClient._get_metadata: ذاكرة العملية ثم الذاكرة المؤقتة ثم الاستخراج"""
+    if not key:
+        return await extract()
+    if client.memo is not None:
+        metadata = client.memo.get((kind, key))
+        if metadata is not None:
+            return metadata
+    metadata = client._cache_lookup(kind, key)
+    if metadata is None:
+        metadata = await extract()
+        client._cache_store(kind, key, metadata)
+    if metadata and client.memo is not None:
+        client.memo.set((kind, key), metadata)
+    return metadata
+
+
+async def async_fallback_get_video_info(video_id, session=None, semaphore=None, client=None):
+    """النسخة غير المتزامنة من fallback_get_video_info
+
+    تُنزَّل الصفحة من base_url للعميل (الافتراضي إن لم يُمرر عميل).
+    """
+    client = client or get_default_client()
+    try:
+        async with _async_session_scope(session) as session:
+            url = client.page_url(f"{YOUTUBE_BASE_URL}/watch?v={video_id}")
+            with _stage("page_fetch", client.metrics):
+                html_content = await _async_fetch_text(session, url, semaphore, client.rate_limiter)
+        if html_content is None:
+            return None
+        with _stage("page_parse", client.metrics):
+            return parse_video_page(html_content, video_id)
+    except Exception as e:
+        console.print(f"[{COLORS['error']}]فشل في الطريقة الاحتياطية: {str(e)}[/{COLORS['error']}]")
+        return None
+
+
+async def async_fallback_get_channel_info(channel_id, session=None, semaphore=None, url=None, client=None):
+    """النسخة غير المتزامنة من fallback_get_channel_info
+
+    يمكن تمرير رابط القناة الأصلي (مثل /@name) عند عدم معرفة معرف القناة. تُحلَّل
+    صفحة تبويب الفيديوهات نفسها التي تحللها الطريقة المتزامنة، وتُتابع الصفحات التالية
+    حتى بلوغ channel_limit للعميل. طلبات المتابعة (InnerTube) متزامنة، لذا يجري
+    التحليل في خيط منفصل حتى لا يوقف حلقة الأحداث.
+    """
+    import asyncio
+    client = client or get_default_client()
+    try:
+        url = f"{YOUTUBE_BASE_URL}/channel/{channel_id}" if channel_id else url
+        async with _async_session_scope(session) as session:
+            with _stage("page_fetch", client.metrics):
+                html_content = await _async_fetch_text(
+                    session, client.page_url(_channel_videos_url(url)), semaphore, client.rate_limiter
                 )
-            
-            console.print(videos_table)
+        if html_content is None:
+            return None
+        with _stage("page_parse", client.metrics):
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                parse_channel_page, html_content, channel_id, url,
+                limit=client.channel_limit, browse=client.browse_continuation
+            ))
+    except Exception as e:
+        console.print(f"[{COLORS['error']}]فشل في الطريقة الاحتياطية للقناة: {str(e)}[/{COLORS['error']}]")
+        return None
+
+
+async def async_get_video_metadata(url, session=None, semaphore=None, client=None):
+    """استخراج البيانات الوصفية للفيديو بشكل غير متزامن
+
+    يعتمد على تحليل صفحة المشاهدة مباشرة (دون pytube) حتى يمكن إبقاء مئات
+    الطلبات قيد التنفيذ في عملية واحدة، ويُرجع البيانات نفسها التي تُرجعها
+    fallback_get_video_info. تمر النتائج بذاكرة العملية والذاكرة المؤقتة للعميل،
+    وتُخزن تحت مفتاح الوضع none لأن الدقة المتاحة لا تُستخرج هنا.
+    """
+    client = client or get_default_client()
+    video_id = extract_video_id(url)
+    if not video_id:
+        console.print(f"[{COLORS['error']}]خطأ: لم يتم العثور على معرف الفيديو في الرابط.[/{COLORS['error']}]")
+        return None
+    with _stage("video", client.metrics):
+        return await _async_cached(
+            client, "video", client.video_key(url, "none"),
+            lambda: async_fallback_get_video_info(video_id, session, semaphore, client)
+        )
+
+
+async def async_get_channel_metadata(url, session=None, semaphore=None, client=None):
+    """استخراج البيانات الوصفية للقناة بشكل غير متزامن عبر تحليل تبويب الفيديوهات في صفحة القناة"""
+    client = client or get_default_client()
+    channel_id = extract_channel_id(url)
+    with _stage("channel", client.metrics):
+        return await _async_cached(
+            client, "channel", client.channel_key(url),
+            lambda: async_fallback_get_channel_info(channel_id, session, semaphore, url=url, client=client)
+        )
+
+
+async def async_iter_batch(urls, url_type="video", concurrency=DEFAULT_CONCURRENCY, ordered=True, session=None,
+                           client=None):
+    """مولّد غير متزامن ينتج أزواج (الرابط، البيانات) لمجموعة من الروابط
+
+    يُبقي على الأكثر concurrency طلباً قيد التنفيذ، ولا يُنشئ مهاماً جديدة إلا
+    عند اكتمال مهام سابقة حتى لا تنمو الذاكرة مع طول القائمة.
+    """
+    import asyncio
+    fetch = async_get_video_metadata if url_type == "video" else async_get_channel_metadata
+    concurrency = max(1, int(concurrency))
+    window = concurrency * 2
+    urls = iter(urls)
+
+    async with _async_session_scope(session, concurrency) as session:
+        semaphore = asyncio.Semaphore(concurrency)
+        pending = {}
+        finished = {}
+        next_index = 0
+        submitted = 0
+
+        async def run(url):
+            try:
+                return url, await fetch(url, session, semaphore, client)
+            except Exception as e:
+                console.print(f"[{COLORS['error']}]فشل في معالجة الرابط {url}: {str(e)}[/{COLORS['error']}]")
+                return url, None
+
+        def submit_next():
+            nonlocal submitted
+            if len(pending) + len(finished) >= window:
+                return False
+            for url in urls:
+                pending[asyncio.ensure_future(run(url))] = submitted
+                submitted += 1
+                return True
+            return False
+
+        while submit_next():
+            pass
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                if ordered:
+                    finished[index] = task.result()
+                else:
+                    yield task.result()
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+            while submit_next():
+                pass
+
+
+def process_batch_async(urls, url_type="video", concurrency=DEFAULT_CONCURRENCY, ordered=True, client=None):
+    """تشغيل المحرك غير المتزامن من شيفرة متزامنة
+
+    تعمل حلقة asyncio في خيط منفصل وتُمرَّر النتائج عبر طابور محدود الحجم،
+    فيمكن استهلاك الناتج بنفس طريقة process_batch.
+    """
+    import asyncio
+    _require_aiohttp()
+    results = queue.Queue(maxsize=max(1, int(concurrency)) * 2)
+    end_marker = object()
+
+    async def produce():
+        loop = asyncio.get_running_loop()
+        async for item in async_iter_batch(urls, url_type, concurrency, ordered, client=client):
+            await loop.run_in_executor(None, results.put, item)
+
+    def runner():
+        try:
+            asyncio.run(produce())
+        except BaseException as e:
+            results.put(e)
+        finally:
+            results.put(end_marker)
+
+    thread = threading.Thread(target=runner, name="ytubedata-async", daemon=True)
+    thread.start()
+
+    while True:
+        item = results.get()
+        if item is end_marker:
+            break
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+    thread.join()
+
+
+def _require_pandas():
+    """استيراد مكتبتي pandas و numpy اللازمتين للأمر الفرعي analyze"""
+    try:
+        import numpy
+        import pandas
+    except ImportError:
+        raise ImportError("تحليل البيانات المصدرة يتطلب مكتبتي pandas و numpy: pip install pandas numpy")
+    return pandas, numpy
+
+
+# الحقول المستخدمة في التحليل وأسماء أعمدتها الداخلية
+_ANALYZE_FIELDS = {
+    "معرف القناة": "channel_id",
+    "اسم القناة": "channel",
+    "معرف الفيديو": "video_id",
+    "عدد المشاهدات": "views",
+    "المدة (ثواني)": "length",
+    "تاريخ النشر": "published"
+}
+
+# أسماء أعمدة نتيجة التحليل
+_ANALYSIS_LABELS = {
+    "channel": "القناة",
+    "videos": "عدد الفيديوهات",
+    "views_total": "إجمالي المشاهدات",
+    "views_mean": "متوسط المشاهدات",
+    **{f"views_p{q * 100:g}": f"المشاهدات p{q * 100:g}" for q in ANALYZE_VIEW_QUANTILES},
+    "length_p50": "وسيط المدة (ثواني)",
+    **{f"length_share_{i}": f"{label} %" for i, (upper, label) in enumerate(ANALYZE_DURATION_BINS)},
+    "upload_gap_days": "وسيط الفاصل بين الرفع (أيام)",
+    "uploads_per_week": "فيديو في الأسبوع",
+    "views_per_day": "وسيط المشاهدات اليومية منذ النشر",
+    "observed_views_per_day": "نمو المشاهدات المرصود يومياً",
+    "observed_growth_pct": "وسيط النمو اليومي المرصود %"
+}
+
+
+# الأعمدة المعروضة في جدول وحدة التحكم (تُحفظ جميع الأعمدة في json و csv)
+_ANALYSIS_CONSOLE_COLUMNS = (
+    "channel", "videos", "views_total", "views_p50", "views_p99", "length_p50",
+    "upload_gap_days", "views_per_day", "observed_views_per_day"
+)
+
+
+def _read_export(path, pd):
+    """قراءة ملف مُصدَّر (JSON أو NDJSON أو CSV أو Parquet) إلى DataFrame بحسب امتداده"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return pd.read_json(path, lines=True, dtype=False, convert_dates=False)
+    if ext == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return pd.DataFrame.from_records([data] if isinstance(data, dict) else data)
+    if ext == ".parquet":
+        _require_pyarrow()
+        return pd.read_parquet(path)
+    if ext == ".csv":
+        frame = pd.read_csv(path, usecols=lambda column: column in _ANALYZE_FIELDS)
+        side_file = _csv_side_file(path, "videos")
+        if "عدد المشاهدات" not in frame.columns and os.path.exists(side_file):
+            # ملف قنوات: الفيديوهات في الملف الجانبي المرتبط بمعرف القناة
+            names = frame.dropna(subset=["معرف القناة"]).drop_duplicates("معرف القناة")
+            videos = pd.read_csv(side_file, usecols=lambda column: column in _ANALYZE_FIELDS)
+            videos["اسم القناة"] = videos["معرف القناة"].map(names.set_index("معرف القناة")["اسم القناة"])
+            return videos
+        return frame
+    raise ValueError(f"تنسيق ملف غير مدعوم: {path} (المدعوم: .json و .ndjson و .csv و .parquet)")
+
+
+def load_export(paths):
+    """تحميل ملفات مُصدَّرة من YtubeData إلى جدول فيديوهات واحد بأعمدة موحدة
+
+    تُفك قائمة "آخر الفيديوهات" في سجلات القنوات إلى صف لكل فيديو مع معرف القناة
+    واسمها، وتُحوَّل الأعمدة إلى أنواعها (أعداد وطوابع زمنية UTC) دفعة واحدة. إذا
+    تكرر الفيديو نفسه في عدة ملفات يُعتمد آخر ظهور له.
+    """
+    pd, np = _require_pandas()
+    frames = []
+    for path in paths:
+        frame = _read_export(path, pd)
+        if "آخر الفيديوهات" in frame.columns:
+            nested = frame.reindex(columns=["معرف القناة", "اسم القناة", "آخر الفيديوهات"])
+            nested = nested.explode("آخر الفيديوهات").dropna(subset=["آخر الفيديوهات"])
+            videos = pd.DataFrame(nested["آخر الفيديوهات"].tolist(), index=nested.index)
+            frame = videos.drop(columns=["معرف القناة", "اسم القناة"], errors="ignore").join(
+                nested[["معرف القناة", "اسم القناة"]]
+            )
+        frames.append(frame.reindex(columns=list(_ANALYZE_FIELDS)).rename(columns=_ANALYZE_FIELDS))
     
-    elif output_format == "json":
-        # تصدير البيانات بتنسيق JSON
-        json_data = json.dumps(metadata, ensure_ascii=False, indent=4)
+    columns = list(_ANALYZE_FIELDS.values())
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    frame["views"] = pd.to_numeric(frame["views"], errors="coerce")
+    frame["length"] = pd.to_numeric(frame["length"], errors="coerce")
+    # format="ISO8601" يقبل التاريخ وحده والتاريخ مع الوقت في العمود نفسه (pandas 2 وأحدث)
+    iso = {"format": "ISO8601"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+    frame["published"] = pd.to_datetime(frame["published"], errors="coerce", utc=True, **iso)
+    frame["channel_id"] = frame["channel_id"].fillna(frame["channel"])
+    frame["channel"] = frame["channel"].fillna(frame["channel_id"])
+    frame = frame.dropna(subset=["channel_id"])
+    
+    has_id = frame["video_id"].notna()
+    frame = pd.concat([frame[has_id].drop_duplicates("video_id", keep="last"), frame[~has_id]], ignore_index=True)
+    # تُرمَّز القناة مرة واحدة فيُجمَّع ويُرتَّب بأرقام صحيحة بدلاً من مقارنة النصوص في كل عملية
+    frame["channel_id"] = frame["channel_id"].astype("category")
+    return frame
+
+
+def load_view_series(path):
+    """تحميل عينات مخزن watch (ViewSeriesStore) إلى DataFrame دفعة واحدة عبر numpy"""
+    pd, np = _require_pandas()
+    dtype = np.dtype([("timestamp", "<f8"), ("video_id", "S11"), ("views", "<i8")])
+    header = len(ViewSeriesStore.MAGIC)
+    with open(path, "rb") as f:
+        if f.read(header) != ViewSeriesStore.MAGIC:
+            raise ValueError(f"الملف ليس مخزن عينات مشاهدات: {path}")
+        count = (os.fstat(f.fileno()).st_size - header) // dtype.itemsize
+        records = np.fromfile(f, dtype=dtype, count=count)
+    return pd.DataFrame({
+        "timestamp": records["timestamp"],
+        "video_id": np.char.decode(records["video_id"], "ascii"),
+        "views": records["views"]
+    })
+
+
+def analyze_channels(videos, series=None, as_of=None):
+    """حساب مؤشرات مجمعة لكل قناة من جدول الفيديوهات (ناتج load_export)
+
+    المؤشرات: عدد الفيديوهات، ومجموع المشاهدات ومتوسطها ومئيناتها، ووسيط المدة ونسبة
+    الفيديوهات في كل فئة مدة، ووسيط الفاصل بين مرات الرفع وعدد الفيديوهات في الأسبوع،
+    ووسيط المشاهدات اليومية منذ النشر حتى as_of. مع series (ناتج load_view_series)
+    يُضاف النمو المرصود فعلياً بين أول عينة وآخر عينة لكل فيديو. جميع الحسابات عمليات
+    مجمعة على الأعمدة دون المرور على الصفوف واحداً واحداً.
+    """
+    pd, np = _require_pandas()
+    as_of = pd.Timestamp.now(tz="UTC") if as_of is None else pd.Timestamp(as_of)
+    if as_of.tzinfo is None:
+        as_of = as_of.tz_localize("UTC")
+    key = videos["channel_id"]
+    groups = videos.groupby(key, sort=False, observed=True)
+    
+    result = groups.agg(
+        channel=("channel", "first"),
+        videos=("channel_id", "size"),
+        views_total=("views", "sum"),
+        views_mean=("views", "mean"),
+        length_p50=("length", "median")
+    )
+    quantiles = groups["views"].quantile(list(ANALYZE_VIEW_QUANTILES)).unstack()
+    for q in ANALYZE_VIEW_QUANTILES:
+        result[f"views_p{q * 100:g}"] = quantiles[q] if q in quantiles else np.nan
+    
+    # توزيع المدد: نسبة فيديوهات كل قناة في كل فئة
+    bins = [0] + [upper for upper, label in ANALYZE_DURATION_BINS]
+    buckets = pd.cut(videos["length"], bins, labels=False, include_lowest=True)
+    shares = pd.crosstab(key, buckets, normalize="index") * 100
+    for i in range(len(ANALYZE_DURATION_BINS)):
+        result[f"length_share_{i}"] = shares[i] if i in shares else 0.0
+    
+    # وتيرة الرفع: الفواصل بين تواريخ النشر المتتالية في كل قناة بعد ترتيبها
+    dated = videos.dropna(subset=["published"]).sort_values(["channel_id", "published"])
+    dated_groups = dated.groupby("channel_id", sort=False, observed=True)["published"]
+    gaps = dated_groups.diff().dt.total_seconds() / 86400
+    result["upload_gap_days"] = gaps.groupby(dated["channel_id"], observed=True).median()
+    span = dated_groups.agg(["min", "max", "size"])
+    weeks = (span["max"] - span["min"]).dt.total_seconds() / (7 * 86400)
+    result["uploads_per_week"] = ((span["size"] - 1) / weeks).where(weeks > 0)
+    
+    # المشاهدات اليومية منذ النشر (يوم واحد على الأقل حتى لا تتضخم الفيديوهات الحديثة)
+    age_days = ((as_of - videos["published"]).dt.total_seconds() / 86400).clip(lower=1)
+    result["views_per_day"] = (videos["views"] / age_days).groupby(key, observed=True).median()
+    
+    if series is not None and len(series):
+        ordered = series.sort_values("timestamp", kind="stable")
+        per_video = ordered.groupby("video_id").agg(
+            t0=("timestamp", "first"), t1=("timestamp", "last"), v0=("views", "first"), v1=("views", "last")
+        )
+        days = (per_video["t1"] - per_video["t0"]) / 86400
+        rate = ((per_video["v1"] - per_video["v0"]) / days).where(days > 0)
+        growth = (rate / per_video["v0"].where(per_video["v0"] > 0) * 100)
+        channels = videos.dropna(subset=["video_id"]).set_index("video_id")["channel_id"]
+        observed = pd.DataFrame({"rate": rate, "growth": growth}).join(channels, how="inner")
+        observed_groups = observed.groupby("channel_id", observed=True)
+        result["observed_views_per_day"] = observed_groups["rate"].sum(min_count=1)
+        result["observed_growth_pct"] = observed_groups["growth"].median()
+    
+    result = result.sort_values("views_total", ascending=False, kind="stable")
+    result.index.name = "معرف القناة"
+    return result.rename(columns=_ANALYSIS_LABELS)
+
+
+def display_analysis(result, output_format="console", output_file=None):
+    """عرض نتيجة analyze_channels في جدول، أو حفظها بتنسيق JSON أو CSV"""
+    pd, np = _require_pandas()
+    if output_format == "console":
+        from rich.table import Table
+        columns = [_ANALYSIS_LABELS[name] for name in _ANALYSIS_CONSOLE_COLUMNS if _ANALYSIS_LABELS[name] in result]
+        table = Table(title="تحليل القنوات")
+        for column in columns:
+            table.add_column(column, style="cyan" if column == _ANALYSIS_LABELS["channel"] else "green",
+                             justify="left" if column == _ANALYSIS_LABELS["channel"] else "right")
+        for row in result[columns].itertuples(index=False):
+            cells = []
+            for value in row:
+                if isinstance(value, str):
+                    cells.append(value)
+                elif pd.isna(value):
+                    cells.append("غير متوفر")
+                elif float(value).is_integer():
+                    cells.append(format_number(int(value)))
+                else:
+                    cells.append(f"{value:,.1f}")
+            table.add_row(*cells)
+        console.print(table)
+        return
+    
+    frame = result.reset_index()
+    if output_format == "json":
+        json_data = frame.to_json(orient="records", force_ascii=False, indent=4)
         if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
+            with open(output_file, "w", encoding="utf-8") as f:
                 f.write(json_data)
-            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {output_file}[/{COLORS['success']}]")
         else:
             print(json_data)
-    
     elif output_format == "csv":
-        # تصدير البيانات الأساسية بتنسيق CSV
-        basic_data = {k: v for k, v in metadata.items() if k != "آخر الفيديوهات"}
-        df = pd.DataFrame([basic_data])
-        
-        if output_file:
-            df.to_csv(output_file, index=False, encoding='utf-8')
-            console.print(f"[{COLORS['success']}]تم حفظ البيانات في الملف: {output_file}[/{COLORS['success']}]")
-        else:
-            print(df.to_csv(index=False))
+        frame.to_csv(output_file or sys.stdout, index=False, encoding="utf-8")
+    if output_file:
+        console.print(f"[{COLORS['success']}]تم حفظ التحليل في الملف: {output_file}[/{COLORS['success']}]")
+
+
+class YtubeService:
+    """منطق خدمة HTTP/JSON المحلية فوق عميل واحد دائم
+
+    يبقى العميل (بجلسة HTTP ومجمع اتصالاته وذاكرة العملية والذاكرة المؤقتة) حياً طوال
+    عمر الخدمة، فلا تتكرر كلفة الاستيراد وفتح الاتصالات مع كل طلب. تُرجع handle
+    الثلاثية (رمز الحالة، نوع المحتوى، الجسم بالبايت) ولا تعتمد على خادم HTTP بعينه.
+    """
+
+    def __init__(self, client, metrics=None, max_batch=SERVE_MAX_BATCH):
+        self.client = client
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.started = time.monotonic()
+        self._routes = {
+            ("GET", "/video"): self.video,
+            ("GET", "/channel"): self.channel,
+            ("POST", "/batch"): self.batch,
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.prometheus_metrics
+        }
+
+    @staticmethod
+    def _json(status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        return status, "application/json; charset=utf-8", body
+
+    def _error(self, status, message):
+        _count("serve_errors", self.metrics)
+        return self._json(status, {"error": message})
+
+    def handle(self, method, path, query="", body=b""):
+        """توجيه الطلب إلى نقطة النهاية المناسبة وإرجاع (الحالة، نوع المحتوى، الجسم)"""
+        route = self._routes.get((method, path))
+        if route is None:
+            if any(route_path == path for route_method, route_path in self._routes):
+                return self._error(405, f"الطريقة {method} غير مدعومة في {path}")
+            return self._error(404, f"نقطة نهاية غير معروفة: {path}")
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(query).items()}
+        with _stage(f"serve{path.replace('/', '_')}", self.metrics):
+            try:
+                return route(params, body)
+            except Exception as e:
+                return self._error(500, str(e))
+
+    def _lookup(self, kind, params):
+        """استخراج فيديو أو قناة من المعامل url أو id"""
+        url = params.get("url")
+        if not url and params.get("id"):
+            url = (f"{YOUTUBE_BASE_URL}/watch?v={params['id']}" if kind == "video"
+                   else f"{YOUTUBE_BASE_URL}/channel/{params['id']}")
+        if not url:
+            return self._error(400, "يجب تحديد المعامل url أو id")
+        if kind == "video" and not extract_video_id(url):
+            return self._error(400, f"رابط فيديو غير صالح: {url}")
+        metadata = self.client.video(url) if kind == "video" else self.client.channel(url)
+        if not metadata:
+            return self._error(404, f"تعذر استخراج البيانات: {url}")
+        return self._json(200, metadata)
+
+    def video(self, params, body):
+        return self._lookup("video", params)
+
+    def channel(self, params, body):
+        return self._lookup("channel", params)
+
+    def batch(self, params, body):
+        """استخراج مجموعة روابط بالتوازي من جسم JSON بالشكل {"type": "video", "urls": [...]}"""
+        try:
+            request = json.loads(body.decode("utf-8") or "{}")
+        except ValueError:
+            return self._error(400, "جسم الطلب ليس JSON صالحاً")
+        if not isinstance(request, dict):
+            return self._error(400, "يجب أن يكون جسم الطلب كائن JSON")
+        url_type = request.get("type", "video")
+        urls = request.get("urls")
+        if url_type not in ("video", "channel"):
+            return self._error(400, f"نوع غير معروف: {url_type}")
+        if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+            return self._error(400, "يجب أن يكون urls قائمة روابط نصية")
+        if len(urls) > self.max_batch:
+            return self._error(413, f"الحد الأقصى لعدد الروابط في الطلب الواحد: {self.max_batch}")
         
-        # تصدير بيانات الفيديوهات في ملف منفصل إذا كان متاحاً
-        if "آخر الفيديوهات" in metadata and metadata["آخر الفيديوهات"] and output_file:
-            videos_df = pd.DataFrame(metadata["آخر الفيديوهات"])
-            videos_file = output_file.replace('.csv', '_videos.csv')
-            videos_df.to_csv(videos_file, index=False, encoding='utf-8')
-            console.print(f"[{COLORS['success']}]تم حفظ بيانات الفيديوهات في الملف: {videos_file}[/{COLORS['success']}]")
-
-
-def main():
-    """الدالة الرئيسية للبرنامج"""
-    parser = argparse.ArgumentParser(description="YtubeData - أداة لاستخراج البيانات الوصفية من يوتيوب")
-    parser.add_argument("url", help="رابط فيديو أو قناة يوتيوب")
+        run = self.client.videos if url_type == "video" else self.client.channels
+        results = [{"url": url, "data": metadata} for url, metadata in run(urls)]
+        succeeded = sum(1 for result in results if result["data"])
+        return self._json(200, {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded})
+
+    def health(self, params, body):
+        """حالة الخدمة: مدة التشغيل وحجم ذاكرة العملية والذاكرة المؤقتة وحالة قواطع الدائرة"""
+        client = self.client
+        return self._json(200, {
+            "status": "ok",
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+            "memo_entries": len(client.memo) if client.memo is not None else None,
+            "cache_entries": len(client.cache) if client.cache is not None else None,
+            "breakers": {kind: breaker.state for kind, breaker in client.breakers.items()}
+        })
+
+    def prometheus_metrics(self, params, body):
+        """أزمنة المراحل والعدادات بتنسيق Prometheus النصي"""
+        metrics = self.metrics or _metrics
+        text = metrics.to_prometheus() if metrics is not None else ""
+        return 200, "text/plain; version=0.0.4; charset=utf-8", text.encode("utf-8")
+
+
+def make_server(service, host=SERVE_HOST, port=SERVE_PORT):
+    """إنشاء خادم HTTP متعدد الخيوط يمرر الطلبات إلى service (YtubeService)
+
+    يُعالج كل اتصال في خيط مستقل، فتُخدم الطلبات المتزامنة معاً عبر العميل المشترك.
+    """
+    import http.server
+    import socketserver
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "YtubeData"
+
+        def _respond(self, method):
+            parsed = urllib.parse.urlsplit(self.path)
+            body = b""
+            length = (self.headers.get("Content-Length") or "0").strip()
+            if not length.isdigit():
+                # لا يمكن معرفة نهاية الجسم، فيُغلق الاتصال بعد الرد
+                status, content_type, payload = service._error(400, "ترويسة Content-Length غير صالحة")
+                self.close_connection = True
+            elif int(length) > SERVE_MAX_BODY:
+                status, content_type, payload = service._error(413, "جسم الطلب أكبر من المسموح")
+                self.close_connection = True
+            else:
+                length = int(length)
+                if length:
+                    body = self.rfile.read(length)
+                status, content_type, payload = service.handle(method, parsed.path.rstrip("/") or "/", parsed.query, body)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+    class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    return Server((host, port), Handler)
+
+
+def serve_main(argv=None):
+    """الأمر الفرعي serve: تشغيل خدمة HTTP/JSON محلية دائمة"""
+    parser = argparse.ArgumentParser(
+        prog="YtubeData.py serve",
+        description="تشغيل خدمة HTTP/JSON محلية بنقاط النهاية /video و /channel و /batch و /health و /metrics"
+    )
+    parser.add_argument("--host", default=SERVE_HOST, help=f"عنوان الاستماع، الافتراضي: {SERVE_HOST}")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help=f"منفذ الاستماع، الافتراضي: {SERVE_PORT}")
+    parser.add_argument("--memo-ttl", type=float, default=SERVE_MEMO_TTL,
+                        help=f"مدة صلاحية النتائج في ذاكرة الخدمة بالثواني، الافتراضي: {SERVE_MEMO_TTL}")
+    parser.add_argument("--verbose", action="store_true",
+                        help="عرض رسائل التقدم لكل طلب (تُخفى افتراضياً، ويبقى سجل الطلبات على stderr)")
+    _add_client_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    metrics = configure_metrics()
+    client = _build_client(parser, args, metrics=metrics, memo_ttl=args.memo_ttl)
+    server = make_server(YtubeService(client, metrics), args.host, args.port)
+    host, port = server.server_address[:2]
+    console.print(f"[{COLORS['success']}]تعمل الخدمة على http://{host}:{port} (Ctrl+C للإيقاف)[/{COLORS['success']}]")
+    if not args.verbose:
+        console.configure(quiet=True)
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        client.close()
+
+
+def _watch_video_id(value):
+    """معرف الفيديو من رابط أو معرف مباشر، أو None إذا لم يكن صالحاً"""
+    video_id = extract_video_id(value) if "/" in value else value
+    return video_id if video_id and _VIDEO_ID_FORMAT_RE.match(video_id) else None
+
+
+def watch_views(client, video_ids, store, interval=WATCH_INTERVAL, rounds=None,
+                clock=time.monotonic, sleep=time.sleep, now=time.time):
+    """استطلاع عدد مشاهدات video_ids كل interval ثانية وإلحاق العينات بالمخزن store
+
+    تُوزَّع الطلبات بالتساوي على الفترة (طلب كل interval / عدد الفيديوهات ثانية)
+    فلا تصدر دفعة واحدة. إذا تأخر طلب عن موعده يُزاح ما بعده بالمقدار نفسه بدلاً
+    من تعويض الطلبات الفائتة دفعة واحدة. يُرجع عدد العينات المسجلة.
+    """
+    step = interval / len(video_ids)
+    next_poll = clock()
+    written = 0
+    for _ in itertools.count() if rounds is None else range(rounds):
+        for video_id in video_ids:
+            delay = next_poll - clock()
+            if delay > 0:
+                sleep(delay)
+            next_poll = max(next_poll, clock()) + step
+            
+            with _stage("watch_poll", client.metrics):
+                try:
+                    views = client.video_views(video_id)
+                except Exception as e:
+                    console.print(f"[{COLORS['error']}]فشل استطلاع {video_id}: {str(e)}[/{COLORS['error']}]")
+                    views = None
+            if views is None:
+                _count("watch_errors", client.metrics)
+                continue
+            store.append(now(), video_id, views)
+            written += 1
+    return written
+
+
+def watch_main(argv=None):
+    """الأمر الفرعي watch: استطلاع عدد المشاهدات دورياً وتسجيله في مخزن عينات مضغوط"""
+    parser = argparse.ArgumentParser(
+        prog="YtubeData.py watch",
+        description="استطلاع عدد مشاهدات مجموعة فيديوهات دورياً وإلحاقه بمخزن سلاسل زمنية ثنائي"
+    )
+    parser.add_argument("videos", nargs="*", help="معرفات أو روابط الفيديوهات")
+    parser.add_argument("-b", "--batch", metavar="FILE",
+                        help="ملف يحتوي على معرفات أو روابط الفيديوهات (واحد في كل سطر)، أو - للإدخال القياسي")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                        help=f"الفترة بالثواني بين استطلاعين للفيديو نفسه، الافتراضي: {WATCH_INTERVAL:g}")
+    parser.add_argument("--rounds", type=int,
+                        help="عدد جولات الاستطلاع (بلا حد افتراضياً)")
+    parser.add_argument("--store", default=WATCH_STORE_FILE,
+                        help=f"ملف العينات، الافتراضي: {WATCH_STORE_FILE}")
+    parser.add_argument("--dump", action="store_true",
+                        help="طباعة عينات ملف --store بتنسيق CSV ثم الخروج")
+    _add_client_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    if args.dump:
+        store = ViewSeriesStore(args.store)
+        try:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(["timestamp", "video_id", "views"])
+            for timestamp, video_id, views in store:
+                writer.writerow([datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat(),
+                                 video_id, views])
+        finally:
+            store.close()
+        return
+    
+    values = list(args.videos) + (list(read_batch_urls(args.batch)) if args.batch else [])
+    if not values:
+        parser.error("يجب تحديد معرف فيديو واحد على الأقل أو ملف (--batch)")
+    video_ids = []
+    for value in values:
+        video_id = _watch_video_id(value)
+        if video_id is None:
+            parser.error(f"معرف أو رابط فيديو غير صالح: {value}")
+        video_ids.append(video_id)
+    video_ids = list(dict.fromkeys(video_ids))
+    if args.interval <= 0:
+        parser.error("يجب أن تكون الفترة أكبر من صفر")
+    if args.rounds is not None and args.rounds < 1:
+        parser.error("يجب أن يكون عدد الجولات 1 على الأقل")
+    
+    client = _build_client(parser, args)
+    store = ViewSeriesStore(args.store)
+    console.print(f"[{COLORS['info']}]مراقبة {len(video_ids)} فيديو كل {args.interval:g} ثانية "
+                  f"(طلب كل {args.interval / len(video_ids):g} ثانية) في الملف: {args.store}[/{COLORS['info']}]")
+    try:
+        written = watch_views(client, video_ids, store, args.interval, args.rounds)
+        console.print(f"[{COLORS['success']}]تم تسجيل {written} عينة في الملف: {args.store}[/{COLORS['success']}]")
+    finally:
+        store.close()
+        client.close()
+
+
+def analyze_main(argv=None):
+    """الأمر الفرعي analyze: مؤشرات مجمعة لكل قناة من ملفات مُصدَّرة"""
+    parser = argparse.ArgumentParser(
+        prog="YtubeData.py analyze",
+        description="حساب مؤشرات كل قناة (مئينات المشاهدات، وتيرة الرفع، توزيع المدد، النمو) من ملفات مُصدَّرة"
+    )
+    parser.add_argument("files", nargs="+", help="ملفات JSON أو NDJSON أو CSV أو Parquet صدّرتها الأداة")
+    parser.add_argument("--series", metavar="FILE",
+                        help="ملف عينات الأمر watch لإضافة النمو المرصود لكل قناة")
+    parser.add_argument("--as-of", help="التاريخ المرجعي لحساب المشاهدات اليومية (ISO 8601)، الافتراضي: الآن")
+    parser.add_argument("--top", type=int, help="عرض أكبر N قناة من حيث إجمالي المشاهدات فقط")
+    parser.add_argument("-f", "--format", choices=ANALYZE_FORMATS, default="console",
+                        help="تنسيق الإخراج (console, json, csv)، الافتراضي: console")
+    parser.add_argument("-o", "--output", help="اسم ملف الإخراج (للتنسيقين json و csv)")
+    args = parser.parse_args(argv)
+    
+    if args.top is not None and args.top < 1:
+        parser.error("يجب أن يكون --top 1 على الأقل")
+    for path in args.files + ([args.series] if args.series else []):
+        if not os.path.exists(path):
+            parser.error(f"الملف غير موجود: {path}")
+    
+    videos = load_export(args.files)
+    if videos.empty:
+        console.print(f"[{COLORS['warning']}]لا توجد فيديوهات في الملفات المحددة[/{COLORS['warning']}]")
+        return
+    series = load_view_series(args.series) if args.series else None
+    result = analyze_channels(videos, series, args.as_of)
+    console.print(f"[{COLORS['info']}]تم تحليل {len(videos)} فيديو من {len(result)} قناة[/{COLORS['info']}]")
+    if args.top is not None:
+        result = result.head(args.top)
+    display_analysis(result, args.format, args.output)
+
+
+def ingest_main(argv=None):
+    """الأمر الفرعي ingest: استخراج البيانات من صفحات محفوظة دون اتصال بالشبكة"""
+    parser = argparse.ArgumentParser(
+        prog="YtubeData.py ingest",
+        description="استخراج البيانات الوصفية من صفحات مشاهدة أو قنوات محفوظة في مجلد أو أرشيف tar على عدة عمليات"
+    )
+    parser.add_argument("source", help="مجلد أو أرشيف tar (أو tar.gz) أو ملف صفحة محفوظة (.html أو .html.gz)")
+    parser.add_argument("-t", "--type", choices=["video", "channel"], default="video",
+                        help="نوع الصفحات المحفوظة (فيديو أو قناة)، الافتراضي: video")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="console",
+                        help="تنسيق الإخراج (console, json, csv, ndjson, parquet)، الافتراضي: console")
+    parser.add_argument("-o", "--output", help="اسم ملف الإخراج (للتنسيقات json و csv و ndjson و parquet)")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="عدد العمليات المتوازية، الافتراضي: عدد أنوية المعالج")
+    parser.add_argument("--unordered", action="store_true",
+                        help="إخراج النتائج بترتيب اكتمالها بدلاً من ترتيب الصفحات")
+    limit_group = parser.add_mutually_exclusive_group()
+    limit_group.add_argument("--limit", type=int, default=CHANNEL_VIDEOS_LIMIT,
+                             help=f"عدد فيديوهات القناة المستخرجة من كل صفحة، الافتراضي: {CHANNEL_VIDEOS_LIMIT}")
+    limit_group.add_argument("--all", action="store_true",
+                             help="استخراج جميع فيديوهات القناة الموجودة في الصفحة")
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.source):
+        parser.error(f"المصدر غير موجود: {args.source}")
+    if args.workers is not None and args.workers < 1:
+        parser.error("يجب أن يكون عدد العمليات 1 على الأقل")
+    if args.limit < 0:
+        parser.error("يجب ألا يكون عدد الفيديوهات سالباً")
+    if args.format == "parquet" and not args.output:
+        parser.error("يتطلب التنسيق parquet تحديد ملف الإخراج (-o)")
+    
+    results = process_saved_pages(args.source, args.type, args.workers, ordered=not args.unordered,
+                                  limit=None if args.all else args.limit)
+    display_batch_results(results, args.type, args.format, args.output)
+
+
+# الأوامر الفرعية المتاحة قبل الخيارات في سطر الأوامر (YtubeData.py <الأمر> ...)
+SUBCOMMANDS = {
+    "serve": serve_main,
+    "watch": watch_main,
+    "analyze": analyze_main,
+    "ingest": ingest_main
+}
+
+
+def _add_client_arguments(parser):
+    """إضافة خيارات العميل المشتركة بين الاستخراج المباشر والأوامر الفرعية"""
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"عدد العمال المتوازين في وضع الدفعة، الافتراضي: {DEFAULT_WORKERS}")
+    parser.add_argument("--stream-pages", action="store_true",
+                        help="تنزيل الصفحات في الطريقة الاحتياطية على أجزاء وإيقاف التنزيل عند اكتمال البيانات المطلوبة")
+    parser.add_argument("--streams", choices=STREAM_MODES,
+                        help="معلومات الدقة المتاحة للفيديو: none (تخطيها)، basic (دون طلبات إضافية)، "
+                             f"full (مع حجم كل دقة)، الافتراضي: {DEFAULT_STREAM_MODE}")
+    limit_group = parser.add_mutually_exclusive_group()
+    limit_group.add_argument("--limit", type=int,
+                             help=f"عدد فيديوهات القناة المستخرجة، الافتراضي: {CHANNEL_VIDEOS_LIMIT} (وبلا حد مع --sync)")
+    limit_group.add_argument("--all", action="store_true",
+                             help="استخراج جميع فيديوهات القناة مع متابعة صفحات القائمة")
+    parser.add_argument("--retries", type=int, default=RETRY_MAX_ATTEMPTS,
+                        help=f"الحد الأقصى لعدد محاولات pytube لكل رابط، الافتراضي: {RETRY_MAX_ATTEMPTS}")
+    parser.add_argument("--backoff", type=float, default=RETRY_BASE_DELAY,
+                        help=f"التأخير الأولي بالثواني قبل إعادة المحاولة (يتضاعف بعد كل محاولة)، الافتراضي: {RETRY_BASE_DELAY}")
+    parser.add_argument("--max-backoff", type=float, default=RETRY_MAX_DELAY,
+                        help=f"الحد الأقصى للتأخير بين المحاولات بالثواني، الافتراضي: {RETRY_MAX_DELAY}")
+    parser.add_argument("--breaker-threshold", type=int, default=BREAKER_FAILURE_THRESHOLD,
+                        help=f"عدد إخفاقات pytube المتتالية قبل تجاوزه إلى الطريقة الاحتياطية، الافتراضي: {BREAKER_FAILURE_THRESHOLD}")
+    parser.add_argument("--breaker-cooldown", type=float, default=BREAKER_COOLDOWN,
+                        help=f"مدة تجاوز pytube بالثواني بعد فتح قاطع الدائرة، الافتراضي: {BREAKER_COOLDOWN:g}")
+    parser.add_argument("--rate", type=float,
+                        help="الحد الأقصى لعدد الطلبات الصادرة في الثانية (يُعطَّل التحديد إذا لم يُحدد)")
+    parser.add_argument("--burst", type=float,
+                        help="الحد الأقصى لعدد الطلبات المسموح بإرسالها دفعة واحدة، الافتراضي: قيمة --rate")
+    parser.add_argument("--rate-file",
+                        help="ملف محلي لمشاركة محدد المعدل بين عدة عمليات تعمل في الوقت نفسه")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"مجلد ذاكرة التخزين المؤقت، الافتراضي: {DEFAULT_CACHE_DIR}")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="تعطيل ذاكرة التخزين المؤقت")
+    parser.add_argument("--refresh", action="store_true",
+                        help="تجاهل البيانات المخزنة وجلبها من جديد مع تحديث ذاكرة التخزين المؤقت")
+    parser.add_argument("--archive", metavar="DIR",
+                        help="حفظ كل صفحة منزَّلة مضغوطة (zstd أو gzip) دون تكرار في مجلد أرشيف مع فهرس بالمعرفات")
+    parser.add_argument("--reparse", action="store_true",
+                        help="استخراج البيانات من صفحات الأرشيف (--archive) بدلاً من الشبكة")
+
+
+def _build_client(parser, args, sync_state=None, metrics=None, memo_ttl=None):
+    """التحقق من خيارات العميل وإنشاء YtubeClient بها وتعيينه عميلاً افتراضياً"""
+    if args.workers < 1:
+        parser.error("يجب أن يكون عدد العمال 1 على الأقل")
+    if args.limit is not None and args.limit < 0:
+        parser.error("يجب ألا يكون عدد الفيديوهات سالباً")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("يجب أن يكون معدل الطلبات أكبر من صفر")
+    if args.rate_file and args.rate is None:
+        parser.error("يتطلب --rate-file تحديد --rate")
+    if args.reparse and not args.archive:
+        parser.error("يتطلب --reparse تحديد مجلد الأرشيف (--archive)")
+
+    if args.rate is not None:
+        configure_rate_limiter(args.rate, args.burst, args.rate_file)
+    
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = MetadataCache(args.cache_dir)
+        except (OSError, sqlite3.Error) as e:
+            console.print(f"[{COLORS['warning']}]تعذر فتح ذاكرة التخزين المؤقت: {str(e)}[/{COLORS['warning']}]")
+    
+    archive = None
+    if args.archive:
+        try:
+            archive = PageArchive(args.archive)
+        except (OSError, sqlite3.Error) as e:
+            parser.error(f"تعذر فتح الأرشيف: {str(e)}")
+    
+    # عدد فيديوهات القناة: بلا حد مع --all، وكذلك افتراضياً في وضع المزامنة لالتقاط جميع الفيديوهات الجديدة
+    if args.all or (args.limit is None and sync_state is not None):
+        channel_limit = None
+    else:
+        channel_limit = CHANNEL_VIDEOS_LIMIT if args.limit is None else args.limit
+    
+    # عميل واحد لكامل التشغيل بمجمع اتصالات يتسع لجميع العمال المتوازين
+    client = YtubeClient(
+        pool_size=max(HTTP_POOL_SIZE, args.workers),
+        cache=cache,
+        # مع --reparse لا تُقرأ النتائج القديمة من الذاكرة المؤقتة بل تُستبدل بنتائج إعادة التحليل
+        refresh=args.refresh or args.reparse,
+        stream_pages=args.stream_pages,
+        streams=args.streams or DEFAULT_STREAM_MODE,
+        channel_limit=channel_limit,
+        sync_state=sync_state,
+        retry_policy=RetryPolicy(args.retries, args.backoff, args.max_backoff),
+        breaker_threshold=args.breaker_threshold,
+        breaker_cooldown=args.breaker_cooldown,
+        workers=args.workers,
+        metrics=metrics,
+        memo_ttl=memo_ttl,
+        archive=archive,
+        reparse=args.reparse
+    )
+    set_default_client(client)
+    return client
+
+
+def main(argv=None):
+    """الدالة الرئيسية للبرنامج
+
+    إذا كانت الكلمة الأولى اسم أمر فرعي (مثل serve) يُنفَّذ الأمر الفرعي بباقي الخيارات.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="YtubeData - أداة لاستخراج البيانات الوصفية من يوتيوب",
+        epilog=f"الأوامر الفرعية: {', '.join(SUBCOMMANDS)} (مثلاً: YtubeData.py serve --help)"
+    )
+    parser.add_argument("url", nargs="?", help="رابط فيديو أو قناة يوتيوب")
     parser.add_argument("-t", "--type", choices=["video", "channel"], default="video",
                         help="نوع الرابط (فيديو أو قناة)، الافتراضي: video")
-    parser.add_argument("-f", "--format", choices=["console", "json", "csv"], default="console",
-                        help="تنسيق الإخراج (console, json, csv)، الافتراضي: console")
-    parser.add_argument("-o", "--output", help="اسم ملف الإخراج (للتنسيقات json و csv)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="console",
+                        help="تنسيق الإخراج (console, json, csv, ndjson, parquet)، الافتراضي: console")
+    parser.add_argument("-o", "--output", help="اسم ملف الإخراج (للتنسيقات json و csv و ndjson و parquet)")
+    parser.add_argument("-b", "--batch", metavar="FILE",
+                        help="ملف يحتوي على قائمة روابط (رابط في كل سطر)، استخدم - للقراءة من الإدخال القياسي")
+    parser.add_argument("--unordered", action="store_true",
+                        help="إخراج نتائج الدفعة بترتيب اكتمالها بدلاً من ترتيب الإدخال")
+    parser.add_argument("--append", action="store_true",
+                        help="إضافة نتائج الدفعة إلى ملف الإخراج الموجود دون تكرار صف العناوين (csv و ndjson فقط)")
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread",
+                        help="محرك المعالجة الدفعية: thread (pytube مع مجموعة خيوط) أو async (تحليل الصفحات عبر aiohttp)، الافتراضي: thread")
+    parser.add_argument("--concurrency", type=int,
+                        help=f"الحد الأقصى للطلبات المتزامنة مع المحرك async، الافتراضي: {DEFAULT_CONCURRENCY}")
+    parser.add_argument("--sync", action="store_true",
+                        help="مزامنة تزايدية للقنوات: استخراج الفيديوهات المنشورة منذ التشغيل السابق فقط")
+    parser.add_argument("--sync-file",
+                        help="ملف حالة المزامنة، الافتراضي: sync.sqlite3 داخل مجلد ذاكرة التخزين المؤقت")
+    parser.add_argument("--stats", action="store_true",
+                        help="عرض أزمنة كل مرحلة (p50/p95/p99) وعدادات إعادة المحاولة والطريقة الاحتياطية في النهاية")
+    parser.add_argument("--metrics-file",
+                        help="حفظ أزمنة المراحل والعدادات في ملف عند انتهاء التشغيل")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS, default="json",
+                        help="تنسيق ملف المقاييس (json أو prometheus)، الافتراضي: json")
+    _add_client_arguments(parser)
+    
+    args = parser.parse_args(argv)
+    
+    if not args.url and not args.batch:
+        parser.error("يجب تحديد رابط أو ملف دفعة (--batch)")
+    if args.format == "parquet" and not args.output:
+        parser.error("يتطلب التنسيق parquet تحديد ملف الإخراج (-o)")
+    if args.append and (not args.batch or not args.output or args.format not in APPEND_FORMATS):
+        parser.error("يتطلب --append وضع الدفعة (--batch) وملف إخراج (-o) بتنسيق csv أو ndjson")
+    if args.sync and args.type != "channel":
+        parser.error("تتطلب المزامنة --sync نوع الرابط channel")
+    if args.sync and args.engine == "async":
+        parser.error("المزامنة --sync غير مدعومة مع المحرك async")
+    if args.sync and args.reparse:
+        parser.error("المزامنة --sync غير مدعومة مع --reparse")
+    if args.archive and args.engine == "async":
+        parser.error("الأرشيف --archive غير مدعوم مع المحرك async")
+    if args.concurrency is not None and args.engine != "async":
+        parser.error("يتطلب --concurrency المحرك async (استخدم --workers مع المحرك thread)")
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("يجب أن يكون عدد الطلبات المتزامنة 1 على الأقل")
+    if args.streams not in (None, "none") and args.engine == "async":
+        # المحرك async يحلل صفحة المشاهدة فقط ولا يستخرج الدقة المتاحة
+        parser.error("الخيار --streams basic/full غير مدعوم مع المحرك async")
+
+    if args.stats or args.metrics_file:
+        configure_metrics()
+    
+    sync_state = None
+    if args.sync:
+        sync_state = SyncStateStore(args.sync_file or os.path.join(args.cache_dir, "sync.sqlite3"))
     
-    args = parser.parse_args()
+    client = _build_client(parser, args, sync_state)
     
     print_banner()
     
-    if args.type == "video":
-        metadata = get_video_metadata(args.url)
-        if metadata:
-            display_video_metadata(metadata, args.format, args.output)
-    else:  # channel
-        metadata = get_channel_metadata(args.url)
-        if metadata:
-            display_channel_metadata(metadata, args.format, args.output)
+    try:
+        if args.batch:
+            if args.engine == "async":
+                results = process_batch_async(read_batch_urls(args.batch), args.type,
+                                              args.concurrency or DEFAULT_CONCURRENCY, ordered=not args.unordered,
+                                              client=client)
+            else:
+                results = process_batch(read_batch_urls(args.batch), args.type, args.workers, ordered=not args.unordered)
+            display_batch_results(results, args.type, args.format, args.output, append=args.append)
+        elif args.type == "video":
+            metadata = get_video_metadata(args.url)
+            if metadata:
+                display_video_metadata(metadata, args.format, args.output)
+        else:  # channel
+            metadata = get_channel_metadata(args.url)
+            if metadata:
+                display_channel_metadata(metadata, args.format, args.output)
+    finally:
+        # إغلاق العميل يحفظ أزمنة الوصول المؤجلة في ذاكرة التخزين المؤقت قبل الخروج
+        client.close()
+        # تُعرض المقاييس وتُحفظ حتى عند إيقاف التشغيل قبل اكتماله
+        metrics = get_metrics()
+        if metrics is not None:
+            if args.stats:
+                display_stats(metrics)
+            if args.metrics_file:
+                metrics.write(args.metrics_file, args.metrics_format)
+                console.print(f"[{COLORS['success']}]تم حفظ المقاييس في الملف: {args.metrics_file}[/{COLORS['success']}]")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+قياسات أداء لأداة YtubeData
+
+يقيس هذا الملف زمن بدء تشغيل الأداة: زمن استيراد الوحدة (باستخدام python -X importtime)
+والزمن الكلي لتشغيل سطر الأوامر، والذاكرة المستهلكة لكل سجل بيانات (قاموس مقابل سجل
+__slots__)، ويكتب النتائج بتنسيق JSON.
+
+تعمل قياسات التحليل والإنتاجية دون اتصال بالإنترنت: تُحلَّل صفحات مشاهدة وقناة محفوظة
+في المجلد bench_fixtures، ويقدمها خادم HTTP محلي بدلاً من يوتيوب (عبر base_url في
+YtubeClient) لقياس الاستدعاءات الفردية والدفعية بأعداد مختلفة من العمال وذروة الذاكرة.
+
+ويقيس أيضاً زمن الأمر analyze (التحميل ثم الحساب) على ملف CSV مُصدَّر مولَّد بعدد كبير من الصفوف.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import threading
+import contextlib
+import statistics
+import subprocess
+import tracemalloc
+import http.server
+
+try:
+    import resource
+except ImportError:  # غير متوفرة على ويندوز
+    resource = None
+
+# مجلد المشروع، لتشغيل الأداة منه بغض النظر عن مجلد العمل الحالي
+PROJECT_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# الصفحات المحفوظة المستخدمة في القياسات دون اتصال
+FIXTURES_DIR = os.path.join(PROJECT_DIR, "bench_fixtures")
+FIXTURE_PAGES = {"watch": "watch.html", "channel": "channel.html"}
+
+
+def _ytubedata():
+    """استيراد وحدة YtubeData من مجلد المشروع"""
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    import YtubeData
+    return YtubeData
+
+
+def load_fixtures():
+    """قراءة الصفحات المحفوظة وإرجاع قاموس {الاسم: المحتوى}"""
+    pages = {}
+    for name, filename in FIXTURE_PAGES.items():
+        with open(os.path.join(FIXTURES_DIR, filename), encoding="utf-8") as f:
+            pages[name] = f.read()
+    return pages
+
+
+def _run_python(args):
+    """تشغيل مفسر Python في مجلد المشروع وإرجاع (الزمن المستغرق بالثواني، المخرجات على stderr)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable] + args,
+        cwd=PROJECT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True
+    )
+    return time.perf_counter() - start, result.stderr.decode("utf-8", "replace")
+
+
+def parse_importtime(output, module="YtubeData"):
+    """استخراج الزمن التراكمي لاستيراد الوحدة (بالميكروثانية) من مخرجات -X importtime"""
+    for line in output.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return None
+
+
+def bench_startup(runs=10):
+    """قياس زمن استيراد الوحدة والزمن الكلي لتشغيل `YtubeData.py --help`"""
+    import_times = []
+    cli_times = []
+    for _ in range(runs):
+        _, output = _run_python(["-X", "importtime", "-c", "import YtubeData"])
+        import_times.append(parse_importtime(output) / 1e6)
+        elapsed, _ = _run_python(["YtubeData.py", "--help"])
+        cli_times.append(elapsed)
+
+    return {
+        "import_seconds": _summary(import_times),
+        "cli_help_seconds": _summary(cli_times),
+        "runs": runs
+    }
+
+
+def _sample_video(i, record_type=None):
+    """إنشاء سجل فيديو نموذجي بثلاث دقات، قاموساً أو من نوع record_type"""
+    streams = [
+        {"itag": itag, "الدقة": resolution, "نوع الملف": "video/mp4", "FPS": 30, "الحجم (MB)": 12.5 * (n + 1)}
+        for n, (itag, resolution) in enumerate(((18, "360p"), (22, "720p"), (37, "1080p")))
+    ]
+    metadata = {
+        "عنوان الفيديو": f"فيديو {i}",
+        "معرف الفيديو": f"vid{i:08d}",
+        "اسم القناة": "قناة",
+        "معرف القناة": "UCbench",
+        "تاريخ النشر": datetime.datetime(2021, 1, 1) + datetime.timedelta(minutes=i),
+        "المدة (ثواني)": 60 + i % 3600,
+        "عدد المشاهدات": i * 7,
+        "مناسب للعائلة": True,
+        "مقيد بالعمر": False,
+        "الدقة المتاحة": streams
+    }
+    if record_type is None:
+        return metadata
+    return record_type.from_dict(metadata)
+
+
+def _measure_memory(build, count):
+    """الذاكرة المحجوزة (بالبايت) للاحتفاظ بـ count سجل تنشئها build"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        records = [build(i) for i in range(count)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del records
+    return allocated
+
+
+def bench_memory(records=100000):
+    """مقارنة ذاكرة الاحتفاظ بـ records سجل فيديو بثلاث دقات: قواميس مقابل VideoRecord"""
+    VideoRecord = _ytubedata().VideoRecord
+
+    dict_bytes = _measure_memory(_sample_video, records)
+    record_bytes = _measure_memory(lambda i: _sample_video(i, VideoRecord), records)
+    return {
+        "records": records,
+        "dict_bytes_per_record": dict_bytes / records,
+        "slots_bytes_per_record": record_bytes / records,
+        "ratio": record_bytes / dict_bytes
+    }
+
+
+def _time_calls(func, args, runs):
+    """أزمنة runs استدعاء للدالة func بالثواني"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_parse(runs=50):
+    """قياس زمن تحليل كل صفحة محفوظة بمحللات الطريقة الاحتياطية"""
+    ytubedata = _ytubedata()
+    pages = load_fixtures()
+    cases = {
+        "watch": (ytubedata.parse_video_page, (pages["watch"], "benchVideo1")),
+        "watch_regex": (ytubedata._parse_video_page_regex, (pages["watch"], "benchVideo1")),
+        "channel": (ytubedata.parse_channel_page, (pages["channel"], None, "https://www.youtube.com/@bench"))
+    }
+    results = {}
+    for name, (func, args) in cases.items():
+        results[name] = dict(_summary(_time_calls(func, args, runs)), page_bytes=len(args[0].encode("utf-8")))
+    results["runs"] = runs
+    return results
+
+
+class _FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """يقدم الصفحات المحفوظة بدلاً من يوتيوب: صفحة المشاهدة لـ /watch وصفحة القناة لغيرها"""
+
+    pages = {}
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/watch"):
+            body = self.pages["watch"]
+        elif self.path.startswith(("/channel/", "/@", "/c/", "/user/")):
+            body = self.pages["channel"]
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def fixture_server():
+    """تشغيل خادم HTTP محلي يقدم الصفحات المحفوظة وإرجاع عنوانه"""
+    handler = type("FixtureHandler", (_FixtureHandler,), {
+        "pages": {name: html.encode("utf-8") for name, html in load_fixtures().items()}
+    })
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _bench_client(base_url, workers):
+    """عميل يجلب الصفحات من الخادم المحلي مباشرة بالطريقة الاحتياطية
+
+    يُفتح قاطعا الدائرة مسبقاً حتى لا يحاول pytube الاتصال بيوتيوب أثناء القياس.
+    """
+    ytubedata = _ytubedata()
+    client = ytubedata.YtubeClient(
+        pool_size=max(workers, ytubedata.HTTP_POOL_SIZE), memo=False, base_url=base_url,
+        breaker_threshold=1, breaker_cooldown=float("inf")
+    )
+    for breaker in client.breakers.values():
+        breaker.record_failure()
+    return client
+
+
+def _bench_urls(kind, count):
+    """روابط مختلفة بعدد count حتى لا تُدمج الطلبات المتكررة"""
+    if kind == "video":
+        return [f"https://www.youtube.com/watch?v=bench{i:06d}" for i in range(count)]
+    return [f"https://www.youtube.com/channel/UCbench{i:017d}" for i in range(count)]
+
+
+def bench_throughput(requests=200, worker_counts=(1, 4, 16)):
+    """قياس زمن الاستدعاء الفردي وإنتاجية المعالجة الدفعية بأعداد مختلفة من العمال وذروة الذاكرة"""
+    results = {"requests": requests}
+    # تكتب الأداة رسائل التقدم على الإخراج القياسي، فتُحجب حتى يبقى إخراج القياسات JSON صالحاً
+    with fixture_server() as base_url, open(os.devnull, "w", encoding="utf-8") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for kind in ("video", "channel"):
+            with _bench_client(base_url, 1) as client:
+                fetch = client.video if kind == "video" else client.channel
+                single = _time_calls(fetch, _bench_urls(kind, 1), min(requests, 20))
+            batches = {}
+            for workers in worker_counts:
+                urls = _bench_urls(kind, requests)
+                with _bench_client(base_url, workers) as client:
+                    run = client.videos if kind == "video" else client.channels
+                    start = time.perf_counter()
+                    completed = sum(1 for url, metadata in run(urls, workers=workers) if metadata)
+                    elapsed = time.perf_counter() - start
+                batches[str(workers)] = {
+                    "seconds": elapsed,
+                    "per_second": requests / elapsed,
+                    "completed": completed
+                }
+            results[kind] = {"single_seconds": _summary(single), "batch": batches}
+
+        # ذروة الذاكرة أثناء دفعة بأكبر عدد من العمال (تُقاس منفصلة لأن tracemalloc يبطئ التنفيذ)
+        workers = max(worker_counts)
+        with _bench_client(base_url, workers) as client:
+            tracemalloc.start()
+            try:
+                for _ in client.videos(_bench_urls("video", requests), workers=workers):
+                    pass
+                results["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    if resource is not None:
+        # ru_maxrss بالكيلوبايت على لينكس وبالبايت على macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results["max_rss_bytes"] = maxrss if sys.platform == "darwin" else maxrss * 1024
+    return results
+
+
+def bench_analyze(rows=1000000, channels=1000):
+    """قياس زمن تحميل ملف CSV بـ rows فيديو من channels قناة وحساب مؤشرات القنوات منه"""
+    YtubeData = _ytubedata()
+    pd, np = YtubeData._require_pandas()
+    rng = np.random.default_rng(0)
+    channel_ids = np.char.add("UC", np.arange(channels).astype(str))[rng.integers(0, channels, rows)]
+    frame = pd.DataFrame({
+        "عنوان الفيديو": "فيديو",
+        "معرف الفيديو": np.char.add("v", np.arange(rows).astype(str)),
+        "اسم القناة": channel_ids,
+        "معرف القناة": channel_ids,
+        "تاريخ النشر": (pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650 * 86400, rows), unit="s")),
+        "المدة (ثواني)": rng.integers(10, 7200, rows),
+        "عدد المشاهدات": rng.lognormal(8, 2, rows).astype(np.int64)
+    })
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.csv")
+        frame.to_csv(path, index=False, date_format="%Y-%m-%dT%H:%M:%S")
+        del frame
+        start = time.perf_counter()
+        videos = YtubeData.load_export([path])
+        loaded = time.perf_counter()
+        result = YtubeData.analyze_channels(videos, as_of="2025-01-01")
+        done = time.perf_counter()
+    return {
+        "rows": rows,
+        "channels": len(result),
+        "load_seconds": loaded - start,
+        "analyze_seconds": done - loaded
+    }
+
+
+def _summary(values):
+    """ملخص إحصائي مختصر لقائمة قياسات"""
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "max": max(values)
+    }
+
+
+def main():
+    """الدالة الرئيسية لقياسات الأداء"""
+    parser = argparse.ArgumentParser(description="قياسات أداء YtubeData")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="عدد مرات التكرار لكل قياس، الافتراضي: 10")
+    parser.add_argument("--memory-records", type=int, default=100000,
+                        help="عدد السجلات في قياس الذاكرة (0 لتخطيه)، الافتراضي: 100000")
+    parser.add_argument("--parse-runs", type=int, default=50,
+                        help="عدد مرات تحليل كل صفحة محفوظة (0 لتخطيه)، الافتراضي: 50")
+    parser.add_argument("--requests", type=int, default=200,
+                        help="عدد الروابط في كل قياس إنتاجية (0 لتخطيه)، الافتراضي: 200")
+    parser.add_argument("--workers", default="1,4,16",
+                        help="أعداد العمال المقاسة مفصولة بفواصل، الافتراضي: 1,4,16")
+    parser.add_argument("--analyze-rows", type=int, default=1000000,
+                        help="عدد صفوف ملف CSV في قياس الأمر analyze (0 لتخطيه)، الافتراضي: 1000000")
+    parser.add_argument("-o", "--output", help="اسم ملف JSON لحفظ النتائج (الافتراضي: الطباعة على الشاشة)")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "startup": bench_startup(args.runs)
+    }
+    if args.memory_records > 0:
+        results["memory"] = bench_memory(args.memory_records)
+    if args.parse_runs > 0:
+        results["parse"] = bench_parse(args.parse_runs)
+    if args.requests > 0:
+        worker_counts = [int(value) for value in args.workers.split(",") if value.strip()]
+        results["throughput"] = bench_throughput(args.requests, worker_counts)
+    if args.analyze_rows > 0:
+        results["analyze"] = bench_analyze(args.analyze_rows)
+
+    json_data = json.dumps(results, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(json_data)
+    else:
+        print(json_data)
+
+
+if __name__ == "__main__":
+    main()
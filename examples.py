@@ -8,8 +8,9 @@
 """
 
 import json
+import os
 import pandas as pd
-from YtubeData import get_video_metadata, get_channel_metadata
+from YtubeData import get_video_metadata, get_channel_metadata, load_export, analyze_channels
 
 
 def example_get_video_data():
@@ -29,14 +30,14 @@ def example_get_video_data():
         print(f"تاريخ النشر: {metadata['تاريخ النشر']}")
         print(f"عدد المشاهدات: {metadata['عدد المشاهدات']}")
         
-        # حفظ البيانات كملف JSON
+        # حفظ البيانات كملف JSON (النتيجة سجل VideoRecord يُحوَّل إلى قاموس، والتواريخ نصوص)
         with open("video_metadata.json", "w", encoding="utf-8") as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=4)
+            json.dump(metadata.to_dict(), f, ensure_ascii=False, indent=4, default=str)
         print("\nتم حفظ البيانات الكاملة في ملف video_metadata.json")
         
         # استخراج معلومات الدقة إلى DataFrame
         if "الدقة المتاحة" in metadata and metadata["الدقة المتاحة"]:
-            streams_df = pd.DataFrame(metadata["الدقة المتاحة"])
+            streams_df = pd.DataFrame([stream.to_dict() for stream in metadata["الدقة المتاحة"]])
             print("\nمعلومات الدقة المتاحة:")
             print(streams_df)
 
@@ -59,18 +60,14 @@ def example_get_channel_data():
         
         # تحليل آخر الفيديوهات
         if "آخر الفيديوهات" in metadata and metadata["آخر الفيديوهات"]:
-            videos_df = pd.DataFrame(metadata["آخر الفيديوهات"])
+            videos_df = pd.DataFrame([video.to_dict() for video in metadata["آخر الفيديوهات"]])
             print("\nآخر الفيديوهات المنشورة:")
             print(videos_df[["عنوان الفيديو", "تاريخ النشر", "عدد المشاهدات"]])
             
-            # حساب متوسط عدد المشاهدات
-            try:
-                views = [int(v.replace(",", "")) for v in videos_df["عدد المشاهدات"] if v != "غير متوفر"]
-                if views:
-                    avg_views = sum(views) / len(views)
-                    print(f"\nمتوسط عدد المشاهدات للفيديوهات الأخيرة: {avg_views:,.0f}")
-            except (ValueError, TypeError):
-                pass
+            # حساب متوسط عدد المشاهدات (عدد المشاهدات عدد صحيح، والقيم غير المتوفرة None)
+            avg_views = pd.to_numeric(videos_df["عدد المشاهدات"]).mean()
+            if pd.notna(avg_views):
+                print(f"\nمتوسط عدد المشاهدات للفيديوهات الأخيرة: {avg_views:,.0f}")
 
 
 def example_batch_processing():
@@ -96,7 +93,7 @@ def example_batch_processing():
                 "قناة": metadata["اسم القناة"],
                 "تاريخ": metadata["تاريخ النشر"],
                 "مشاهدات": metadata["عدد المشاهدات"],
-                "مدة": metadata["المدة (منسقة)"],
+                "مدة (ثواني)": metadata.get("المدة (ثواني)"),
                 "رابط": url
             }
             all_data.append(basic_data)
@@ -112,6 +109,21 @@ def example_batch_processing():
         print("\nتم حفظ البيانات في ملف videos_summary.csv")
 
 
+def example_analyze_export():
+    """مثال على تحليل ملفات مُصدَّرة سابقاً (مثل ناتج --batch -f ndjson) دون جلب بيانات جديدة"""
+    print("\n=== مثال على تحليل البيانات المصدرة ===\n")
+    
+    # ملف مُصدَّر مسبقاً، مثلاً: python YtubeData.py --batch urls.txt -f ndjson -o videos.ndjson
+    if not os.path.exists("videos.ndjson"):
+        print("لم يُعثر على الملف videos.ndjson، صدّر دفعة بالأمر أعلاه أولاً")
+        return
+    videos = load_export(["videos.ndjson"])
+    
+    # مؤشرات كل قناة محسوبة على الأعمدة دفعة واحدة (مئينات المشاهدات، وتيرة الرفع، توزيع المدد)
+    summary = analyze_channels(videos)
+    print(summary[["القناة", "عدد الفيديوهات", "إجمالي المشاهدات", "المشاهدات p50"]].head(10))
+
+
 if __name__ == "__main__":
     print("أمثلة على استخدام YtubeData برمجياً\n")
     print("ملاحظة: قد تحتاج إلى تعديل روابط الفيديوهات والقنوات في الأمثلة لتجربتها")
@@ -120,6 +132,7 @@ if __name__ == "__main__":
         example_get_video_data()
         example_get_channel_data()
         example_batch_processing()
+        example_analyze_export()
     except Exception as e:
         print(f"\nحدث خطأ: {str(e)}")
     
@@ -9,6 +9,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+from datetime import datetime, timezone
 
 # إضافة المجلد الحالي إلى مسار البحث
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
@@ -18,7 +19,82 @@ from YtubeData import (
     format_duration,
     format_number,
     get_video_metadata,
-    get_channel_metadata
+    get_channel_metadata,
+    read_batch_urls,
+    process_batch,
+    fallback_get_video_info,
+    async_get_video_metadata,
+    async_get_channel_metadata,
+    process_batch_async,
+    get_http_session,
+    configure_http_session,
+    configure_cache,
+    MetadataCache,
+    extract_video_id,
+    clear_memo,
+    parse_video_page,
+    parse_channel_page,
+    extract_initial_json,
+    IncrementalPageScanner,
+    configure_page_streaming,
+    YtubeClient,
+    RetryPolicy,
+    CircuitBreaker,
+    RateLimiter,
+    configure_streams,
+    SyncStateStore,
+    NdjsonWriter,
+    CsvBatchWriter,
+    StageMetrics,
+    MemoStore,
+    YtubeService,
+    make_server,
+    main,
+    ViewSeriesStore,
+    watch_views,
+    load_export,
+    load_view_series,
+    analyze_channels,
+    iter_saved_pages,
+    process_saved_pages,
+    PageArchive,
+    ParquetBatchWriter,
+    VideoRecord,
+    StreamRecord,
+    ChannelRecord,
+    display_video_metadata,
+    _display_value,
+    display_batch_results,
+    _parse_retry_after,
+    _parse_datetime,
+    _json_default
+)
+
+
+# صفحة مشاهدة مختصرة تُستخدم في اختبارات الطرق الاحتياطية
+SAMPLE_WATCH_HTML = (
+    '<html><head><title>فيديو تجريبي - YouTube</title></head><body>'
+    '<script>var ytcfg = {"channelId":"UC_not_owner"};</script><script>'
+    'var ytInitialPlayerResponse = {"videoDetails":{"videoId":"abc123","title":"فيديو تجريبي",'
+    '"lengthSeconds":"3661","keywords":["كلمة1","كلمة2"],"channelId":"UC123",'
+    '"shortDescription":"وصف {تجريبي}; مع أقواس","viewCount":"1500","author":"قناة تجريبية",'
+    '"thumbnail":{"thumbnails":[{"url":"https://example.com/s.jpg"},{"url":"https://example.com/t.jpg"}]}},'
+    '"microformat":{"playerMicroformatRenderer":{"ownerChannelName":"قناة تجريبية",'
+    '"publishDate":"2021-01-01","isFamilySafe":true}}};</script>'
+    '<script>var ytInitialData = {"contents":{}};</script></body></html>'
+)
+
+# صفحة قناة مختصرة تحتوي على ytInitialData
+SAMPLE_CHANNEL_HTML = (
+    '<html><head><meta name="title" content="اسم قديم"></head><body><script>'
+    'var ytInitialData = {"metadata":{"channelMetadataRenderer":{"title":"قناة تجريبية",'
+    '"description":"وصف القناة","externalId":"UC123"}},"contents":{"richGridRenderer":{"contents":['
+    + ",".join(
+        '{"richItemRenderer":{"content":{"videoRenderer":{"videoId":"vid%d","title":{"runs":[{"text":"فيديو %d"}]},'
+        '"publishedTimeText":{"simpleText":"1 day ago"},"viewCountText":{"simpleText":"1,000 views"},'
+        '"lengthText":{"simpleText":"10:00"}}}}}' % (i, i) for i in range(7)
+    )
+    + ']}}};</script></body></html>'
 )
 
 
@@ -54,6 +130,9 @@ class TestFormatFunctions(unittest.TestCase):
 class TestVideoMetadata(unittest.TestCase):
     """اختبارات لدالة استخراج بيانات الفيديو"""
     
+    def setUp(self):
+        clear_memo()
+    
     @patch('YtubeData.YouTube')
     def test_get_video_metadata(self, mock_youtube):
         """اختبار استخراج بيانات الفيديو"""
@@ -68,7 +147,6 @@ class TestVideoMetadata(unittest.TestCase):
         mock_instance.author = "اسم القناة الاختبارية"
         mock_instance.channel_id = "test_channel_id"
         
-        from datetime import datetime
         mock_instance.publish_date = datetime(2021, 1, 1)
         
         mock_instance.length = 3661
@@ -99,9 +177,9 @@ class TestVideoMetadata(unittest.TestCase):
         self.assertEqual(result["معرف الفيديو"], "test_video_id")
         self.assertEqual(result["اسم القناة"], "اسم القناة الاختبارية")
         self.assertEqual(result["المدة (ثواني)"], 3661)
-        self.assertEqual(result["المدة (منسقة)"], "1:01:01")
-        self.assertEqual(result["عدد المشاهدات"], "1,000,000")
-        self.assertEqual(result["مقيد بالعمر"], "لا")
+        self.assertEqual(result["تاريخ النشر"], datetime(2021, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(result["عدد المشاهدات"], 1000000)
+        self.assertFalse(result["مقيد بالعمر"])
         
         # التحقق من معلومات الدقة
         self.assertIn("الدقة المتاحة", result)
@@ -129,7 +207,6 @@ class TestChannelMetadata(unittest.TestCase):
         mock_video1 = MagicMock()
         mock_video1.title = "عنوان الفيديو الاختباري 1"
         mock_video1.video_id = "test_video_id_1"
-        from datetime import datetime
         mock_video1.publish_date = datetime(2021, 1, 1)
         mock_video1.views = 1000000
         mock_video1.length = 3661
@@ -159,5 +236,1418 @@ class TestChannelMetadata(unittest.TestCase):
         self.assertEqual(result["آخر الفيديوهات"][1]["عنوان الفيديو"], "عنوان الفيديو الاختباري 2")
 
 
+class TestBatchProcessing(unittest.TestCase):
+    """اختبارات لوضع المعالجة الدفعية"""
+    
+    def test_read_batch_urls(self):
+        """اختبار قراءة الروابط مع تجاهل الأسطر الفارغة والتعليقات"""
+        import tempfile
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("https://youtu.be/a\n\n# تعليق\n  https://youtu.be/b  \n")
+            path = f.name
+        try:
+            self.assertEqual(list(read_batch_urls(path)), ["https://youtu.be/a", "https://youtu.be/b"])
+        finally:
+            os.remove(path)
+    
+    @patch('YtubeData.get_video_metadata')
+    def test_process_batch_ordered_with_failure(self, mock_get):
+        """اختبار الحفاظ على ترتيب النتائج وعدم توقف الدفعة عند فشل رابط"""
+        def fake_get(url):
+            if url.endswith("bad"):
+                raise RuntimeError("فشل")
+            return {"معرف الفيديو": url[-1]}
+        mock_get.side_effect = fake_get
+        
+        urls = ["https://youtu.be/%d" % i for i in range(10)] + ["https://youtu.be/bad"]
+        results = list(process_batch(urls, "video", workers=3))
+        
+        self.assertEqual([url for url, _ in results], urls)
+        self.assertIsNone(results[-1][1])
+        self.assertEqual(results[0][1]["معرف الفيديو"], "0")
+    
+    @patch('YtubeData.get_channel_metadata')
+    def test_process_batch_unordered(self, mock_get):
+        """اختبار إخراج النتائج بترتيب الاكتمال"""
+        mock_get.side_effect = lambda url: {"رابط القناة": url}
+        urls = ["https://www.youtube.com/channel/%d" % i for i in range(20)]
+        results = list(process_batch(urls, "channel", workers=4, ordered=False))
+        self.assertEqual(sorted(url for url, _ in results), sorted(urls))
+
+
+class TestAsyncEngine(unittest.TestCase):
+    """اختبارات للمحرك غير المتزامن"""
+    
+    @patch.object(YtubeClient, 'http_get')
+    @patch('YtubeData._async_fetch_text')
+    def test_async_matches_sync(self, mock_async_fetch, mock_get):
+        """اختبار أن المحرك غير المتزامن يُرجع نفس بيانات الطريقة المتزامنة"""
+        import asyncio
+        
+        async def fake_fetch(session, url, semaphore=None, limiter=None):
+            return SAMPLE_WATCH_HTML
+        mock_async_fetch.side_effect = fake_fetch
+        mock_get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        
+        result = asyncio.run(async_get_video_metadata("https://youtu.be/abc123", session=object()))
+        self.assertEqual(result, fallback_get_video_info("abc123"))
+        self.assertEqual(result["عنوان الفيديو"], "فيديو تجريبي")
+        self.assertEqual(result["عدد المشاهدات"], 1500)
+    
+    @patch('YtubeData._async_fetch_text')
+    def test_process_batch_async(self, mock_async_fetch):
+        """اختبار المعالجة الدفعية غير المتزامنة مع الحفاظ على الترتيب"""
+        async def fake_fetch(session, url, semaphore=None, limiter=None):
+            return None if url.endswith("bad") else SAMPLE_WATCH_HTML
+        mock_async_fetch.side_effect = fake_fetch
+        
+        urls = ["https://youtu.be/v%d" % i for i in range(25)] + ["https://youtu.be/bad"]
+        results = list(process_batch_async(urls, "video", concurrency=5))
+        
+        self.assertEqual([url for url, _ in results], urls)
+        self.assertEqual(results[3][1]["معرف الفيديو"], "v3")
+        self.assertIsNone(results[-1][1])
+    
+    @patch('YtubeData._async_fetch_text')
+    def test_async_channel_matches_sync_fallback(self, mock_async_fetch):
+        """اختبار أن المحرك غير المتزامن يحلل تبويب الفيديوهات ويحترم channel_limit كالطريقة المتزامنة"""
+        import asyncio
+        fetched = []
+        
+        async def fake_fetch(session, url, semaphore=None, limiter=None):
+            fetched.append(url)
+            return SAMPLE_CHANNEL_HTML
+        mock_async_fetch.side_effect = fake_fetch
+        client = YtubeClient(memo=False, channel_limit=3)
+        client._session = MagicMock()
+        client._session.get.return_value = MagicMock(status_code=200, text=SAMPLE_CHANNEL_HTML)
+        
+        result = asyncio.run(async_get_channel_metadata("https://www.youtube.com/@test", session=object(), client=client))
+        self.assertEqual(fetched, ["https://www.youtube.com/@test/videos"])
+        self.assertEqual(result, client.fallback_channel_info(None, "https://www.youtube.com/@test"))
+        self.assertEqual(len(result["آخر الفيديوهات"]), 3)
+    
+    @patch('YtubeData._async_fetch_text')
+    def test_async_uses_client_cache(self, mock_async_fetch):
+        """اختبار مرور المحرك غير المتزامن بالذاكرة المؤقتة للعميل وبعنوانه البديل"""
+        import asyncio
+        import tempfile
+        import shutil
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        fetched = []
+        
+        async def fake_fetch(session, url, semaphore=None, limiter=None):
+            fetched.append(url)
+            return SAMPLE_WATCH_HTML
+        mock_async_fetch.side_effect = fake_fetch
+        
+        for _ in range(2):
+            client = YtubeClient(memo=False, cache=MetadataCache(cache_dir), base_url="http://127.0.0.1:9")
+            result = asyncio.run(async_get_video_metadata("https://youtu.be/abc123", session=object(), client=client))
+            client.close()
+            self.assertEqual(result["عنوان الفيديو"], "فيديو تجريبي")
+        self.assertEqual(fetched, ["http://127.0.0.1:9/watch?v=abc123"])
+    
+    def test_cli_rejects_streams_with_async(self):
+        """اختبار رفض --streams full مع المحرك async بدلاً من تجاهله"""
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            main(["-b", "urls.txt", "--engine", "async", "--streams", "full"])
+
+    @patch('YtubeData.display_batch_results')
+    @patch('YtubeData.read_batch_urls', return_value=[])
+    @patch('YtubeData.process_batch_async')
+    def test_cli_async_concurrency(self, mock_process, mock_read, mock_display):
+        """اختبار استخدام DEFAULT_CONCURRENCY افتراضياً مع المحرك async وقبول --concurrency"""
+        from YtubeData import DEFAULT_CONCURRENCY
+        main(["-b", "urls.txt", "--engine", "async", "--no-cache"])
+        self.assertEqual(mock_process.call_args[0][2], DEFAULT_CONCURRENCY)
+        main(["-b", "urls.txt", "--engine", "async", "--no-cache", "--concurrency", "250"])
+        self.assertEqual(mock_process.call_args[0][2], 250)
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            main(["-b", "urls.txt", "--concurrency", "250"])
+
+    def test_async_session_connection_limit(self):
+        """اختبار اتساع مجمع اتصالات الجلسة المؤقتة لعدد الطلبات المتزامنة المطلوب"""
+        import asyncio
+        from YtubeData import _async_session_scope
+
+        async def connection_limit():
+            async with _async_session_scope(concurrency=250) as session:
+                return session.connector.limit
+        self.assertEqual(asyncio.run(connection_limit()), 250)
+
+    def test_async_fetch_uses_client_rate_limiter(self):
+        """اختبار مرور طلبات المحرك غير المتزامن بمحدد معدل العميل"""
+        import asyncio
+
+        class FakeResponse:
+            status = 200
+            headers = {}
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def text(self):
+                return SAMPLE_WATCH_HTML
+
+        session = MagicMock()
+        session.get.return_value = FakeResponse()
+        limiter = RateLimiter(rate=1000)
+        client = YtubeClient(memo=False, rate_limiter=limiter)
+        with patch.object(limiter, 'try_acquire', wraps=limiter.try_acquire) as mock_acquire:
+            result = asyncio.run(async_get_video_metadata("https://youtu.be/abc123", session=session, client=client))
+        self.assertEqual(result["معرف الفيديو"], "abc123")
+        mock_acquire.assert_called_once()
+
+
+class TestHttpSession(unittest.TestCase):
+    """اختبارات لجلسة HTTP المشتركة"""
+    
+    def test_shared_session(self):
+        """اختبار إعادة استخدام نفس الجلسة وحجم مجمع الاتصالات"""
+        session = configure_http_session(pool_size=32)
+        self.assertIs(get_http_session(), session)
+        self.assertIs(get_http_session(), session)
+        adapter = session.get_adapter("https://www.youtube.com/")
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertIn("gzip", session.headers["Accept-Encoding"])
+    
+    def test_fallback_uses_shared_session(self):
+        """اختبار أن الطريقة الاحتياطية تمر عبر جلسة العميل المشتركة"""
+        client = YtubeClient()
+        client._session = MagicMock()
+        client._session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        result = client.fallback_video_info("abc123")
+        self.assertEqual(result["اسم القناة"], "قناة تجريبية")
+        client._session.get.assert_called_once()
+
+
+class TestMetadataCache(unittest.TestCase):
+    """اختبارات لذاكرة التخزين المؤقت على القرص"""
+    
+    def setUp(self):
+        import tempfile
+        clear_memo()
+        self.cache_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        configure_cache(enabled=False)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_ttl_and_lru(self):
+        """اختبار انتهاء الصلاحية وحذف الأقدم استخداماً"""
+        cache = MetadataCache(self.cache_dir, ttl={"video": 3600, "channel": -1}, max_entries=2)
+        cache.set("video", "a", {"معرف الفيديو": "a"})
+        cache.set("channel", "c", {"معرف القناة": "c"})
+        self.assertEqual(cache.get("video", "a"), {"معرف الفيديو": "a"})
+        self.assertIsNone(cache.get("channel", "c"))
+        
+        cache.set("video", "b", {"معرف الفيديو": "b"})
+        cache.get("video", "a")
+        cache.set("video", "d", {"معرف الفيديو": "d"})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("video", "b"))
+        self.assertIsNotNone(cache.get("video", "a"))
+        cache.close()
+    
+    def test_get_does_not_write(self):
+        """اختبار أن القراءة لا تكتب في قاعدة البيانات وأن أوقات الاستخدام تُحفظ عند الإغلاق"""
+        cache = MetadataCache(self.cache_dir)
+        cache.set("video", "a", {"معرف الفيديو": "a"})
+        changes = cache._conn.total_changes
+        for _ in range(5):
+            cache.get("video", "a")
+        self.assertEqual(cache._conn.total_changes, changes)
+        cache.close()
+        
+        import sqlite3
+        conn = sqlite3.connect(cache.path)
+        created, accessed = conn.execute("SELECT created, accessed FROM metadata").fetchone()
+        conn.close()
+        self.assertGreater(accessed, created)
+
+    def test_unencodable_metadata_is_not_lost(self):
+        """اختبار إرجاع البيانات المستخرجة حتى إذا تعذر ترميزها في الذاكرة المؤقتة"""
+        client = YtubeClient(cache=MetadataCache(self.cache_dir), memo=False)
+        self.addCleanup(client.close)
+        metadata = {"معرف الفيديو": "abc123", "قيمة غريبة": object()}
+        result = client._load_metadata("video", "abc123", lambda url: metadata, "https://youtu.be/abc123")
+        self.assertIs(result, metadata)
+        self.assertEqual(len(client.cache), 0)
+
+    @patch('YtubeData.YtubeClient.http_get')
+    @patch('YtubeData.YouTube')
+    def test_cli_cache_hit_saves_access_time(self, mock_youtube, mock_get):
+        """اختبار حفظ وقت الاستخدام بعد قراءة الذاكرة المؤقتة من سطر الأوامر"""
+        import sqlite3
+        mock_youtube.side_effect = RuntimeError("pytube معطل")
+        mock_get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        output = os.path.join(self.cache_dir, "video.json")
+        for _ in range(2):
+            main(["https://youtu.be/abc123", "--cache-dir", self.cache_dir, "--retries", "1",
+                  "-f", "json", "-o", output])
+        mock_get.assert_called_once()
+
+        conn = sqlite3.connect(os.path.join(self.cache_dir, "metadata.sqlite3"))
+        created, accessed = conn.execute("SELECT created, accessed FROM metadata").fetchone()
+        conn.close()
+        self.assertGreater(accessed, created)
+
+    def test_eviction_in_batches(self):
+        """اختبار حذف هامش من المدخلات دفعة واحدة عند تجاوز الحد الأقصى"""
+        cache = MetadataCache(self.cache_dir, max_entries=200)
+        for i in range(201):
+            cache.set("video", str(i), {"معرف الفيديو": str(i)})
+        self.assertEqual(len(cache), 198)
+        self.assertEqual(cache._count, 198)
+        self.assertIsNone(cache.get("video", "0"))
+        self.assertIsNotNone(cache.get("video", "200"))
+        cache.close()
+    
+    def test_degraded_entries_expire_early(self):
+        """اختبار انتهاء صلاحية نتائج الطريقة الاحتياطية بعد degraded_ttl"""
+        from YtubeData import FALLBACK_NOTE
+        cache = MetadataCache(self.cache_dir, degraded_ttl=-1)
+        cache.set("video", "full", {"معرف الفيديو": "full"})
+        cache.set("video", "degraded", VideoRecord(video_id="degraded", note=FALLBACK_NOTE))
+        self.assertIsNotNone(cache.get("video", "full"))
+        self.assertIsNone(cache.get("video", "degraded"))
+        self.assertEqual(len(cache), 1)
+        cache.close()
+    
+    @patch.object(YtubeClient, '_extract_video')
+    def test_get_video_metadata_uses_cache(self, mock_extract):
+        """اختبار أن الطلب المتكرر لنفس الفيديو يُخدم من الذاكرة المؤقتة وأن --refresh يتجاوزها"""
+        mock_extract.return_value = {"معرف الفيديو": "abc123"}
+        configure_cache(self.cache_dir)
+        
+        get_video_metadata("https://www.youtube.com/watch?v=abc123")
+        result = get_video_metadata("https://youtu.be/abc123")
+        self.assertEqual(result, {"معرف الفيديو": "abc123"})
+        self.assertEqual(mock_extract.call_count, 1)
+        
+        configure_cache(self.cache_dir, refresh=True)
+        get_video_metadata("https://youtu.be/abc123")
+        self.assertEqual(mock_extract.call_count, 2)
+
+
+class TestMemoization(unittest.TestCase):
+    """اختبارات لذاكرة العملية ودمج الطلبات المتزامنة"""
+    
+    def setUp(self):
+        clear_memo()
+    
+    def test_extract_video_id_spellings(self):
+        """اختبار توحيد الصيغ المختلفة لرابط الفيديو"""
+        urls = [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtu.be/dQw4w9WgXcQ?t=30",
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=30",
+            "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+            "youtube.com/embed/dQw4w9WgXcQ",
+        ]
+        for url in urls:
+            self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ", url)
+        self.assertIsNone(extract_video_id("https://www.youtube.com/channel/UC123"))
+    
+    @patch.object(YtubeClient, '_extract_video')
+    def test_single_flight(self, mock_extract):
+        """اختبار أن الطلبات المتزامنة لنفس الفيديو بصيغ مختلفة تؤدي إلى جلب واحد"""
+        import threading
+        import time
+        
+        def slow_extract(url):
+            time.sleep(0.2)
+            return {"معرف الفيديو": "dQw4w9WgXcQ"}
+        mock_extract.side_effect = slow_extract
+        
+        urls = ["https://youtu.be/dQw4w9WgXcQ", "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=5"] * 4
+        results = []
+        threads = [threading.Thread(target=lambda u=u: results.append(get_video_metadata(u))) for u in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(mock_extract.call_count, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r == {"معرف الفيديو": "dQw4w9WgXcQ"} for r in results))
+        
+        # الطلب اللاحق يُخدم من ذاكرة العملية
+        get_video_metadata("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertEqual(mock_extract.call_count, 1)
+
+
+class TestPageParser(unittest.TestCase):
+    """اختبارات لمحلل صفحات يوتيوب"""
+    
+    def test_extract_initial_json(self):
+        """اختبار العثور على كائنات JSON المضمنة وفك ترميزها"""
+        blobs = extract_initial_json(SAMPLE_WATCH_HTML)
+        self.assertEqual(set(blobs), {"ytInitialPlayerResponse", "ytInitialData"})
+        self.assertEqual(blobs["ytInitialPlayerResponse"]["videoDetails"]["shortDescription"], "وصف {تجريبي}; مع أقواس")
+    
+    def test_parse_video_page(self):
+        """اختبار استخراج جميع الحقول من ytInitialPlayerResponse"""
+        result = parse_video_page(SAMPLE_WATCH_HTML, "abc123")
+        self.assertEqual(result["عنوان الفيديو"], "فيديو تجريبي")
+        self.assertEqual(result["معرف القناة"], "UC123")
+        self.assertEqual(result["المدة (ثواني)"], 3661)
+        self.assertEqual(result["عدد المشاهدات"], 1500)
+        self.assertEqual(result["الكلمات المفتاحية"], ["كلمة1", "كلمة2"])
+        self.assertEqual(result["وصف الفيديو"], "وصف {تجريبي}; مع أقواس")
+        self.assertEqual(result["صورة الغلاف"], "https://example.com/t.jpg")
+        self.assertFalse(result["مقيد بالعمر"])
+    
+    def test_parse_video_page_without_json(self):
+        """اختبار الرجوع إلى الأنماط النصية عند غياب ytInitialPlayerResponse"""
+        html = '<title>قديم - YouTube</title>"ownerChannelName":"قناة","viewCount":"42"'
+        result = parse_video_page(html, "old")
+        self.assertEqual(result["عنوان الفيديو"], "قديم")
+        self.assertEqual(result["عدد المشاهدات"], 42)
+    
+    def test_parse_channel_page(self):
+        """اختبار استخراج بيانات القناة وآخر الفيديوهات من ytInitialData"""
+        result = parse_channel_page(SAMPLE_CHANNEL_HTML, None, "https://www.youtube.com/@test")
+        self.assertEqual(result["اسم القناة"], "قناة تجريبية")
+        self.assertEqual(result["معرف القناة"], "UC123")
+        self.assertEqual(len(result["آخر الفيديوهات"]), 5)
+        self.assertEqual(result["آخر الفيديوهات"][0]["معرف الفيديو"], "vid0")
+        self.assertEqual(result["آخر الفيديوهات"][0]["المدة (ثواني)"], 600)
+        self.assertEqual(result["آخر الفيديوهات"][0]["عدد المشاهدات"], 1000)
+        self.assertIsInstance(result["آخر الفيديوهات"][0]["تاريخ النشر"], datetime)
+
+
+class TestPageStreaming(unittest.TestCase):
+    """اختبارات للتنزيل المتدفق للصفحات"""
+    
+    def tearDown(self):
+        configure_page_streaming(False)
+    
+    def test_scanner_across_chunks(self):
+        """اختبار اكتمال الكائن عبر أجزاء مقسومة حتى داخل الحروف متعددة البايتات"""
+        data = SAMPLE_WATCH_HTML.encode("utf-8")
+        scanner = IncrementalPageScanner(["ytInitialPlayerResponse"])
+        complete = False
+        for i in range(0, len(data), 7):
+            complete = scanner.feed(data[i:i + 7])
+            if complete:
+                break
+        self.assertTrue(complete)
+        self.assertLess(len(scanner.text), len(SAMPLE_WATCH_HTML))
+        self.assertEqual(scanner.blobs["ytInitialPlayerResponse"]["videoDetails"]["title"], "فيديو تجريبي")
+    
+    @patch.object(YtubeClient, 'http_get')
+    def test_fallback_stops_early(self, mock_get):
+        """اختبار إغلاق الاتصال قبل تنزيل باقي الصفحة"""
+        data = SAMPLE_WATCH_HTML.encode("utf-8") + b"<div>" + b"x" * 100000 + b"</div>"
+        chunk_size = 256
+        consumed = []
+        
+        def iter_content(size):
+            for i in range(0, len(data), chunk_size):
+                consumed.append(i)
+                yield data[i:i + chunk_size]
+        
+        response = MagicMock(status_code=200)
+        response.iter_content.side_effect = iter_content
+        mock_get.return_value = response
+        configure_page_streaming(True)
+        
+        result = fallback_get_video_info("abc123")
+        self.assertEqual(result, parse_video_page(SAMPLE_WATCH_HTML, "abc123"))
+        self.assertLess(len(consumed) * chunk_size, len(data) // 10)
+        response.close.assert_called_once()
+
+
+class TestLazyImports(unittest.TestCase):
+    """اختبارات لتأجيل استيراد المكتبات الثقيلة"""
+    
+    def test_import_is_lightweight(self):
+        """اختبار أن استيراد الوحدة لا يستورد المكتبات الثقيلة"""
+        import subprocess
+        code = (
+            "import sys, YtubeData; "
+            "print(','.join(m for m in ('pandas', 'pytube', 'requests', 'rich', 'aiohttp', 'asyncio', "
+            "'email.utils', 'tarfile', 'concurrent.futures.process') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "")
+    
+    def test_pytube_names_on_demand(self):
+        """اختبار تعيين أسماء pytube في الوحدة عند أول استخدام دون استبدال الأسماء المعيّنة مسبقاً"""
+        import YtubeData
+        from pytube import YouTube
+        from pytube.exceptions import VideoUnavailable
+        with patch('YtubeData.Channel') as mock_channel:
+            YtubeData._load_pytube()
+            self.assertIs(YtubeData.Channel, mock_channel)
+        self.assertIs(YtubeData.YouTube, YouTube)
+        self.assertIs(YtubeData.VideoUnavailable, VideoUnavailable)
+
+
+class TestYtubeClient(unittest.TestCase):
+    """اختبارات للعميل القابل لإعادة الاستخدام"""
+    
+    @patch('YtubeData.YouTube')
+    def test_client_reuses_state(self, mock_youtube):
+        """اختبار أن العميل يحتفظ بجلسة واحدة وذاكرة عملية بين الاستدعاءات"""
+        mock_youtube.side_effect = RuntimeError("pytube معطل")
+        with YtubeClient(retry_policy=RetryPolicy(max_attempts=1)) as client:
+            client._session = MagicMock()
+            client._session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+            session = client.session
+            
+            results = list(client.videos(["https://youtu.be/abc123", "https://www.youtube.com/watch?v=abc123"], workers=2))
+            
+            self.assertIs(client.session, session)
+            self.assertEqual([r[1]["عنوان الفيديو"] for r in results], ["فيديو تجريبي"] * 2)
+            self.assertEqual(session.get.call_count, 1)
+    
+    def test_innertube_created_once(self):
+        """اختبار إنشاء عميل InnerTube مرة واحدة فقط"""
+        client = YtubeClient()
+        self.assertIs(client.innertube, client.innertube)
+    
+    def test_base_url_override(self):
+        """اختبار تنزيل الصفحات من base_url مع بقاء روابط يوتيوب في البيانات"""
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        with YtubeClient(base_url="http://127.0.0.1:8000/") as client:
+            client._session = session
+            metadata = client.fallback_video_info("abc123")
+        self.assertEqual(session.get.call_args[0][0], "http://127.0.0.1:8000/watch?v=abc123")
+        self.assertEqual(metadata["رابط القناة"], "https://www.youtube.com/channel/UC123")
+
+
+class TestRetryAndCircuitBreaker(unittest.TestCase):
+    """اختبارات لسياسة إعادة المحاولة وقاطع الدائرة"""
+    
+    def test_exponential_backoff(self):
+        """اختبار تضاعف التأخير حتى الحد الأقصى وبقاء العشوائية ضمنه"""
+        policy = RetryPolicy(max_attempts=6, base_delay=0.5, max_delay=3, jitter=False)
+        self.assertEqual([policy.delay(a) for a in range(1, 6)], [0.5, 1.0, 2.0, 3, 3])
+        jittered = RetryPolicy(base_delay=1, max_delay=4)
+        self.assertTrue(all(0 <= jittered.delay(3) <= 4 for _ in range(100)))
+    
+    def test_call_retries_then_succeeds(self):
+        """اختبار إعادة المحاولة عند الفشل وعدم إعادتها للاستثناءات غير القابلة لذلك"""
+        sleeps = []
+        policy = RetryPolicy(max_attempts=3, jitter=False, sleep=sleeps.append)
+        fn = MagicMock(side_effect=[RuntimeError("1"), RuntimeError("2"), "تم"])
+        self.assertEqual(policy.call(fn), "تم")
+        self.assertEqual(sleeps, [0.5, 1.0])
+        
+        fn = MagicMock(side_effect=KeyError("x"))
+        with self.assertRaises(KeyError):
+            policy.call(fn, non_retryable=(KeyError,))
+        self.assertEqual(fn.call_count, 1)
+    
+    def test_circuit_breaker_states(self):
+        """اختبار فتح القاطع بعد الإخفاقات ثم السماح بطلب تجريبي بعد التهدئة"""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        
+        now[0] = 11
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        
+        now[0] = 22
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+    
+    @patch('YtubeData.YouTube')
+    def test_open_breaker_skips_pytube(self, mock_youtube):
+        """اختبار الانتقال مباشرة إلى الطريقة الاحتياطية بعد فتح القاطع"""
+        mock_youtube.side_effect = RuntimeError("pytube معطل")
+        client = YtubeClient(retry_policy=RetryPolicy(max_attempts=1), breaker_threshold=2, memo=False)
+        client._session = MagicMock()
+        client._session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        
+        for i in range(5):
+            self.assertIsNotNone(client.video("https://youtu.be/v%d" % i))
+        self.assertEqual(mock_youtube.call_count, 2)
+        self.assertEqual(client._session.get.call_count, 5)
+
+    @patch('YtubeData.YouTube')
+    def test_unavailable_probe_closes_breaker(self, mock_youtube):
+        """اختبار إغلاق القاطع عندما يصطدم الطلب التجريبي بفيديو غير متاح"""
+        from pytube.exceptions import VideoUnavailable
+        mock_youtube.side_effect = [RuntimeError("pytube معطل"), VideoUnavailable("v1"), RuntimeError("pytube معطل")]
+        client = YtubeClient(retry_policy=RetryPolicy(max_attempts=1), breaker_threshold=1,
+                             breaker_cooldown=0, memo=False)
+        client._session = MagicMock()
+        client._session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+
+        for i in range(2):
+            self.assertIsNotNone(client.video("https://youtu.be/v%d" % i))
+        self.assertEqual(client.breakers["video"].state, CircuitBreaker.CLOSED)
+        self.assertIsNotNone(client.video("https://youtu.be/v2"))
+        self.assertEqual(mock_youtube.call_count, 3)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """اختبارات لمحدد المعدل بخوارزمية دلو الرموز"""
+    
+    @patch('YtubeData.time.time')
+    def test_burst_then_refill(self, mock_time):
+        """اختبار السماح بدفعة بحجم burst ثم انتظار تجدد الرموز بالمعدل المحدد"""
+        mock_time.return_value = 100.0
+        limiter = RateLimiter(rate=2, burst=3)
+        self.assertEqual([limiter.try_acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(limiter.try_acquire(), 0.5)
+        mock_time.return_value = 100.5
+        self.assertEqual(limiter.try_acquire(), 0.0)
+    
+    @patch('YtubeData.time.time')
+    def test_penalize_honours_retry_after(self, mock_time):
+        """اختبار إيقاف الإرسال طوال مدة Retry-After وخفض المعدل ثم استعادته تدريجياً"""
+        mock_time.return_value = 0.0
+        limiter = RateLimiter(rate=4, recovery=20)
+        limiter.penalize(retry_after=5)
+        self.assertAlmostEqual(limiter.try_acquire(), 5.0)
+        mock_time.return_value = 5.0
+        self.assertEqual(limiter.try_acquire(), 0.0)
+        self.assertLess(limiter.rate, 4)
+        mock_time.return_value = 30.0
+        self.assertEqual(limiter.rate, 4)
+        self.assertEqual(_parse_retry_after("7"), 7.0)
+        self.assertIsNone(_parse_retry_after("غير صالح"))
+    
+    def test_shared_state_file(self):
+        """اختبار تقاسم الرموز بين محددين يستخدمان ملف الحالة نفسه"""
+        import tempfile
+        state_dir = tempfile.mkdtemp()
+        state_file = os.path.join(state_dir, "rate.json")
+        first = RateLimiter(rate=0.01, burst=2, state_file=state_file)
+        second = RateLimiter(rate=0.01, burst=2, state_file=state_file)
+        self.assertEqual(first.try_acquire(), 0.0)
+        self.assertEqual(second.try_acquire(), 0.0)
+        self.assertGreater(first.try_acquire(), 0)
+        import shutil
+        shutil.rmtree(state_dir, ignore_errors=True)
+    
+    def test_http_get_retries_after_429(self):
+        """اختبار إعادة الطلب بعد استجابة 429 مع احترام Retry-After"""
+        limiter = RateLimiter(rate=1000)
+        client = YtubeClient(rate_limiter=limiter)
+        client._session = MagicMock()
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        client._session.get.side_effect = [throttled, MagicMock(status_code=200)]
+        
+        response = client.http_get("https://www.youtube.com/watch?v=abc")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client._session.get.call_count, 2)
+        self.assertLess(limiter.rate, 1000)
+
+
+class TestStreamModes(unittest.TestCase):
+    """اختبارات لأوضاع استخراج معلومات الدقة المتاحة"""
+    
+    def setUp(self):
+        """إنشاء كائن YouTube وهمي بدقتين"""
+        self.yt = MagicMock()
+        self.yt.publish_date = None
+        self.yt.description = ""
+        streams = []
+        for itag, resolution in ((18, "360p"), (22, "720p")):
+            stream = MagicMock(itag=itag, resolution=resolution, mime_type="video/mp4", fps=30)
+            stream.filesize = 2097152
+            streams.append(stream)
+        self.yt.streams.filter.return_value = streams
+        self.yt.streaming_data = {"formats": [
+            {"itag": 18, "qualityLabel": "360p", "mimeType": 'video/mp4; codecs="avc1"', "fps": 30, "contentLength": "1048576"},
+            {"itag": 22, "qualityLabel": "720p", "mimeType": 'video/mp4; codecs="avc1"', "fps": 30}
+        ]}
+    
+    def tearDown(self):
+        configure_streams("full")
+    
+    def test_none_skips_streams(self):
+        """اختبار عدم الوصول إلى الدقة المتاحة في الوضع none"""
+        metadata = YtubeClient(streams="none")._pytube_video_metadata(self.yt)
+        self.assertNotIn("الدقة المتاحة", metadata)
+        self.yt.streams.filter.assert_not_called()
+    
+    def test_basic_uses_player_response(self):
+        """اختبار أخذ الدقة من استجابة المشغل دون حساب الحجم بطلبات إضافية"""
+        metadata = YtubeClient(streams="basic")._pytube_video_metadata(self.yt)
+        self.yt.streams.filter.assert_not_called()
+        self.assertEqual([s["الحجم (MB)"] for s in metadata["الدقة المتاحة"]], [1.0, None])
+        self.assertEqual(metadata["الدقة المتاحة"][0]["نوع الملف"], "video/mp4")
+    
+    def test_full_resolves_sizes(self):
+        """اختبار حساب حجم كل دقة مع الحفاظ على ترتيبها"""
+        metadata = YtubeClient(streams="full")._pytube_video_metadata(self.yt)
+        self.assertEqual([s["itag"] for s in metadata["الدقة المتاحة"]], [18, 22])
+        self.assertEqual([s["الحجم (MB)"] for s in metadata["الدقة المتاحة"]], [2.0, 2.0])
+    
+    def test_invalid_mode(self):
+        """اختبار رفض وضع غير معروف"""
+        with self.assertRaises(ValueError):
+            configure_streams("all")
+
+
+class TestChannelPaging(unittest.TestCase):
+    """اختبارات لاستخراج فيديوهات القناة مع متابعة الصفحات التالية"""
+    
+    def setUp(self):
+        """صفحة قناة تنتهي برمز متابعة، وصفحة متابعة تحتوي على فيديوهين إضافيين"""
+        self.first_page = SAMPLE_CHANNEL_HTML.replace(
+            ']}}};</script>',
+            ',{"continuationItemRenderer":{"continuationEndpoint":{"continuationCommand":{"token":"TOKEN1"}}}}]}}};</script>'
+        )
+        self.next_page = {"onResponseReceivedActions": [{"appendContinuationItemsAction": {"continuationItems": [
+            {"richItemRenderer": {"content": {"videoRenderer": {"videoId": "vid%d" % i}}}} for i in (7, 8)
+        ]}}]}
+        self.client = YtubeClient(memo=False)
+        self.client._session = MagicMock()
+        self.client._session.get.return_value = MagicMock(status_code=200, text=self.first_page)
+    
+    def test_iter_follows_continuations(self):
+        """اختبار إنتاج الفيديوهات من جميع الصفحات وجلب صفحة المتابعة عند الحاجة فقط"""
+        with patch.object(YtubeClient, 'browse_continuation', return_value=self.next_page) as mock_browse:
+            videos = self.client.iter_channel_videos("https://www.youtube.com/@test")
+            self.assertEqual([next(videos)["معرف الفيديو"] for _ in range(7)], ["vid%d" % i for i in range(7)])
+            mock_browse.assert_not_called()
+            self.assertEqual([v["معرف الفيديو"] for v in videos], ["vid7", "vid8"])
+            mock_browse.assert_called_once_with("TOKEN1")
+        self.assertEqual(self.client._session.get.call_args[0][0], "https://www.youtube.com/@test/videos")
+    
+    def test_limit(self):
+        """اختبار التوقف عند الحد المطلوب دون جلب صفحات إضافية"""
+        with patch.object(YtubeClient, 'browse_continuation', return_value=self.next_page) as mock_browse:
+            videos = list(self.client.iter_channel_videos("https://www.youtube.com/@test", limit=3))
+        self.assertEqual(len(videos), 3)
+        mock_browse.assert_not_called()
+    
+    @patch('YtubeData.Channel')
+    def test_fallback_channel_limit(self, mock_channel):
+        """اختبار تطبيق channel_limit على الطريقة الاحتياطية للقناة"""
+        mock_channel.side_effect = RuntimeError("pytube معطل")
+        self.client.retry_policy = RetryPolicy(max_attempts=1)
+        self.client.channel_limit = None
+        with patch.object(YtubeClient, 'browse_continuation', return_value=self.next_page):
+            result = self.client.channel("https://www.youtube.com/@test")
+        self.assertEqual(len(result["آخر الفيديوهات"]), 9)
+    
+    @patch('YtubeData.Channel')
+    def test_sync_stops_at_high_water_mark(self, mock_channel):
+        """اختبار استخراج الفيديوهات الجديدة فقط في وضع المزامنة وتحديث علامة أحدث فيديو"""
+        import tempfile
+        import shutil
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, True)
+        mock_channel.side_effect = RuntimeError("pytube معطل")
+        self.client.retry_policy = RetryPolicy(max_attempts=1)
+        self.client.channel_limit = None
+        self.client.sync_state = SyncStateStore(os.path.join(state_dir, "sync.sqlite3"))
+        self.client.sync_state.set("https://www.youtube.com/@test", "vid3", "2021-01-01T00:00:00")
+        
+        with patch.object(YtubeClient, 'browse_continuation', return_value=self.next_page) as mock_browse:
+            result = self.client.channel("https://www.youtube.com/@test")
+            self.assertEqual([v["معرف الفيديو"] for v in result["آخر الفيديوهات"]], ["vid0", "vid1", "vid2"])
+            mock_browse.assert_not_called()
+        video_id, published = self.client.sync_state.get("https://www.youtube.com/@test")
+        self.assertEqual(video_id, "vid0")
+        self.assertIsNotNone(datetime.fromisoformat(published))
+        self.client.close()
+    
+    def _sync_client(self, mark_video, mark_published):
+        """عميل مزامنة بعلامة سابقة محددة، مع تعطيل pytube"""
+        import tempfile
+        import shutil
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, True)
+        patcher = patch('YtubeData.Channel', side_effect=RuntimeError("pytube معطل"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.retry_policy = RetryPolicy(max_attempts=1)
+        self.client.sync_state = SyncStateStore(os.path.join(state_dir, "sync.sqlite3"))
+        self.client.sync_state.set("https://www.youtube.com/@test", mark_video, mark_published)
+        self.addCleanup(self.client.close)
+        return self.client
+    
+    def test_sync_stops_at_published_time(self):
+        """اختبار التوقف عند فيديو أقدم من العلامة إذا حُذف الفيديو المسجل"""
+        from datetime import timedelta
+        ages = ["1 hour ago", "2 days ago", "5 days ago", "6 days ago"]
+        page = SAMPLE_CHANNEL_HTML
+        for i, age in enumerate(ages):
+            page = page.replace('"1 day ago"}', '"%s"}' % age, 1)
+        self.client._session.get.return_value = MagicMock(status_code=200, text=page)
+        client = self._sync_client("deleted", (datetime.now(timezone.utc) - timedelta(days=3)).isoformat())
+        client.channel_limit = None
+        
+        with patch.object(YtubeClient, 'browse_continuation') as mock_browse:
+            result = client.channel("https://www.youtube.com/@test")
+        self.assertEqual([v["معرف الفيديو"] for v in result["آخر الفيديوهات"]], ["vid0", "vid1"])
+        mock_browse.assert_not_called()
+        self.assertEqual(client.sync_state.get("https://www.youtube.com/@test")[0], "vid0")
+    
+    def test_sync_limit_keeps_mark(self):
+        """اختبار عدم تحديث العلامة إذا قطع --limit القائمة قبل الوصول إليها"""
+        client = self._sync_client("vid5", None)
+        client.channel_limit = 2
+        result = client.channel("https://www.youtube.com/@test")
+        self.assertEqual([v["معرف الفيديو"] for v in result["آخر الفيديوهات"]], ["vid0", "vid1"])
+        self.assertEqual(client.sync_state.get("https://www.youtube.com/@test")[0], "vid5")
+        
+        client.channel_limit = None
+        result = client.channel("https://www.youtube.com/@test")
+        self.assertEqual(len(result["آخر الفيديوهات"]), 5)
+        self.assertEqual(client.sync_state.get("https://www.youtube.com/@test")[0], "vid0")
+
+
+class TestOutputWriters(unittest.TestCase):
+    """اختبارات لكُتّاب نتائج المعالجة الدفعية"""
+    
+    def setUp(self):
+        import tempfile
+        import shutil
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, True)
+        self.output_file = os.path.join(self.output_dir, "out.ndjson")
+    
+    def test_ndjson_batch(self):
+        """اختبار كتابة سطر مضغوط لكل نتيجة ناجحة وتخطي النتائج الفاشلة"""
+        import json
+        results = [("u1", {"معرف الفيديو": "a", "الدقة المتاحة": []}), ("u2", None), ("u3", {"معرف الفيديو": "b"})]
+        self.assertEqual(display_batch_results(iter(results), "video", "ndjson", self.output_file), (2, 1))
+        
+        with open(self.output_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)["معرف الفيديو"] for line in lines], ["a", "b"])
+        self.assertNotIn(": ", lines[0])
+    
+    def test_ndjson_flushes_while_running(self):
+        """اختبار تفريغ الأسطر إلى الملف قبل إغلاق الكاتب حتى يمكن متابعته أثناء التشغيل"""
+        with NdjsonWriter(output_file=self.output_file, flush_records=2, flush_interval=60) as writer:
+            writer.write({"n": 1})
+            writer.write({"n": 2})
+            with open(self.output_file, encoding="utf-8") as f:
+                self.assertEqual(len(f.read().splitlines()), 2)
+            writer.write({"n": 3})
+        self.assertEqual(writer.count, 3)
+    
+    def test_csv_streams_rows_with_linked_file(self):
+        """اختبار كتابة صف العناوين مرة واحدة وربط ملف الدقة المتاحة بمعرف الفيديو"""
+        import csv
+        output_file = os.path.join(self.output_dir, "videos.csv")
+        with CsvBatchWriter("video", output_file) as writer:
+            writer.write(VideoRecord(video_id="a", views=10, publish_date=datetime(2021, 1, 1),
+                                     streams=[StreamRecord(itag=18), StreamRecord(itag=22)]))
+            writer.write({"معرف الفيديو": "b", "الدقة المتاحة": [{"itag": 37}]})
+            with open(output_file, encoding="utf-8") as f:
+                self.assertEqual(len(f.read().splitlines()), 3)
+        
+        with open(output_file, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["معرف الفيديو"] for row in rows], ["a", "b"])
+        self.assertEqual(rows[0]["تاريخ النشر"], "2021-01-01T00:00:00")
+        self.assertEqual(rows[1]["عدد المشاهدات"], "")
+        with open(os.path.join(self.output_dir, "videos_streams.csv"), newline="", encoding="utf-8") as f:
+            streams = list(csv.DictReader(f))
+        self.assertEqual([(row["معرف الفيديو"], row["itag"]) for row in streams], [("a", "18"), ("a", "22"), ("b", "37")])
+    
+    def test_csv_append_keeps_single_header(self):
+        """اختبار الإضافة إلى ملف CSV موجود دون تكرار صف العناوين"""
+        output_file = os.path.join(self.output_dir, "channels.csv")
+        for channel_id in ("UC1", "UC2"):
+            with CsvBatchWriter("channel", output_file, append=True) as writer:
+                writer.write({"معرف القناة": channel_id})
+        with open(output_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("اسم القناة,"))
+    
+    def test_append_through_batch_results(self):
+        """اختبار تمرير --append إلى كاتب CSV و NDJSON ورفضه مع التنسيقات الأخرى"""
+        for output_format in ("csv", "ndjson"):
+            output_file = os.path.join(self.output_dir, "videos." + output_format)
+            for video_id in ("a", "b"):
+                display_batch_results(iter([("u", {"معرف الفيديو": video_id})]), "video", output_format, output_file,
+                                      append=True)
+            with open(output_file, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            self.assertEqual(len(lines), 3 if output_format == "csv" else 2, output_format)
+        with self.assertRaises(ValueError):
+            display_batch_results(iter([]), "video", "json", os.path.join(self.output_dir, "out.json"), append=True)
+
+
+class TestRecordTypes(unittest.TestCase):
+    """اختبارات للسجلات الخام محددة الأنواع وتنسيقها عند العرض فقط"""
+    
+    def test_display_value(self):
+        """اختبار تنسيق القيم الخام في وحدة التحكم"""
+        self.assertEqual(_display_value("عدد المشاهدات", 1234567), "1,234,567")
+        self.assertEqual(_display_value("المدة (ثواني)", 3661), "1:01:01")
+        self.assertEqual(_display_value("تاريخ النشر", datetime(2021, 1, 1)), "2021-01-01")
+        self.assertEqual(_display_value("مقيد بالعمر", False), "لا")
+        self.assertEqual(_display_value("وصف الفيديو", None), "غير متوفر")
+    
+    def test_datetimes_keep_timezone(self):
+        """اختبار توحيد التواريخ بالتوقيت العالمي مع الإبقاء على المنطقة الزمنية في الإخراج"""
+        import json
+        value = _parse_datetime("2005-04-23T20:31:52-07:00")
+        self.assertEqual(value, datetime(2005, 4, 24, 3, 31, 52, tzinfo=timezone.utc))
+        self.assertEqual(_parse_datetime("2005-04-24"), datetime(2005, 4, 24, tzinfo=timezone.utc))
+        record = VideoRecord(video_id="a", publish_date=value)
+        self.assertIn('"2005-04-24T03:31:52+00:00"', json.dumps(record, default=_json_default))
+    
+    def test_cache_preserves_types(self):
+        """اختبار استعادة التواريخ والأعداد من ذاكرة التخزين المؤقت بأنواعها"""
+        import tempfile
+        import shutil
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        cache = MetadataCache(cache_dir)
+        record = {"تاريخ النشر": datetime(2021, 1, 1, 12, 30, tzinfo=timezone.utc), "عدد المشاهدات": 42}
+        cache.set("video", "abc", record)
+        self.assertEqual(cache.get("video", "abc"), record)
+        cache.close()
+    
+    def test_parquet_column_types(self):
+        """اختبار كتابة أعمدة Parquet بأنواعها الصحيحة"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("مكتبة pyarrow غير مثبتة")
+        import tempfile
+        import shutil
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, True)
+        output_file = os.path.join(output_dir, "videos.parquet")
+        with ParquetBatchWriter("video", output_file, row_group_size=1) as writer:
+            writer.write(parse_video_page(SAMPLE_WATCH_HTML, "abc123"))
+            writer.write({"معرف الفيديو": "x"})
+        
+        table = pq.read_table(output_file)
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(str(table.schema.field("عدد المشاهدات").type), "int64")
+        self.assertEqual(table.column("عدد المشاهدات").to_pylist(), [1500, None])
+
+
+
+class TestRecordClasses(unittest.TestCase):
+    """اختبارات لسجلات __slots__ المدمجة وتوافقها مع القواميس"""
+    
+    def test_dict_compatible_access(self):
+        """اختبار القراءة بالمفاتيح العربية والسمات"""
+        record = parse_video_page(SAMPLE_WATCH_HTML, "abc123")
+        self.assertIsInstance(record, VideoRecord)
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(record["عدد المشاهدات"], record.views)
+        self.assertIn("ملاحظة", record)
+        self.assertNotIn("الدقة المتاحة", record)
+        self.assertIsNone(record.streams)
+        self.assertIsNone(record.get("الدقة المتاحة"))
+        with self.assertRaises(KeyError):
+            record["مفتاح غير موجود"]
+    
+    def test_to_dict_round_trip(self):
+        """اختبار التحويل إلى قاموس والعودة مع السجلات المتداخلة"""
+        record = VideoRecord(title="t", video_id="v", streams=[StreamRecord(itag=18, resolution="360p")])
+        data = record.to_dict()
+        self.assertEqual(data, {"عنوان الفيديو": "t", "معرف الفيديو": "v",
+                                "الدقة المتاحة": [{"itag": 18, "الدقة": "360p"}]})
+        restored = VideoRecord.from_dict(data)
+        self.assertIsInstance(restored.streams[0], StreamRecord)
+        self.assertEqual(restored, record)
+        self.assertEqual(restored, data)
+    
+    def test_channel_record_from_page(self):
+        """اختبار إنتاج سجل القناة مع سجلات الفيديوهات"""
+        record = parse_channel_page(SAMPLE_CHANNEL_HTML, "UCtest", "https://www.youtube.com/channel/UCtest")
+        self.assertIsInstance(record, ChannelRecord)
+        self.assertEqual(record.videos[0].to_dict()["معرف الفيديو"], record["آخر الفيديوهات"][0]["معرف الفيديو"])
+    
+    def test_display_accepts_records(self):
+        """اختبار كتابة السجل في ملف JSON بنفس مخرجات القاموس"""
+        import tempfile
+        import shutil
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, True)
+        record = parse_video_page(SAMPLE_WATCH_HTML, "abc123")
+        outputs = []
+        for name, metadata in (("record.json", record), ("dict.json", record.to_dict())):
+            output_file = os.path.join(output_dir, name)
+            display_video_metadata(metadata, "json", output_file)
+            with open(output_file, encoding="utf-8") as f:
+                outputs.append(f.read())
+        self.assertEqual(outputs[0], outputs[1])
+    
+    def test_record_pickle_keeps_unset_fields(self):
+        """اختبار نقل السجلات بين العمليات دون تحويل الحقول غير المحددة إلى None"""
+        import pickle
+        record = VideoRecord(title="x", streams=[StreamRecord(itag=18)])
+        restored = pickle.loads(pickle.dumps(record))
+        self.assertEqual(restored, record)
+        self.assertNotIn("وصف الفيديو", restored)
+
+
+class TestStageMetrics(unittest.TestCase):
+    """اختبارات لقياس أزمنة المراحل وعدادات الأحداث"""
+    
+    def test_quantiles_and_counters(self):
+        """اختبار حساب النسب المئوية وزيادة العدادات"""
+        metrics = StageMetrics()
+        for value in range(1, 101):
+            metrics.record("parse", value / 1000)
+        metrics.increment("retries")
+        metrics.increment("retries")
+        
+        snapshot = metrics.snapshot()
+        summary = snapshot["stages"]["parse"]
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual((summary["p50"], summary["p95"], summary["p99"], summary["max"]), (0.05, 0.095, 0.099, 0.1))
+        self.assertEqual(snapshot["counters"], {"retries": 2})
+    
+    def test_prometheus_format(self):
+        """اختبار تنسيق Prometheus النصي"""
+        metrics = StageMetrics()
+        metrics.record("page_fetch", 0.25)
+        metrics.increment("fallback_video")
+        text = metrics.to_prometheus()
+        self.assertIn('ytubedata_stage_seconds{stage="page_fetch",quantile="0.99"} 0.25', text)
+        self.assertIn('ytubedata_stage_seconds_count{stage="page_fetch"} 1', text)
+        self.assertIn('ytubedata_events_total{event="fallback_video"} 1', text)
+        self.assertTrue(text.endswith("\n"))
+    
+    @patch('YtubeData.YouTube')
+    def test_client_records_stages(self, mock_youtube):
+        """اختبار تسجيل مراحل الاستخراج وإعادة المحاولة والطريقة الاحتياطية"""
+        mock_youtube.side_effect = RuntimeError("pytube معطل")
+        metrics = StageMetrics()
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        retry_policy = RetryPolicy(max_attempts=2, sleep=lambda delay: None)
+        with YtubeClient(retry_policy=retry_policy, metrics=metrics) as client:
+            client._session = session
+            self.assertIsNotNone(client.video("https://youtu.be/abc123"))
+        
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"], {"fallback_video": 1})
+        self.assertLessEqual({"video", "pytube_video", "page_fetch", "page_parse"}, set(snapshot["stages"]))
+        
+        outcomes = iter([ValueError("خطأ مؤقت"), "ok"])
+        def flaky():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        self.assertEqual(retry_policy.call(flaky, metrics=metrics), "ok")
+        self.assertEqual(metrics.snapshot()["counters"]["retries"], 1)
+        self.assertEqual(metrics.snapshot()["stages"]["retry_sleep"]["count"], 1)
+
+
+
+class TestServe(unittest.TestCase):
+    """اختبارات للخدمة المحلية serve"""
+    
+    def setUp(self):
+        import json
+        self.json = json
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        self.session = session
+        self.metrics = StageMetrics()
+        self.client = YtubeClient(retry_policy=RetryPolicy(max_attempts=1), metrics=self.metrics)
+        self.client._session = session
+        self.addCleanup(self.client.close)
+        self.service = YtubeService(self.client, self.metrics, max_batch=2)
+        patcher = patch('YtubeData.YouTube', side_effect=RuntimeError("pytube معطل"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_video_endpoint_uses_memo(self):
+        """اختبار /video وإعادة استخدام النتيجة من ذاكرة العملية"""
+        for _ in range(2):
+            status, content_type, body = self.service.handle("GET", "/video", "id=abc123")
+            self.assertEqual(status, 200)
+            self.assertEqual(self.json.loads(body)["عنوان الفيديو"], "فيديو تجريبي")
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(self.metrics.snapshot()["stages"]["serve_video"]["count"], 2)
+    
+    def test_errors(self):
+        """اختبار رموز الأخطاء للطلبات غير الصالحة"""
+        self.assertEqual(self.service.handle("GET", "/video", "")[0], 400)
+        self.assertEqual(self.service.handle("GET", "/unknown")[0], 404)
+        self.assertEqual(self.service.handle("GET", "/batch")[0], 405)
+        self.assertEqual(self.service.handle("POST", "/batch", "", b"not json")[0], 400)
+        self.assertEqual(self.service.handle("POST", "/batch", "", b'{"urls": ["a", "b", "c"]}')[0], 413)
+    
+    def test_batch_health_and_metrics_over_http(self):
+        """اختبار /batch و /health و /metrics عبر خادم HTTP حقيقي"""
+        import threading
+        import urllib.request
+        server = make_server(self.service, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        request = urllib.request.Request(
+            f"{base}/batch", method="POST",
+            data=self.json.dumps({"type": "video", "urls": ["https://youtu.be/abc123", "bad"]}).encode("utf-8")
+        )
+        with urllib.request.urlopen(request) as response:
+            batch = self.json.loads(response.read())
+        self.assertEqual((batch["succeeded"], batch["failed"]), (1, 1))
+        
+        with urllib.request.urlopen(f"{base}/health") as response:
+            health = self.json.loads(response.read())
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(health["memo_entries"], 1)
+        
+        with urllib.request.urlopen(f"{base}/metrics") as response:
+            self.assertIn('ytubedata_stage_seconds_count{stage="serve_batch"} 1', response.read().decode("utf-8"))
+    
+    def test_malformed_content_length(self):
+        """اختبار الرد برمز 400 وجسم JSON على ترويسة Content-Length غير صالحة"""
+        import threading
+        import http.client
+        server = make_server(self.service, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        
+        for value in ("abc", "-5"):
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            connection.putrequest("POST", "/batch")
+            connection.putheader("Content-Length", value)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400, value)
+            self.assertIn("error", self.json.loads(response.read()))
+            connection.close()
+    
+    def test_memo_ttl(self):
+        """اختبار انتهاء صلاحية النتائج في ذاكرة العملية"""
+        now = [0.0]
+        memo = MemoStore(ttl=10, clock=lambda: now[0])
+        memo.set("k", "v")
+        self.assertEqual(memo.get("k"), "v")
+        now[0] = 10.0
+        self.assertIsNone(memo.get("k"))
+        self.assertEqual(len(memo), 0)
+    
+    def test_subcommand_dispatch(self):
+        """اختبار توجيه الأمر الفرعي serve من الدالة الرئيسية"""
+        mock_serve = MagicMock()
+        with patch.dict('YtubeData.SUBCOMMANDS', {"serve": mock_serve}):
+            main(["serve", "--port", "9000"])
+        mock_serve.assert_called_once_with(["--port", "9000"])
+
+
+
+class TestWatch(unittest.TestCase):
+    """اختبارات لوضع مراقبة عدد المشاهدات watch"""
+    
+    def setUp(self):
+        import tempfile
+        import shutil
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.path = os.path.join(self.temp_dir, "views.ytvs")
+    
+    def test_store_append_and_truncated_tail(self):
+        """اختبار إلحاق العينات وقراءتها واقتطاع السجل غير المكتمل"""
+        store = ViewSeriesStore(self.path)
+        store.append(100.5, "abc123def45", 1500)
+        store.append(200.0, "xyz987uvw65", 2 ** 40)
+        with self.assertRaises(ValueError):
+            store.append(300.0, "short", 1)
+        store.close()
+        self.assertEqual(os.path.getsize(self.path), len(ViewSeriesStore.MAGIC) + 2 * ViewSeriesStore.RECORD.size)
+        
+        with open(self.path, "ab") as f:
+            f.write(b"\x00" * 5)
+        store = ViewSeriesStore(self.path)
+        store.append(400.0, "abc123def45", 1600)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store), [
+            (100.5, "abc123def45", 1500),
+            (200.0, "xyz987uvw65", 2 ** 40),
+            (400.0, "abc123def45", 1600)
+        ])
+        store.close()
+    
+    def test_store_rejects_foreign_file(self):
+        """اختبار رفض ملف ليس مخزن عينات"""
+        with open(self.path, "wb") as f:
+            f.write(b"not a store")
+        with self.assertRaises(ValueError):
+            ViewSeriesStore(self.path)
+    
+    @patch.object(YtubeClient, 'http_get')
+    def test_video_views_streams_page(self, mock_get):
+        """اختبار جلب عدد المشاهدات وحده مع إغلاق الاتصال مبكراً"""
+        data = SAMPLE_WATCH_HTML.encode("utf-8") + b"x" * 100000
+        response = MagicMock(status_code=200)
+        response.iter_content.side_effect = lambda size: (data[i:i + 256] for i in range(0, len(data), 256))
+        mock_get.return_value = response
+        client = YtubeClient()
+        
+        self.assertEqual(client.video_views("abc123def45"), 1500)
+        self.assertTrue(mock_get.call_args[1]["stream"])
+        response.close.assert_called_once()
+    
+    def test_polls_spread_evenly(self):
+        """اختبار توزيع الطلبات بالتساوي على الفترة وتخطي الفيديوهات الفاشلة"""
+        now = [0.0]
+        polls = []
+        client = MagicMock(metrics=None)
+        
+        def video_views(video_id):
+            polls.append((now[0], video_id))
+            return None if video_id == "bbbbbbbbbbb" else 10
+        
+        def sleep(seconds):
+            now[0] += seconds
+        
+        client.video_views.side_effect = video_views
+        store = ViewSeriesStore(self.path)
+        written = watch_views(client, ["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc", "ddddddddddd"], store,
+                              interval=60, rounds=2, clock=lambda: now[0], sleep=sleep, now=lambda: now[0])
+        
+        self.assertEqual([t for t, _ in polls], [0, 15, 30, 45, 60, 75, 90, 105])
+        self.assertEqual(written, 6)
+        self.assertEqual([sample[1] for sample in store][:3], ["aaaaaaaaaaa", "ccccccccccc", "ddddddddddd"])
+        store.close()
+
+
+
+class TestAnalyze(unittest.TestCase):
+    """اختبارات لتحليل الملفات المصدرة analyze"""
+    
+    def setUp(self):
+        import tempfile
+        import shutil
+        import json
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        
+        videos = [
+            {"معرف الفيديو": "aaaaaaaaaaa", "اسم القناة": "أ", "معرف القناة": "UCA", "عدد المشاهدات": 1000,
+             "المدة (ثواني)": 30, "تاريخ النشر": "2024-01-01"},
+            {"معرف الفيديو": "bbbbbbbbbbb", "اسم القناة": "أ", "معرف القناة": "UCA", "عدد المشاهدات": 3000,
+             "المدة (ثواني)": 300, "تاريخ النشر": "2024-01-08T00:00:00"}
+        ]
+        self.json_file = os.path.join(self.temp_dir, "videos.json")
+        with open(self.json_file, "w", encoding="utf-8") as f:
+            json.dump(videos, f, ensure_ascii=False)
+        
+        channel = ChannelRecord.from_dict({
+            "اسم القناة": "ب", "معرف القناة": "UCB",
+            "آخر الفيديوهات": [
+                {"معرف الفيديو": "ccccccccccc", "عدد المشاهدات": 10, "المدة (ثواني)": 2000, "تاريخ النشر": "2024-02-01"},
+                {"معرف الفيديو": "ddddddddddd", "عدد المشاهدات": 20, "تاريخ النشر": "2024-02-15"}
+            ]
+        })
+        self.ndjson_file = os.path.join(self.temp_dir, "channels.ndjson")
+        with NdjsonWriter("channel", self.ndjson_file) as writer:
+            writer.write(channel)
+        self.csv_file = os.path.join(self.temp_dir, "channels.csv")
+        with CsvBatchWriter("channel", self.csv_file) as writer:
+            writer.write(channel)
+    
+    def test_load_export_formats(self):
+        """اختبار توحيد أعمدة JSON وفك فيديوهات القنوات من NDJSON و CSV مع ملفها الجانبي"""
+        videos = load_export([self.json_file, self.ndjson_file])
+        self.assertEqual(len(videos), 4)
+        self.assertEqual(videos["views"].sum(), 4030)
+        self.assertEqual(set(videos["channel"]), {"أ", "ب"})
+        self.assertEqual(videos["published"].isna().sum(), 0)
+        
+        from_csv = load_export([self.csv_file])
+        self.assertEqual(sorted(from_csv["video_id"]), ["ccccccccccc", "ddddddddddd"])
+        self.assertEqual(set(from_csv["channel"]), {"ب"})
+        self.assertEqual(len(load_export([self.ndjson_file, self.csv_file])), 2)
+    
+    def test_channel_aggregates(self):
+        """اختبار المئينات ووتيرة الرفع وتوزيع المدد والنمو لكل قناة"""
+        series_file = os.path.join(self.temp_dir, "views.ytvs")
+        store = ViewSeriesStore(series_file)
+        store.append(0, "aaaaaaaaaaa", 1000)
+        store.append(2 * 86400, "aaaaaaaaaaa", 1200)
+        store.close()
+        
+        result = analyze_channels(load_export([self.json_file, self.ndjson_file]),
+                                  load_view_series(series_file), as_of="2024-03-01")
+        self.assertEqual(list(result.index), ["UCA", "UCB"])
+        first = result.loc["UCA"]
+        self.assertEqual(first["عدد الفيديوهات"], 2)
+        self.assertEqual(first["إجمالي المشاهدات"], 4000)
+        self.assertAlmostEqual(first["المشاهدات p50"], 2000)
+        self.assertAlmostEqual(first["وسيط الفاصل بين الرفع (أيام)"], 7)
+        self.assertAlmostEqual(first["حتى دقيقة %"], 50)
+        self.assertAlmostEqual(first["4-20 دقيقة %"], 50)
+        self.assertAlmostEqual(first["نمو المشاهدات المرصود يومياً"], 100)
+        self.assertAlmostEqual(first["وسيط النمو اليومي المرصود %"], 10)
+        self.assertAlmostEqual(result.loc["UCB", "أكثر من 20 دقيقة %"], 100)
+        self.assertTrue(result.loc["UCB", ["نمو المشاهدات المرصود يومياً"]].isna().all())
+
+
+
+class TestIngest(unittest.TestCase):
+    """اختبارات لاستخراج البيانات من الصفحات المحفوظة ingest"""
+    
+    def setUp(self):
+        import tempfile
+        import shutil
+        import gzip
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.pages_dir = os.path.join(self.temp_dir, "pages")
+        os.makedirs(os.path.join(self.pages_dir, "sub"))
+        with open(os.path.join(self.pages_dir, "abc123def45.html"), "w", encoding="utf-8") as f:
+            f.write(SAMPLE_WATCH_HTML)
+        with gzip.open(os.path.join(self.pages_dir, "sub", "watch.html.gz"), "wt", encoding="utf-8") as f:
+            f.write(SAMPLE_WATCH_HTML)
+        self.channel_file = os.path.join(self.pages_dir, "channel.html")
+        with open(self.channel_file, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_CHANNEL_HTML)
+        os.utime(self.channel_file, (1700000000, 1700000000))
+        with open(os.path.join(self.pages_dir, "notes.txt"), "w") as f:
+            f.write("ليست صفحة")
+    
+    def test_directory_with_process_pool(self):
+        """اختبار استخراج صفحات مجلد (عادية ومضغوطة) على عدة عمليات وتخطي الصفحات من نوع آخر"""
+        results = list(process_saved_pages(self.pages_dir, "video", workers=2))
+        self.assertEqual([os.path.basename(name) for name, metadata in results],
+                         ["abc123def45.html", "channel.html", "watch.html.gz"])
+        by_name = {os.path.basename(name): metadata for name, metadata in results}
+        self.assertEqual(by_name["abc123def45.html"]["معرف الفيديو"], "abc123def45")
+        self.assertEqual(by_name["watch.html.gz"]["معرف الفيديو"], "abc123")
+        self.assertEqual(by_name["watch.html.gz"]["عدد المشاهدات"], 1500)
+        self.assertIsNone(by_name["channel.html"])
+
+    def test_gzip_page_closes_file(self):
+        """اختبار إغلاق الملف الأصلي بعد قراءة صفحة مضغوطة بـ gzip"""
+        import builtins
+        from YtubeData import parse_saved_page, SavedPage
+        path = os.path.join(self.pages_dir, "sub", "watch.html.gz")
+        opened = []
+        real_open = builtins.open
+
+        def tracking_open(*args, **kwargs):
+            handle = real_open(*args, **kwargs)
+            opened.append(handle)
+            return handle
+
+        with patch("builtins.open", side_effect=tracking_open):
+            metadata = parse_saved_page(SavedPage(path, path, 0), "video")
+        self.assertEqual(metadata.video_id, "abc123")
+        self.assertEqual(len(opened), 1)
+        self.assertTrue(opened[0].closed)
+
+    def test_tar_archive_channels(self):
+        """اختبار قراءة أرشيف tar.gz متدفقاً وتقدير التواريخ النسبية من زمن حفظ الصفحة"""
+        import tarfile
+        archive = os.path.join(self.temp_dir, "pages.tar.gz")
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(self.pages_dir, arcname="pages")
+        
+        pages = list(iter_saved_pages(archive))
+        self.assertEqual(len(pages), 3)
+        self.assertIsInstance(pages[0].source, bytes)
+        
+        results = [metadata for name, metadata in process_saved_pages(archive, "channel", workers=2, limit=None) if metadata]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["معرف القناة"], "UC123")
+        self.assertEqual(len(results[0]["آخر الفيديوهات"]), 7)
+        self.assertEqual(results[0]["آخر الفيديوهات"][0]["تاريخ النشر"], datetime(2023, 11, 13, 22, 13, 20, tzinfo=timezone.utc))
+
+
+
+class TestPageArchive(unittest.TestCase):
+    """اختبارات لأرشيف الصفحات المنزَّلة وإعادة التحليل منه"""
+    
+    def setUp(self):
+        import tempfile
+        import shutil
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+        patcher = patch('YtubeData.YouTube', side_effect=RuntimeError("pytube معطل"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        channel_patcher = patch('YtubeData.Channel', side_effect=RuntimeError("pytube معطل"))
+        channel_patcher.start()
+        self.addCleanup(channel_patcher.stop)
+    
+    def _objects(self):
+        return [name for root, dirs, files in os.walk(os.path.join(self.archive_dir, "objects")) for name in files]
+    
+    def test_store_deduplicates_by_content(self):
+        """اختبار حفظ المحتوى المتكرر مرة واحدة والبحث بالمعرف أو بالرابط"""
+        archive = PageArchive(self.archive_dir)
+        first = archive.store("video", "abc123", "https://youtu.be/abc123", SAMPLE_WATCH_HTML, fetched=100.0)
+        second = archive.store("video", "xyz789", "https://youtu.be/xyz789", SAMPLE_WATCH_HTML)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self._objects()), 1)
+        self.assertEqual(len(archive), 2)
+        self.assertEqual(archive.load("video", "abc123"), (SAMPLE_WATCH_HTML, 100.0))
+        self.assertEqual(archive.load("video", None, "https://youtu.be/abc123")[0], SAMPLE_WATCH_HTML)
+        self.assertIsNone(archive.load("channel", "abc123"))
+        archive.close()
+    
+    def test_reparse_without_network(self):
+        """اختبار أرشفة الصفحات أثناء الاستخراج ثم إعادة تحليلها دون أي طلب"""
+        def get(url, **kwargs):
+            html = SAMPLE_CHANNEL_HTML if "/channel/" in url else SAMPLE_WATCH_HTML
+            return MagicMock(status_code=200, text=html)
+        
+        session = MagicMock()
+        session.get.side_effect = get
+        client = YtubeClient(retry_policy=RetryPolicy(max_attempts=1), archive=PageArchive(self.archive_dir))
+        client._session = session
+        video = client.video("https://www.youtube.com/watch?v=abc123")
+        channel = client.channel("https://www.youtube.com/channel/UC123")
+        client.close()
+        self.assertEqual(len(self._objects()), 2)
+        
+        offline = MagicMock()
+        offline.get.side_effect = AssertionError("لا يجب الاتصال بالشبكة")
+        client = YtubeClient(archive=PageArchive(self.archive_dir), reparse=True)
+        client._session = offline
+        self.addCleanup(client.close)
+        self.assertEqual(client.video("https://youtu.be/abc123"), video)
+        self.assertEqual(client.channel("https://www.youtube.com/channel/UC123"), channel)
+        self.assertIsNone(client.video("https://youtu.be/missing1234"))
+        offline.get.assert_not_called()
+
+    def test_archive_stores_full_page_when_streaming(self):
+        """اختبار تنزيل الصفحة كاملة مع الأرشيف حتى مع التنزيل المتدفق"""
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, text=SAMPLE_WATCH_HTML)
+        archive = PageArchive(self.archive_dir)
+        client = YtubeClient(retry_policy=RetryPolicy(max_attempts=1), archive=archive, stream_pages=True)
+        client._session = session
+        self.addCleanup(client.close)
+        self.assertEqual(client.video("https://www.youtube.com/watch?v=abc123").video_id, "abc123")
+        self.assertNotIn("stream", session.get.call_args.kwargs)
+        self.assertEqual(archive.load("video", "abc123")[0], SAMPLE_WATCH_HTML)
+
+    def test_reparse_requires_archive(self):
+        """اختبار رفض إعادة التحليل دون أرشيف"""
+        with self.assertRaises(ValueError):
+            YtubeClient(reparse=True)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file